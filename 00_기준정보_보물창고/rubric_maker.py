@@ -4,8 +4,6 @@ import sys
 import re
 import warnings
 from pathlib import Path
-from openai import OpenAI
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # =========================================================
@@ -28,22 +26,26 @@ if not GEMINI_KEY or not OPENAI_KEY:
     print("❌ [오류] API 키가 없습니다. .env 파일을 확인하세요.")
     sys.exit(1)
 
-genai.configure(api_key=GEMINI_KEY)
-client = OpenAI(api_key=OPENAI_KEY)
-
 OUTPUT_FILE = CURRENT_DIR / "standard-rubric.json"
 
 # 🔥 [경로 수정] 루트 폴더를 시스템 경로에 최우선 추가
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
+import context_packer
+import llm_gateway
+import model_fallback
+ANALYSIS_DIR = PROJECT_ROOT / "02_분석실_Analysis"
+if str(ANALYSIS_DIR) not in sys.path: sys.path.append(str(ANALYSIS_DIR))
+import reaction_store
+TIPS_BUDGET_TOKENS = 80000  # 비급 전체 예산 상한 (파일 수와 무관하게 공평 분배)
+
 # 🔥 [핵심] 1.5 타령 금지 -> 무조건 Selector에게 위임
 try:
     from model_selector import find_best_model
     # 분석용(Analyst)으로 가장 똑똑한 놈을 호출
     GEMINI_MODEL_NAME = find_best_model() 
     print(f"🚀 [Rubric Engine] Gemini 분석가: {GEMINI_MODEL_NAME}")
-    gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
 except ImportError:
     print("❌ [치명적 오류] 루트 폴더에 'model_selector.py'가 없습니다!")
@@ -52,6 +54,13 @@ except Exception as e:
     print(f"❌ [치명적 오류] 모델 로드 실패: {e}")
     sys.exit(1)
 
+LEGISLATOR_CHAIN = model_fallback.FallbackChain("rubric_legislator", ["gpt-5.1", "gpt-4o"], probe=model_fallback.gateway_probe(OPENAI_KEY))
+
+def _is_json_rubric(text):
+    """JSON이 깨진 법전 응답은 캐시에 남기지 않음"""
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    try: return isinstance(json.loads(match.group(0) if match else text), dict)
+    except Exception: return False
 
 # ---------------------------------------------------------
 # 🧠 [실행] 법전 편찬 프로세스
@@ -73,12 +82,20 @@ def create_rubric():
         print("   ❌ 읽을 파일(팁)이 없습니다. '05_팁_보물창고'에 비급을 넣어주세요.")
         return
 
-    for f in found_files:
+    packer = context_packer.ContextPacker(context_packer.budget_for(GEMINI_MODEL_NAME, cap=TIPS_BUDGET_TOKENS))
+    for i, f in enumerate(found_files):
         try:
-            content = f.read_text(encoding='utf-8')
-            all_tips += f"\n--- Tip Source: {f.name} ---\n{content}\n"
+            packer.add(f"{i}:{f.name}", f.read_text(encoding='utf-8'))
             print(f"      📖 Input: {f.name}")
         except: pass
+    packed = packer.pack()
+    for section, content in packed.items():
+        if content: all_tips += f"\n--- Tip Source: {section.split(':', 1)[1]} ---\n{content}\n"
+    print(f"      {packer.summary('Tips', max_items=5)}")
+
+    # 실제 회차별 유지율 (아카이브 반응 데이터)
+    reaction_store.ingest()
+    retention_brief = reaction_store.brief()
 
     # 3. Gemini: 심층 분석 (ToT 기법 적용)
     print(f"\n   🧠 [Gemini ({GEMINI_MODEL_NAME})] 성공 요인 추출 중 (Tree of Thoughts)...")
@@ -106,12 +123,15 @@ def create_rubric():
     Focus on specific keywords found in the [Data].
     
     [Data]
-    {all_tips[:100000]}
+    {all_tips}
+    
+    [Retention Data (Real chapter views of hit novels) - ground 'Plot_Pacing' and 'Episode_Hook' thresholds in these numbers]
+    {retention_brief or "N/A"}
     """
     
     try:
-        analysis_res = gemini_model.generate_content(analysis_prompt)
-        core_values = analysis_res.text
+        # 비급/반응 데이터가 그대로면 캐시에서 즉시 복원
+        core_values = llm_gateway.generate(analysis_prompt, GEMINI_MODEL_NAME, api_key=GEMINI_KEY, cache=True)
         print("      ✅ 분석 완료. 데이터 추출 성공.")
     except Exception as e:
         print(f"   ❌ Gemini 분석 단계 실패: {e}")
@@ -151,28 +171,15 @@ def create_rubric():
     """
     
     try:
-        # GPT-5.1 호출 (없으면 4o로 폴백)
-        model_name = "gpt-5.1"
-        try:
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": "You are a cold-blooded logic machine. Output JSON only."},
-                    {"role": "user", "content": legislator_prompt}
-                ],
-                temperature=0.2
-            )
-        except:
-            print("      ⚠️ [Info] GPT-5.1 호출 실패, gpt-4o로 전환합니다.")
-            model_name = "gpt-4o"
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": "system", "content": "JSON only."}, {"role": "user", "content": legislator_prompt}],
-                temperature=0.2
-            )
+        # GPT-5.1 호출 (없으면 4o로 폴백 - 없는 모델은 부재 캐시로 다음 실행부터 바로 건너뜀)
+        content, model_name = LEGISLATOR_CHAIN.call(
+            lambda m: llm_gateway.generate(legislator_prompt, m, system="You are a cold-blooded logic machine. Output JSON only.",
+                                           temperature=0.2, api_key=OPENAI_KEY, cache=True, validate=_is_json_rubric),
+            label="Rubric")
+        if not content: raise RuntimeError("법전 후보 모델 전부 실패")
+        print(f"      ✅ 법전 엔진: {model_name}")
         
         # 🔥 [안전 장치] 정규식으로 JSON만 추출
-        content = response.choices[0].message.content
         match = re.search(r'\{.*\}', content, re.DOTALL)
         if match:
             rubric_json = match.group(0)
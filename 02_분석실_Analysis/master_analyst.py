@@ -4,8 +4,9 @@ import json
 import warnings
 import re
 import sys
+import threading
 from pathlib import Path
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
 # =========================================================
@@ -21,11 +22,15 @@ PROJECT_ROOT = CURRENT_DIR.parent
 
 if str(PROJECT_ROOT) not in sys.path: sys.path.append(str(PROJECT_ROOT))
 
+import corpus_index
+import context_packer
+import reaction_store
+import trend_aggregator
+import llm_gateway
+
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 API_KEY = os.getenv("GEMINI_KEY_PLANNING") or os.getenv("GEMINI_API_KEY")
 
-genai.configure(api_key=API_KEY)
-
 # 모델 선택 (분석은 논리력이 생명 -> 'logic' 모드)
 try:
     from model_selector import find_best_model
@@ -34,7 +39,6 @@ except:
     MODEL_NAME = "gemini-1.5-flash"
 
 print(f"🚀 [Master Analyst] 가동 (Engine: {MODEL_NAME})")
-model = genai.GenerativeModel(MODEL_NAME)
 
 # 경로 설정
 RAW_DATA_DIR = PROJECT_ROOT / "01_자료실_Raw_Data" / "00_성공작_아카이브"
@@ -57,17 +61,20 @@ BRAIN_REFLECTION = load_brain("02_Self_Reflection.md")
 # ---------------------------------------------------------
 # 🛠️ [Utility] 스마트 로더 & 파서
 # ---------------------------------------------------------
-def load_smart_context(folder_path, limit=60000):
-    """폴더 내 모든 MD 파일을 읽어 컨텍스트 확보"""
-    full_text = ""
-    md_files = sorted(list(folder_path.glob("*.md")))
-    for f in md_files:
-        try:
-            text = f.read_text(encoding='utf-8')
-            full_text += f"\n=== [File: {f.name}] ===\n{text}\n"
-            if len(full_text) >= limit: break
-        except: pass
-    return full_text[:limit]
+ANALYSIS_TEXT_TOKENS = 45000   # 본문 예산 상한 (모델 창이 더 작으면 그쪽에 맞춤)
+RUBRIC_TOKENS = 1500
+META_TOKENS = 800
+RETENTION_TOKENS = 600
+
+def load_smart_context(folder_path, max_tokens=ANALYSIS_TEXT_TOKENS):
+    """작품의 회차들을 (아카이브 색인에서) 순서대로 읽어 토큰 예산만큼 확보 (앞 회차 우선, 문장 단위로 자름)"""
+    packer = context_packer.ContextPacker(context_packer.budget_for(MODEL_NAME, cap=max_tokens))
+    episodes = corpus_index.novel_episodes(folder_path)
+    for i, ep in enumerate(episodes):
+        packer.add(ep['name'], ep['content'], priority=i)
+    packed = packer.pack()
+    print(f"      {packer.summary('Episodes', max_items=3)}")
+    return "".join(f"\n=== [File: {ep['name']}] ===\n{packed[ep['name']]}\n" for ep in episodes if packed[ep['name']])
 
 def extract_json_safely(text):
     """AI 답변에서 JSON만 추출"""
@@ -88,12 +95,22 @@ def save_report(folder_name, category, data):
     with open(target_dir / filename, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
     print(f"      💾 [Saved] {filename}")
+    # 통합 트렌드 리포트에 이 파일 몫만 반영
+    try: trend_aggregator.build()
+    except Exception as e: print(f"      ⚠️ [Trend] 리포트 갱신 실패: {e}")
 
 # ---------------------------------------------------------
 # 📝 [Prompt Engineering] 지능형 분석 프롬프트 조립
 # ---------------------------------------------------------
-def create_analysis_prompt(task_type, rubric, meta, text):
-    
+def create_analysis_prompt(task_type, rubric, meta, text, retention=""):
+    # 기준표/메타는 문장 단위로 예산만큼만 (글자 수로 자르면 JSON 중간이 끊김)
+    packer = context_packer.ContextPacker(RUBRIC_TOKENS + META_TOKENS + RETENTION_TOKENS)
+    packer.add("rubric", rubric, priority=0, max_tokens=RUBRIC_TOKENS)
+    packer.add("meta", meta, priority=0, max_tokens=META_TOKENS)
+    packer.add("retention", retention, priority=0, max_tokens=RETENTION_TOKENS)
+    packed = packer.pack()
+    rubric, meta, retention = packed["rubric"], packed["meta"], packed["retention"]
+
     # 1. 시스템 페르소나 (MD 파일 활용)
     system_instruction = f"""
     {BRAIN_RAG}
@@ -113,10 +130,13 @@ def create_analysis_prompt(task_type, rubric, meta, text):
     [Task]: Analyze the provided novel text focusing on **{task_type}**.
     
     [Rubric Criteria]:
-    {rubric[:1000]}
+    {rubric}
     
     [Novel Meta Info]:
-    {meta[:500]}
+    {meta}
+    
+    [Reader Retention Data (Real Numbers)]:
+    {retention or "N/A"}
     
     [Novel Text Content]:
     {text}
@@ -140,61 +160,99 @@ def create_analysis_prompt(task_type, rubric, meta, text):
     return system_instruction, user_message
 
 # ---------------------------------------------------------
-# 🔥 [Main Logic] 전체 분석 실행
+# 🔥 [Main Logic] 전체 분석 실행 (작품 x 관점 동시 처리)
 # ---------------------------------------------------------
-def analyze_all():
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "4"))   # 동시 호출 상한 (1이면 순차)
+ANALYSIS_MAX_RETRIES = int(os.getenv("ANALYSIS_MAX_RETRIES", "2"))   # 실패한 작업만 다시 (다른 작업은 계속 진행)
+RETRY_BASE_SECONDS = 5
+
+# 3가지 관점 분석 (문체, 캐릭터, 스토리)
+TASKS = [
+    ("Writing Style & Pacing", "01_문체_분석"),
+    ("Characters (5 Key Roles)", "02_캐릭터_분석"),
+    ("Plot Structure & Hook", "03_스토리_분석")
+]
+
+_context_lock = threading.Lock()
+_context_cache = {}     # 작품 폴더 -> (본문, 메타, 유지율) : 관점 3개가 한 번만 읽도록
+
+def _novel_context(folder):
+    with _context_lock:
+        entry = _context_cache.setdefault(folder, {"lock": threading.Lock(), "data": None})
+    with entry["lock"]:
+        if entry["data"] is None:
+            entry["data"] = (load_smart_context(folder), corpus_index.novel_meta_text(folder), reaction_store.brief(folder.name))
+        return entry["data"]
+
+def analyze_one(folder, task_name, rubric_text):
+    """(작품, 관점) 1건 분석 -> 결과 dict (파싱 실패 시 예외 -> 재시도 대상)"""
+    full_text, meta_data, retention = _novel_context(folder)
+    # 지능형 프롬프트 생성
+    sys_msg, usr_msg = create_analysis_prompt(task_name, rubric_text, meta_data, full_text, retention)
+
+    # 모델 호출 (System Instruction에 뇌 장착 - 같은 관점 모델은 게이트웨이가 재사용)
+    # 작품/법전/프롬프트가 그대로면 캐시에서 즉시 복원 (파싱 실패 응답은 저장 안 함)
+    text = llm_gateway.generate(usr_msg, MODEL_NAME, system=sys_msg, api_key=API_KEY, cache=True,
+                                validate=lambda t: "error" not in extract_json_safely(t))
+    data = extract_json_safely(text)
+    if "error" in data: raise ValueError("JSON 파싱 실패")
+    return data
+
+def analyze_all(max_workers=None):
     rubric_text = "Standard Criteria"
     if RUBRIC_FILE.exists(): rubric_text = RUBRIC_FILE.read_text(encoding='utf-8')
 
-    targets = []
-    if RAW_DATA_DIR.exists():
-        for root, dirs, files in os.walk(RAW_DATA_DIR):
-            path = Path(root)
-            if any(f.endswith('.md') for f in files) and path != RAW_DATA_DIR:
-                targets.append(path)
+    # 회차가 있는 작품 폴더 목록 (아카이브 색인 증분 갱신 후 조회)
+    targets = [n["path"] for n in corpus_index.list_novels()]
     
     if not targets:
         print("📭 분석할 작품이 없습니다.")
         return
 
-    print(f"🔍 총 {len(targets)}개 작품 분석 시작...\n")
-
-    for folder in targets:
-        print(f"📘 [Target] {folder.name}")
-        full_text = load_smart_context(folder)
-        meta_data = ""
-        for jf in folder.glob("*.json"):
-            try: meta_data += jf.read_text(encoding='utf-8')
-            except: pass
-
-        # 3가지 관점 분석 (문체, 캐릭터, 스토리)
-        tasks = [
-            ("Writing Style & Pacing", "01_문체_분석"),
-            ("Characters (5 Key Roles)", "02_캐릭터_분석"),
-            ("Plot Structure & Hook", "03_스토리_분석")
-        ]
-
-        for task_name, category in tasks:
-            try:
-                # 지능형 프롬프트 생성
-                sys_msg, usr_msg = create_analysis_prompt(task_name, rubric_text, meta_data, full_text)
-                
-                # 모델 호출 (System Instruction에 뇌 장착)
-                model_instance = genai.GenerativeModel(MODEL_NAME, system_instruction=sys_msg)
-                res = model_instance.generate_content(usr_msg)
-                
-                # 결과 저장
-                data = extract_json_safely(res.text)
-                if "error" not in data:
-                    save_report(folder.name, category, data)
-                else:
-                    print(f"      🚨 {task_name} 파싱 실패")
-            except Exception as e:
-                print(f"      🚨 {task_name} 오류: {e}")
-            
-            time.sleep(1) # 쿨타임
-
-        print("      ✅ 분석 완료.\n")
+    max_workers = max(1, max_workers or ANALYSIS_MAX_WORKERS)
+    jobs = [(folder, task_name, category) for folder in targets for task_name, category in TASKS]
+    print(f"🔍 총 {len(targets)}개 작품 분석 시작... ({len(jobs)}건, 동시 {max_workers}개)\n")
+    print(f"📈 [Reaction Store] 반응 데이터 적재: {reaction_store.ingest()}")
+
+    done, failed = 0, []
+    retry_queue = []    # (재시도 시각, 작업, 시도 횟수)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        running = {pool.submit(analyze_one, job[0], job[1], rubric_text): (job, 1) for job in jobs}
+        while running or retry_queue:
+            # 대기 시간이 지난 재시도 작업 투입
+            now = time.time()
+            for item in [r for r in retry_queue if r[0] <= now]:
+                retry_queue.remove(item)
+                _, job, attempt = item
+                running[pool.submit(analyze_one, job[0], job[1], rubric_text)] = (job, attempt)
+            if not running:
+                time.sleep(max(0.0, min(r[0] for r in retry_queue) - time.time()))
+                continue
+
+            next_due = min((r[0] for r in retry_queue), default=None)
+            finished, _ = wait(running, timeout=None if next_due is None else max(0.0, next_due - time.time()), return_when=FIRST_COMPLETED)
+            for future in finished:
+                (folder, task_name, category), attempt = running.pop(future)
+                try:
+                    # 결과 저장은 이 스레드에서만 (트렌드 리포트 갱신 포함)
+                    save_report(folder.name, category, future.result())
+                    done += 1
+                    print(f"      ✅ [{done}/{len(jobs)}] {folder.name} / {task_name}")
+                except Exception as e:
+                    if attempt <= ANALYSIS_MAX_RETRIES:
+                        delay = RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+                        print(f"      🔁 {folder.name} / {task_name} 오류: {e} -> {delay}초 뒤 재시도 ({attempt}/{ANALYSIS_MAX_RETRIES})")
+                        retry_queue.append((time.time() + delay, (folder, task_name, category), attempt + 1))
+                    else:
+                        failed.append(f"{folder.name} / {task_name}")
+                        print(f"      🚨 {folder.name} / {task_name} 최종 실패: {e}")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        _context_cache.clear()
+
+    print(f"\n✅ 분석 완료: 성공 {done}건 / 실패 {len(failed)}건")
+    for name in failed: print(f"   - {name}")
 
 if __name__ == "__main__":
-    analyze_all()
\ No newline at end of file
+    analyze_all()
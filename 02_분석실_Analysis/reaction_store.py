@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+
+try:
+    import pandas as pd
+    import pyarrow  # noqa: F401  (pandas Parquet 엔진)
+except ImportError:
+    pd = None
+
+# =========================================================
+# 📈 [분석 팀] Reaction Store (회차별 조회수/추천 -> Parquet)
+# 역할: 아카이브에 쌓인 반응 데이터(JSON)를 열 지향 데이터셋으로 모아두고
+#       유지율 곡선 / 이탈 회차 / 조회당 추천을 벡터 연산으로 한 번에 계산
+#       -> 법전/분석 프롬프트에 '실제 숫자'를 싸게 공급
+# 저장: .factory_cache/reactions/chapters/<원본 해시>.parquet (원본 JSON 1개당 1파일, 바뀐 것만 재작성)
+# =========================================================
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+ARCHIVE_DIR = PROJECT_ROOT / "01_자료실_Raw_Data" / "00_성공작_아카이브"
+STORE_DIR = PROJECT_ROOT / ".factory_cache" / "reactions"
+CHAPTER_DIR = STORE_DIR / "chapters"
+MANIFEST_PATH = STORE_DIR / "manifest.json"
+
+DROP_THRESHOLD = float(os.getenv("REACTION_DROP_THRESHOLD", "0.9"))   # 직전 회차 대비 유지율이 이보다 낮으면 이탈 회차
+CURVE_POINTS = (2, 5, 10, 15, 20, 25)
+
+_NUM_RE = re.compile(r"[\d,]+")
+
+def _num(value):
+    """'2,786,939 (Mega Hit)' -> 2786939"""
+    if isinstance(value, (int, float)): return value
+    m = _NUM_RE.search(str(value or ""))
+    return int(m.group().replace(",", "")) if m and m.group().replace(",", "") else None
+
+def _source_id(rel):
+    return hashlib.sha1(rel.encode('utf-8')).hexdigest()[:16]
+
+# ---------------------------------------------------------
+# 📥 [Ingest] JSON -> Parquet (증분)
+# ---------------------------------------------------------
+def _parse(path, rel):
+    """반응 JSON 1개 -> 회차 행 목록 (chapter_data 가 없는 정성 반응 JSON은 빈 목록)"""
+    text = path.read_text(encoding='utf-8').strip()
+    if not text: return []
+    data = json.loads(text)
+    if not isinstance(data, dict): return []
+
+    meta = data.get("meta_info", {}) or {}
+    reaction = data.get("reaction_meta", {}) or {}
+    genre = rel.split("/")[0] if "/" in rel else ""
+    title = meta.get("title") or re.sub(r"\s*\(\d{4}\)$", "", reaction.get("target_novel", "")) or path.stem.replace("_반응데이터", "")
+
+    rows = []
+    for ch in data.get("chapter_data", []) or []:
+        if not isinstance(ch, dict) or ch.get("views") is None: continue
+        rows.append({
+            "novel": title, "genre": genre, "source": rel,
+            "chapter": int(ch.get("no") or len(rows) + 1), "chapter_title": str(ch.get("title", "")),
+            "views": float(_num(ch.get("views")) or 0), "likes": float(_num(ch.get("likes")) or 0),
+            "date": str(ch.get("date", "")),
+        })
+    return rows
+
+def _iter_sources():
+    """아카이브의 반응/성과 JSON (*_반응데이터.json + chapter_data 가 든 작품 JSON)"""
+    if not ARCHIVE_DIR.exists(): return
+    for root, _, files in os.walk(ARCHIVE_DIR):
+        for fname in files:
+            if fname.endswith(".json") and not fname.endswith("_meta.json"):
+                path = Path(root) / fname
+                yield path, path.relative_to(ARCHIVE_DIR).as_posix()
+
+def ingest(force=False):
+    """
+    바뀐 JSON만 다시 읽어 회차 Parquet을 갱신합니다.
+
+    Returns:
+        dict: updated / removed / chapters (pandas 없으면 None)
+    """
+    if pd is None:
+        print("⚠️ [Reaction Store] pandas/pyarrow 미설치 - 반응 데이터 적재 생략")
+        return None
+    CHAPTER_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    if MANIFEST_PATH.exists() and not force:
+        try: manifest = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+        except Exception: manifest = {}
+
+    stats = {"updated": 0, "removed": 0, "chapters": 0}
+    seen = set()
+    for path, rel in _iter_sources():
+        seen.add(rel)
+        st = path.stat()
+        entry = manifest.get(rel)
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size: continue
+        try:
+            rows = _parse(path, rel)
+        except Exception as e:
+            print(f"⚠️ [Reaction Store] 읽기 실패: {rel} ({e})")
+            rows = []
+        target = CHAPTER_DIR / f"{_source_id(rel)}.parquet"
+        if rows:
+            pd.DataFrame(rows).to_parquet(target, index=False)
+        else:
+            target.unlink(missing_ok=True)
+        manifest[rel] = {"mtime": st.st_mtime, "size": st.st_size, "chapters": len(rows)}
+        stats["updated"] += 1
+
+    for rel in set(manifest) - seen:
+        (CHAPTER_DIR / f"{_source_id(rel)}.parquet").unlink(missing_ok=True)
+        del manifest[rel]
+        stats["removed"] += 1
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding='utf-8')
+    stats["chapters"] = sum(e.get("chapters", 0) for e in manifest.values())
+    return stats
+
+def load_chapters():
+    """전체 회차 데이터프레임 (novel, chapter 순 정렬)"""
+    if pd is None or not CHAPTER_DIR.exists() or not any(CHAPTER_DIR.glob("*.parquet")):
+        return None
+    df = pd.read_parquet(CHAPTER_DIR)
+    # 같은 작품이 여러 JSON에 있으면 (성과 JSON + 반응 JSON) 회차별 최신 파일 하나만
+    df = df.drop_duplicates(["novel", "chapter"], keep="last")
+    return df.sort_values(["novel", "chapter"]).reset_index(drop=True)
+
+# ---------------------------------------------------------
+# 📊 [Analytics] 벡터 연산 지표
+# ---------------------------------------------------------
+def compute_metrics(df):
+    """
+    Returns:
+        (회차별 df: retention / step_retention / likes_per_view 열 추가,
+         작품별 요약 df, 아카이브 전체 유지율 곡선 Series(회차 -> 중앙값))
+    """
+    g = df.groupby("novel", sort=False)["views"]
+    df = df.assign(
+        retention=df["views"] / g.transform("first"),
+        step_retention=df["views"] / g.shift(1),
+        likes_per_view=df["likes"] / df["views"].where(df["views"] > 0),
+    )
+    df["is_drop"] = df["step_retention"] < DROP_THRESHOLD
+
+    # 작품별 최대 이탈 회차 (직전 대비 유지율 최저)
+    steepest = df.dropna(subset=["step_retention"]).sort_values("step_retention").groupby("novel").head(1).set_index("novel")
+    by_novel = df.groupby("novel").agg(
+        genre=("genre", "first"), source=("source", "first"), chapters=("chapter", "max"),
+        first_views=("views", "first"), last_views=("views", "last"),
+        final_retention=("retention", "last"), avg_likes_per_view=("likes_per_view", "mean"),
+        drop_chapters=("is_drop", "sum"),
+    )
+    by_novel["steepest_drop_chapter"] = steepest["chapter"]
+    by_novel["steepest_drop_title"] = steepest["chapter_title"]
+    by_novel["steepest_step_retention"] = steepest["step_retention"]
+
+    curve = df.groupby("chapter")["retention"].median()
+    return df, by_novel, curve
+
+def drop_off_chapters(df, top=3):
+    """작품별 이탈이 큰 회차 top개 (novel, chapter, chapter_title, step_retention)"""
+    drops = df[df["is_drop"]].sort_values("step_retention")
+    return drops.groupby("novel").head(top)[["novel", "chapter", "chapter_title", "step_retention", "likes_per_view"]]
+
+# ---------------------------------------------------------
+# 📝 [Brief] 프롬프트용 요약
+# ---------------------------------------------------------
+_brief_cache = {"key": None, "text": ""}
+
+def _store_key():
+    if not MANIFEST_PATH.exists(): return None
+    st = MANIFEST_PATH.stat()
+    return (st.st_mtime, st.st_size)
+
+def brief(novel_hint=None):
+    """
+    실제 유지율 수치를 담은 짧은 텍스트 (적재된 데이터가 없으면 빈 문자열)
+
+    Args:
+        novel_hint: 작품 폴더명/제목 - 주면 그 작품 줄을 맨 앞에, 없으면 아카이브 전체 요약
+    """
+    if pd is None: return ""
+    key = (_store_key(), novel_hint)
+    if _brief_cache["key"] == key: return _brief_cache["text"]
+
+    df = load_chapters()
+    if df is None or df.empty: return ""
+    df, by_novel, curve = compute_metrics(df)
+
+    lines = ["[Retention Benchmarks - 실제 회차별 조회수 기준]"]
+    points = [f"{c}화 {curve[c]:.0%}" for c in CURVE_POINTS if c in curve.index]
+    if points: lines.append(f"- 아카이브 중앙 유지율(1화 대비): {', '.join(points)}")
+    lines.append(f"- 평균 조회당 추천: {df['likes_per_view'].mean():.2%}")
+
+    rows = by_novel
+    if novel_hint:
+        norm = re.sub(r"\s+", "", novel_hint)
+        # 제목이 폴더명과 조금 달라도 (재벌가 망나니 / 재벌가의 망나니) 원본 경로로 잡히게
+        match = [n for n, r in by_novel.iterrows() if any(x in norm or norm in x for x in (re.sub(r"\s+", "", n), re.sub(r"\s+", "", r["source"])))]
+        rows = by_novel.loc[match + [n for n in by_novel.index if n not in match]]
+    for novel, r in rows.iterrows():
+        drop = ""
+        if pd.notna(r["steepest_drop_chapter"]):
+            drop = f", 최대 이탈 {int(r['steepest_drop_chapter'])}화 '{r['steepest_drop_title']}'(직전 대비 {r['steepest_step_retention']:.0%})"
+        lines.append(f"- {novel}: {int(r['chapters'])}화 유지율 {r['final_retention']:.0%}, 조회당 추천 {r['avg_likes_per_view']:.2%}{drop}")
+
+    text = "\n".join(lines)
+    _brief_cache.update(key=key, text=text)
+    return text
+
+if __name__ == "__main__":
+    print(f"📈 [Reaction Store] 적재: {ingest()}")
+    print(brief())
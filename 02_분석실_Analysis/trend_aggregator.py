@@ -0,0 +1,163 @@
+import re
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from collections import Counter
+
+# =========================================================
+# 🧮 [분석 팀] Trend Aggregator (분석 JSON -> 통합 트렌드 리포트)
+# 역할: 분석관이 저장한 STYLE/CHAR/STORY JSON을 모아 '00_통합_트렌드_리포트.json' 생성
+# 방식: 파일별 부분 집계(map)를 캐시해두고, 바뀐 파일만 다시 map -> 전체는 카운터 합산(reduce)만
+#       (LLM 재요약 없음, 작품 하나 추가되면 그 작품 몫만 다시 계산)
+# =========================================================
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+REPORT_FILE = CURRENT_DIR / "00_통합_트렌드_리포트.json"
+PARTIALS_FILE = PROJECT_ROOT / ".factory_cache" / "trend_partials.json"
+
+CATEGORIES = {"01_문체_분석": "STYLE", "02_캐릭터_분석": "CHAR", "03_스토리_분석": "STORY"}
+TOP_N = 15
+
+_WORD_RE = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+_ROLE_RE = re.compile(r"[\(\[（](.*?)[\)\]）]")
+_STOPWORDS = {"the", "and", "with", "for", "of", "to", "in", "a", "an", "is", "as", "on", "that", "this", "by",
+              "있는", "하는", "통해", "위한", "대한", "그리고", "하지만", "것이", "있다", "한다"}
+_lock = threading.Lock()
+
+# ---------------------------------------------------------
+# 🗺️ [Map] 분석 JSON 1개 -> 부분 집계
+# ---------------------------------------------------------
+def _norm(text):
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+def map_file(path, category):
+    data = json.loads(path.read_text(encoding='utf-8'))
+    content = data.get("analysis_content", {}) if isinstance(data.get("analysis_content"), dict) else {}
+    elements = [str(e) for e in content.get("key_elements", []) or [] if str(e).strip()]
+    roles = Counter()
+    for c in content.get("character_list", []) or []:
+        m = _ROLE_RE.search(str(c))
+        if m: roles[_norm(m.group(1))] += 1
+
+    words = set()
+    for e in elements:
+        words.update(w for w in _WORD_RE.findall(e.lower()) if w not in _STOPWORDS)
+
+    return {
+        "category": category,
+        "novel": path.stem.split("_", 1)[1] if "_" in path.stem else path.stem,
+        "title": data.get("title", ""),
+        "elements": sorted({_norm(e) for e in elements}),
+        "keywords": sorted(words),
+        "roles": dict(roles),
+        "insight": str(data.get("actionable_insight", "")).strip(),
+    }
+
+# ---------------------------------------------------------
+# ➕ [Reduce] 부분 집계 합산
+# ---------------------------------------------------------
+def reduce_partials(partials):
+    by_category = {}
+    novels = {}
+    novel_keywords = {}     # 전체 키워드는 카테고리가 달라도 작품당 1회
+    for rel, p in sorted(partials.items()):
+        cat = by_category.setdefault(p["category"], {"novels": set(), "elements": Counter(), "keywords": Counter(), "roles": Counter(), "insights": []})
+        cat["novels"].add(p["novel"])
+        cat["elements"].update(p["elements"])        # 작품당 1회 (문서 빈도)
+        cat["keywords"].update(p["keywords"])
+        cat["roles"].update(p["roles"])
+        if p["insight"]: cat["insights"].append({"novel": p["novel"], "insight": p["insight"]})
+        novel_keywords.setdefault(p["novel"], set()).update(p["keywords"])
+        novels.setdefault(p["novel"], {"title": p["title"], "categories": []})["categories"].append(p["category"])
+
+    all_keywords = Counter(k for words in novel_keywords.values() for k in words)
+    report = {
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "novel_count": len(novels),
+        "source_count": len(partials),
+        "top_keywords": [{"keyword": k, "novels": n} for k, n in all_keywords.most_common(TOP_N)],
+        "by_category": {},
+        "novels": novels,
+    }
+    for name, cat in by_category.items():
+        report["by_category"][name] = {
+            "novels": len(cat["novels"]),
+            "common_elements": [{"element": e, "novels": n} for e, n in cat["elements"].most_common(TOP_N) if n > 1],
+            "top_keywords": [{"keyword": k, "novels": n} for k, n in cat["keywords"].most_common(TOP_N)],
+            "role_distribution": dict(cat["roles"].most_common()),
+            "actionable_insights": cat["insights"],
+        }
+    return report
+
+# ---------------------------------------------------------
+# 🔄 [Build] 증분 갱신 + 저장
+# ---------------------------------------------------------
+def build(force=False):
+    """
+    바뀐 분석 JSON만 다시 map 하고 리포트를 다시 씁니다.
+
+    Returns:
+        dict: mapped / removed / novels
+    """
+    with _lock:
+        cache = {}
+        if PARTIALS_FILE.exists() and not force:
+            try: cache = json.loads(PARTIALS_FILE.read_text(encoding='utf-8'))
+            except Exception: cache = {}
+
+        stats = {"mapped": 0, "removed": 0}
+        seen = set()
+        for category, prefix in CATEGORIES.items():
+            folder = CURRENT_DIR / category
+            if not folder.exists(): continue
+            for f in folder.glob(f"{prefix}_*.json"):
+                rel = f"{category}/{f.name}"
+                seen.add(rel)
+                st = f.stat()
+                old = cache.get(rel)
+                if old and old["mtime"] == st.st_mtime and old["size"] == st.st_size: continue
+                try:
+                    cache[rel] = {"mtime": st.st_mtime, "size": st.st_size, "partial": map_file(f, category)}
+                    stats["mapped"] += 1
+                except Exception as e:
+                    print(f"⚠️ [Trend] 읽기 실패: {rel} ({e})")
+                    cache.pop(rel, None)
+                    seen.discard(rel)
+
+        for rel in set(cache) - seen:
+            del cache[rel]
+            stats["removed"] += 1
+
+        if stats["mapped"] or stats["removed"] or not REPORT_FILE.exists():
+            report = reduce_partials({rel: c["partial"] for rel, c in cache.items()})
+            tmp = REPORT_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(report, ensure_ascii=False, indent=4), encoding='utf-8')
+            tmp.replace(REPORT_FILE)
+            PARTIALS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            PARTIALS_FILE.write_text(json.dumps(cache, ensure_ascii=False), encoding='utf-8')
+        stats["novels"] = len({c["partial"]["novel"] for c in cache.values()})
+        return stats
+
+def brief(report=None):
+    """프롬프트용 짧은 요약 (리포트 JSON 전체 대신)"""
+    if report is None:
+        if not REPORT_FILE.exists(): return ""
+        report = json.loads(REPORT_FILE.read_text(encoding='utf-8'))
+    if not report.get("novel_count"): return ""
+    lines = [f"[Archive Trend - 분석 작품 {report['novel_count']}편]"]
+    if report.get("top_keywords"):
+        lines.append("- 공통 키워드: " + ", ".join(f"{k['keyword']}({k['novels']})" for k in report["top_keywords"]))
+    for name, cat in report.get("by_category", {}).items():
+        if cat.get("common_elements"):
+            lines.append(f"- {name} 반복 요소: " + ", ".join(f"{e['element']}({e['novels']})" for e in cat["common_elements"][:8]))
+        if cat.get("role_distribution"):
+            lines.append(f"- {name} 역할 분포: " + ", ".join(f"{r} {n}" for r, n in list(cat["role_distribution"].items())[:8]))
+        for ins in cat.get("actionable_insights", [])[:3]:
+            lines.append(f"- {name} 인사이트 ({ins['novel']}): {ins['insight']}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    print(f"🧮 [Trend Aggregator] {build()}")
+    print(brief())
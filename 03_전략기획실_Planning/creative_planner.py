@@ -4,7 +4,6 @@ import sys
 import random
 import time
 from pathlib import Path
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # [Setup]
@@ -13,6 +12,14 @@ PLANNING_DIR = CURRENT_FILE_PATH.parent
 PROJECT_ROOT = PLANNING_DIR.parent
 
 if str(PROJECT_ROOT) not in sys.path: sys.path.append(str(PROJECT_ROOT))
+if str(PROJECT_ROOT / "02_분석실_Analysis") not in sys.path: sys.path.append(str(PROJECT_ROOT / "02_분석실_Analysis"))
+
+import corpus_index
+import reference_retriever
+import vector_index
+import context_packer
+import trend_aggregator
+import llm_gateway
 
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 API_KEY = os.getenv("GEMINI_KEY_PLANNING") or os.getenv("GEMINI_API_KEY")
@@ -22,30 +29,46 @@ try:
     MODEL_NAME = model_selector.find_best_model()
 except: MODEL_NAME = "gemini-1.5-flash"
 
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel(MODEL_NAME)
-
 # =========================================================
 # 📂 [RAG Logic]
 # =========================================================
 BASE_INFO_DIR = PROJECT_ROOT / "00_기준정보_보물창고"
 ANALYSIS_DIR = PROJECT_ROOT / "02_분석실_Analysis"
 RAW_DATA_DIR = PROJECT_ROOT / "01_자료실_Raw_Data" / "00_성공작_아카이브"
+MATERIALS_BUDGET_TOKENS = 12000  # 참고 문단 + 설정 규칙 합산 예산 상한
+
+def get_smart_references(query=""):
+    """query(아이디어/피드백)와 관련도 높은 아카이브 문단 3개 (키워드 BM25 + 의미 벡터 교차). 매칭이 없으면 무작위 회차
 
-def get_smart_references():
-    refs = ""
-    if RAW_DATA_DIR.exists():
-        md_files = list(RAW_DATA_DIR.rglob("*.md"))
-        if md_files:
-            selected = random.sample(md_files, min(len(md_files), 3))
-            for f in selected:
-                try:
-                    content = f.read_text(encoding='utf-8')[:5000]
-                    refs += f"\n=== [Reference: {f.name}] ===\n{content}\n============================\n"
-                except: pass
+    Returns:
+        [(이름, 본문)] - 길이는 gather_materials에서 토큰 예산으로 맞춤
+    """
+    refs = []
+    try:
+        hits = []
+        if query.strip():
+            lexical = reference_retriever.search_archive(query, k=3)
+            try: semantic = vector_index.search(query, k=3)
+            except Exception as e:
+                print(f"⚠️ [RAG] 벡터 검색 실패 (키워드 검색만 사용): {e}")
+                semantic = []
+            # 표현이 달라도 분위기가 비슷한 문단이 섞이도록 번갈아 채우기
+            seen = set()
+            for pair in zip(lexical + [None] * 3, semantic + [None] * 3):
+                for h in pair:
+                    if h and h['text'] not in seen and len(hits) < 3:
+                        seen.add(h['text'])
+                        hits.append(h)
+        if hits:
+            return [(h['name'], h['text']) for h in hits]
+
+        # 아카이브 색인에서 바로 추출 (매번 rglob + 파일 읽기 X)
+        refs = [(ep['name'], ep['content']) for ep in corpus_index.sample_episodes(3)]
+    except Exception as e:
+        print(f"⚠️ [RAG] 아카이브 색인 조회 실패: {e}")
     return refs
 
-def gather_materials(mode):
+def gather_materials(mode, query=""):
     context_data = {
         "rubric": "", "trend": "", "setting_trend": "", "success_raw_text": ""
     }
@@ -53,15 +76,34 @@ def gather_materials(mode):
     TREND_REPORT = ANALYSIS_DIR / "00_통합_트렌드_리포트.json"
     
     if RUBRIC_FILE.exists(): context_data["rubric"] = RUBRIC_FILE.read_text(encoding='utf-8')
+    try:
+        trend_aggregator.build()    # 새로 분석된 작품 몫만 반영 (없으면 그대로)
+    except Exception as e:
+        print(f"⚠️ [Trend] 리포트 갱신 실패: {e}")
     if TREND_REPORT.exists(): context_data["trend"] = TREND_REPORT.read_text(encoding='utf-8')
 
+    # 트렌드 요약(1순위), 참고 문단(1순위), 설정 규칙(2순위)을 한 예산 안에서 문장 단위로 담기
+    packer = context_packer.ContextPacker(context_packer.budget_for(MODEL_NAME, cap=MATERIALS_BUDGET_TOKENS))
+    packer.add("trend", trend_aggregator.brief(), priority=1, max_tokens=1500)
+    refs = get_smart_references(query)
+    for i, (name, text) in enumerate(refs):
+        packer.add(f"ref{i}", text, priority=1)
+
     SETTING_DIR = BASE_INFO_DIR / "04_설정_트랜드"
+    rules = []
     if SETTING_DIR.exists():
         files = list(SETTING_DIR.rglob("*.md"))
-        for f in random.sample(files, min(len(files), 5)) if files else []:
-            context_data["setting_trend"] += f"\n[Rule: {f.name}]\n{f.read_text(encoding='utf-8')[:2000]}"
-
-    context_data["success_raw_text"] = get_smart_references()
+        rules = random.sample(files, min(len(files), 5)) if files else []
+        for i, f in enumerate(rules):
+            packer.add(f"rule{i}", f.read_text(encoding='utf-8'), priority=2)
+
+    packed = packer.pack()
+    print(packer.summary("Planner Materials"))
+    context_data["trend_brief"] = packed["trend"]
+    for i, (name, _) in enumerate(refs):
+        context_data["success_raw_text"] += f"\n=== [Reference: {name}] ===\n{packed[f'ref{i}']}\n============================\n"
+    for i, f in enumerate(rules):
+        if packed[f"rule{i}"]: context_data["setting_trend"] += f"\n[Rule: {f.name}]\n{packed[f'rule{i}']}"
     return context_data
 
 # =========================================================
@@ -69,7 +111,7 @@ def gather_materials(mode):
 # =========================================================
 
 def create_plan(round_num, feedback, mode=1, user_input=""):
-    materials = gather_materials(mode)
+    materials = gather_materials(mode, query=f"{user_input}\n{feedback}")
 
     # 🔥 [중요] 한국어 강제 및 5화 필수 작성 프롬프트
     prompt = f"""
@@ -88,6 +130,9 @@ def create_plan(round_num, feedback, mode=1, user_input=""):
     
     [Trend Rules]:
     {materials['setting_trend']}
+    
+    [Market Trend (Archive Analysis)]:
+    {materials['trend_brief'] or "N/A"}
 
     [User Request]: "{user_input}"
     [Feedback]: "{feedback}"
@@ -132,8 +177,7 @@ def create_plan(round_num, feedback, mode=1, user_input=""):
     """
     
     try:
-        res = model.generate_content(prompt)
-        text = res.text.strip()
+        text = llm_gateway.generate(prompt, MODEL_NAME, api_key=API_KEY)
         if "```json" in text: text = text.split("```json")[1].split("```")[0].strip()
         elif "```" in text: text = text.replace("```", "").strip()
         return json.loads(text)
@@ -2,9 +2,11 @@ import os
 import json
 import sys
 import random
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from openai import OpenAI
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # [Setup]
@@ -13,6 +15,14 @@ PLANNING_DIR = CURRENT_FILE_PATH.parent
 PROJECT_ROOT = PLANNING_DIR.parent
 
 if str(PROJECT_ROOT) not in sys.path: sys.path.append(str(PROJECT_ROOT))
+QC_DIR = PROJECT_ROOT / "06_품질관리_QC"
+if str(QC_DIR) not in sys.path: sys.path.append(str(QC_DIR))
+
+import reference_retriever
+import vector_index
+import banned_term_scanner
+import llm_gateway
+import model_fallback
 
 # 환경변수 로드
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
@@ -21,15 +31,12 @@ load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 GEMINI_KEY = os.getenv("GEMINI_KEY_PLANNING") or os.getenv("GEMINI_API_KEY")
 
-# 2. 클라이언트 초기화
+# 2. 클라이언트는 게이트웨이가 키별로 한 번만 만들어 재사용
 openai_client = None
 if OPENAI_KEY:
-    try: openai_client = OpenAI(api_key=OPENAI_KEY)
+    try: openai_client = llm_gateway.openai_client(OPENAI_KEY)
     except: pass
 
-if GEMINI_KEY:
-    genai.configure(api_key=GEMINI_KEY)
-
 # =========================================================
 # 📂 [Data Collection] RAG & Blacklist Logic
 # =========================================================
@@ -38,96 +45,201 @@ ANALYSIS_DIR = PROJECT_ROOT / "02_분석실_Analysis"
 STORY_ANALYSIS_DIR = ANALYSIS_DIR / "03_스토리_분석"
 CHAR_ANALYSIS_DIR = ANALYSIS_DIR / "02_캐릭터_분석"
 
-def get_benchmark_stories():
-    """성공작들의 줄거리를 긁어와 표절 대조군으로 삼습니다."""
+def plan_query_text(plan_json):
+    """기획안에서 검색 질의로 쓸 핵심 텍스트만 추출"""
+    if not isinstance(plan_json, dict): return str(plan_json)
+    parts = [plan_json.get('title', ''), plan_json.get('genre', ''), plan_json.get('logline', ''), plan_json.get('synopsis', '')]
+    parts.extend(map(str, plan_json.get('keywords', [])))
+    parts.extend(str(p.get('summary', '')) for p in plan_json.get('episode_plots', []) if isinstance(p, dict))
+    return "\n".join(str(p) for p in parts if p)
+
+def get_benchmark_stories(plan_json=None):
+    """기획안과 가장 비슷한 성공작 줄거리를 골라 표절 대조군으로 삼습니다."""
     benchmarks = ""
-    if STORY_ANALYSIS_DIR.exists():
-        files = list(STORY_ANALYSIS_DIR.glob("*.json"))
-        if files:
-            selected = random.sample(files, min(len(files), 3)) 
-            for f in selected:
+    try:
+        query = plan_query_text(plan_json) if plan_json else ""
+        hits = reference_retriever.search_stories(query, k=3) if query else []
+        if not hits and STORY_ANALYSIS_DIR.exists():
+            # 관련작이 안 잡히면 예전처럼 무작위 대조군
+            files = list(STORY_ANALYSIS_DIR.glob("*.json"))
+            for f in random.sample(files, min(len(files), 3)):
                 try:
                     data = json.loads(f.read_text(encoding='utf-8'))
-                    title = data.get("title", "Unknown")
-                    summary = data.get("synopsis", "") or data.get("logline", "")
-                    benchmarks += f"\n[Target: {title}]\n{summary[:500]}...\n"
+                    hits.append({"title": data.get("title", "Unknown"), "summary": reference_retriever.story_summary(data)})
                 except: pass
+        for h in hits:
+            benchmarks += f"\n[Target: {h['title']}]\n{h['summary'][:500]}...\n"
+
+        # 줄거리 요약으로는 안 잡히는 '표현만 바꾼 클리셰'는 원문 문단 의미 검색으로 대조
+        if query:
+            for p in vector_index.search(query, k=3):
+                benchmarks += f"\n[Archive Passage: {p['name']} / 유사도 {p['score']:.2f}]\n{p['text'][:300]}...\n"
+    except Exception as e:
+        print(f"⚠️ [Red Team] 대조군 검색 실패: {e}")
     return benchmarks
 
 def extract_banned_keywords():
-    """기존 대박작들의 고유명사(이름)를 추출해 사용 금지어(Blacklist)로 만듭니다."""
-    banned_list = set()
-    if CHAR_ANALYSIS_DIR.exists():
-        for f in CHAR_ANALYSIS_DIR.glob("*.json"):
-            try:
-                data = json.loads(f.read_text(encoding='utf-8'))
-                for c in data.get('characters', []):
-                    if isinstance(c, dict) and 'name' in c:
-                        banned_list.add(c['name'])
-            except: pass
-    return list(banned_list)
-
-def gather_evidence():
+    """기존 대박작들의 고유명사(이름) 금지어 목록 (캐릭터 분석 폴더가 바뀔 때만 다시 읽음)"""
+    return banned_term_scanner.banned_terms()
+
+def check_banned_terms(plan_json):
+    """기획안 전체에서 금지 고유명사 등장 위치 검사 (프롬프트 대신 로컬에서 확정)"""
+    text = json.dumps(plan_json, ensure_ascii=False) if isinstance(plan_json, dict) else str(plan_json)
+    return banned_term_scanner.scan(text)
+
+def gather_evidence(plan_json=None):
     context = {
-        "rubric": "", "banned_words": [], "benchmarks": ""
+        "rubric": "", "banned_hits": [], "benchmarks": ""
     }
     RUBRIC_FILE = BASE_INFO_DIR / "standard-rubric.json"
     if RUBRIC_FILE.exists(): context["rubric"] = RUBRIC_FILE.read_text(encoding='utf-8')
     
-    context["banned_words"] = extract_banned_keywords()
-    context["benchmarks"] = get_benchmark_stories()
+    context["banned_hits"] = check_banned_terms(plan_json) if plan_json else []
+    context["benchmarks"] = get_benchmark_stories(plan_json)
     return context
 
+def local_plagiarism_scan(plan_json):
+    """기획안 텍스트를 아카이브 MinHash 색인과 대조 (LLM 추정 대신 재현 가능한 수치)"""
+    try:
+        import plagiarism_scanner
+        return plagiarism_scanner.scan(plan_query_text(plan_json))
+    except Exception as e:
+        print(f"⚠️ [Red Team] 로컬 표절 스캔 실패: {e}")
+        return None
+
 # =========================================================
 # 🧠 [Engine: 2026 Standard] GPT-5.2 최우선 호출
 # =========================================================
-def call_openai_smartest(prompt):
+def parse_critique(text):
+    """비평 응답 -> dict (코드펜스 제거 후 JSON 파싱, 실패 시 예외)"""
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.replace("```", "").strip()
+    return json.loads(text)
+
+def _is_valid_critique(text):
+    """깨진 JSON 응답은 캐시에 남기지 않음"""
+    try: return isinstance(parse_critique(text), dict)
+    except Exception: return False
+
+# 🔥 [2026 Model Priority] 없는 모델은 부재 캐시로 건너뛰고, 만료되면 백그라운드에서 재확인
+OPENAI_CHAIN = model_fallback.FallbackChain("red_team_openai", [
+    "gpt-5.2",              # 1순위: 플래그십 (압도적 성능)
+    "gpt-5.1-thinking",     # 2순위: 추론 특화
+    "gpt-5.3-codex-spark",  # 3순위: 초고속 피드백
+    "o4-mini",              # 4순위: 고효율
+    "gpt-4o"                # 5순위: 백업
+], probe=model_fallback.gateway_probe(OPENAI_KEY))
+
+def call_openai_smartest(prompt, cancel=None):
     if not openai_client: return None
-    
-    # 🔥 [2026 Model Priority]
-    candidate_models = [
-        "gpt-5.2",              # 1순위: 플래그십 (압도적 성능)
-        "gpt-5.1-thinking",     # 2순위: 추론 특화
-        "gpt-5.3-codex-spark",  # 3순위: 초고속 피드백
-        "o4-mini",              # 4순위: 고효율
-        "gpt-4o"                # 5순위: 백업
-    ]
-    
-    for model_id in candidate_models:
-        try:
-            print(f"👹 [Red Team] 접속 시도 중... 타겟: {model_id}")
-            response = openai_client.chat.completions.create(
-                model=model_id,
-                messages=[
-                    {"role": "system", "content": "You are a professional Web Novel Critic. Output JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-            print(f"✅ [Red Team] 연결 성공! 엔진: {model_id}")
-            return response.choices[0].message.content.strip()
-        except: 
-            continue # 실패 시 다음 모델 자동 전환
-            
-    return None
-
-def call_gemini_backup(prompt):
+
+    text, model_id = OPENAI_CHAIN.call(
+        lambda m: llm_gateway.generate(prompt, m, system="You are a professional Web Novel Critic. Output JSON only.",
+                                       temperature=0.7, api_key=OPENAI_KEY, cache=True, validate=_is_valid_critique, cancel=cancel),
+        label="Red Team", stop=cancel)
+    if model_id: print(f"✅ [Red Team] 연결 성공! 엔진: {model_id}")
+    return text
+
+def call_gemini_backup(prompt, cancel=None):
     try:
         import model_selector
         model_name = model_selector.find_best_model()
-        model = genai.GenerativeModel(model_name)
-        res = model.generate_content(prompt)
-        return res.text.strip()
+        return llm_gateway.generate(prompt, model_name, api_key=GEMINI_KEY, cache=True, validate=_is_valid_critique, cancel=cancel)
     except: return None
 
+# =========================================================
+# 🏁 [Hedging] OpenAI가 평소(p90)보다 늦으면 Gemini를 동시에 띄워 먼저 온 정상 응답 채택
+# =========================================================
+HEDGE_ENABLED = os.getenv("RED_TEAM_HEDGE", "1") != "0"
+HEDGE_PERCENTILE = float(os.getenv("RED_TEAM_HEDGE_PERCENTILE", "0.9"))
+HEDGE_DEFAULT_SECONDS = float(os.getenv("RED_TEAM_HEDGE_SECONDS", "45"))   # 기록이 적을 때 쓰는 기준
+HEDGE_MIN_SAMPLES = 5
+
+_latencies = deque(maxlen=50)   # 최근 OpenAI 비평 응답 시간 (초, 캐시 적중/JSON 오류 응답은 제외)
+_latency_lock = threading.Lock()
+
+def hedge_threshold():
+    """백업을 띄우기까지 기다릴 초 (최근 응답 시간의 p90, 기록이 모자라면 기본값)"""
+    with _latency_lock:
+        samples = sorted(_latencies)
+    if len(samples) < HEDGE_MIN_SAMPLES: return HEDGE_DEFAULT_SECONDS
+    return samples[min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE))]
+
+def _run(fn, prompt, cancel):
+    """(응답, 캐시 적중 여부) - 캐시 여부는 호출한 작업 스레드 안에서만 알 수 있어 같이 돌려줌"""
+    return fn(prompt, cancel), llm_gateway.served_from_cache()
+
+def hedged_critique(prompt):
+    """
+    OpenAI(우선)로 비평을 요청하고, p90 안에 정상 JSON이 안 오면 Gemini 백업을 함께 띄움.
+    먼저 도착한 '정상 비평'을 채택하고 나머지는 cancel 이벤트로 스트림을 끊음.
+    Returns:
+        비평 원문 (정상 비평이 없으면 처음 받은 깨진 응답 -> 호출부에서 JSON 파싱 오류로 표시, 아무 응답도 없으면 None)
+    """
+    runners = []
+    if openai_client: runners.append(("OpenAI", call_openai_smartest))
+    if GEMINI_KEY: runners.append(("Gemini", call_gemini_backup))
+    if not runners: return None
+
+    # 한쪽만 있거나 헤지를 껐으면 기존처럼 순서대로
+    if not HEDGE_ENABLED or len(runners) == 1:
+        broken = None
+        for _, fn in runners:
+            text = fn(prompt)
+            if text and _is_valid_critique(text): return text
+            broken = broken or text
+        return broken
+
+    cancels = {name: threading.Event() for name, _ in runners}
+    pool = ThreadPoolExecutor(max_workers=len(runners), thread_name_prefix="red-team-hedge")
+    started = time.monotonic()
+    (primary, primary_fn), (backup, backup_fn) = runners
+    pending = {pool.submit(_run, primary_fn, prompt, cancels[primary]): primary}
+    winner, backup_started, broken = None, False, None
+    try:
+        threshold = hedge_threshold()
+        done, _ = wait(pending, timeout=threshold)
+        if not done:
+            print(f"   🏁 [Red Team] {primary} {threshold:.1f}초 초과 (p{HEDGE_PERCENTILE * 100:.0f}) -> {backup} 백업 동시 출발")
+        while pending:
+            # 우선 제공자가 늦거나 실패하면 백업 출발
+            if not backup_started and (not done or not any(_is_valid_critique(f.result()[0] or "") for f in done)):
+                pending[pool.submit(_run, backup_fn, prompt, cancels[backup])] = backup
+                backup_started = True
+            for future in done:
+                name = pending.pop(future)
+                text, cached = future.result()
+                valid = bool(text) and _is_valid_critique(text)
+                # p90은 실제 네트워크 응답만 (캐시 적중은 0초라 기준을 끌어내려 매번 헤지하게 됨)
+                if name == primary and valid and not cached:
+                    with _latency_lock: _latencies.append(time.monotonic() - started)
+                if valid:
+                    winner = (name, text)
+                    break
+                broken = broken or text
+                print(f"   ⚠️ [Red Team] {name} 응답 사용 불가 (없음/JSON 오류)")
+            if winner or not pending: break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    finally:
+        for name, event in cancels.items():
+            if not winner or name != winner[0]: event.set()
+        pool.shutdown(wait=False)
+
+    if not winner: return broken
+    if backup_started:
+        print(f"   🏁 [Red Team] {winner[0]} 응답 채택 ({time.monotonic() - started:.1f}초), 나머지 요청 취소")
+    return winner[1]
+
 # =========================================================
 # 🧨 [Execution] 비평 수행 (한국어 강제)
 # =========================================================
 def critique_plan(plan_json, round_num):
     print(f"\n👹 [Red Team] 기획안 V{round_num} 정밀 진단 (GPT-5.2 Powered)...")
     
-    evidence = gather_evidence()
-    banned_str = ", ".join(evidence['banned_words'][:50])
+    evidence = gather_evidence(plan_json)
+    plagiarism = local_plagiarism_scan(plan_json)
 
     prompt = f"""
     You are **Korea's Most Critical Web Novel Editor (Red Team)** living in **2026**.
@@ -141,7 +253,6 @@ def critique_plan(plan_json, round_num):
     
     [Reference Data]
     1. **Existing Hits (Check Plagiarism)**: {evidence['benchmarks']}
-    2. **Banned Names (Do NOT use)**: {banned_str}
     
     [Thinking Process]
     1. **Plagiarism**: Is this too similar to the [Existing Hits]?
@@ -154,32 +265,34 @@ def critique_plan(plan_json, round_num):
     [Output Format (JSON Only)]
     {{
         "score": (Integer 0-100),
-        "similarity_rate": (Integer 0-100, how similar to hits),
         "critique_summary": "Summary of critique in Korean.",
         "fatal_flaws": ["Flaw 1 (Korean)", "Flaw 2 (Korean)"],
         "improvement_instructions": "Specific fixes required (Korean)."
     }}
     """
 
-    result_text = None
-
-    # 1. OpenAI 2026 모델 시도
-    if openai_client:
-        result_text = call_openai_smartest(prompt)
-
-    # 2. Gemini 백업 시도
-    if not result_text and GEMINI_KEY:
-        result_text = call_gemini_backup(prompt)
+    # 1~2. OpenAI 2026 모델 우선, 평소보다 늦으면 Gemini 백업과 경주 (헤지)
+    result_text = hedged_critique(prompt)
 
     # 3. 결과 파싱
     if result_text:
         try:
-            if "```json" in result_text: 
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text: 
-                result_text = result_text.replace("```", "").strip()
-            return json.loads(result_text)
+            result = parse_critique(result_text)
         except:
-            return {"score": 0, "critique_summary": "JSON 파싱 오류", "fatal_flaws": ["Format Error"]}
-    
-    return {"score": 0, "critique_summary": "AI 응답 없음", "fatal_flaws": ["System Error"]}
\ No newline at end of file
+            result = {"score": 0, "critique_summary": "JSON 파싱 오류", "fatal_flaws": ["Format Error"]}
+    else:
+        result = {"score": 0, "critique_summary": "AI 응답 없음", "fatal_flaws": ["System Error"]}
+
+    # 4. 금지 고유명사는 로컬 검사 결과로 확정 (LLM이 놓쳐도 반드시 지적)
+    if evidence['banned_hits']:
+        terms = [t for t, _ in banned_term_scanner.summarize(evidence['banned_hits'])]
+        result["banned_term_hits"] = evidence['banned_hits']
+        flaws = result.get("fatal_flaws") if isinstance(result.get("fatal_flaws"), list) else [result["fatal_flaws"]] if result.get("fatal_flaws") else []
+        result["fatal_flaws"] = flaws + [f"기존 성공작 캐릭터 이름 사용: {', '.join(terms)}"]
+        result["improvement_instructions"] = f"{result.get('improvement_instructions', '')} 다음 이름을 모두 새 이름으로 교체할 것: {', '.join(terms)}".strip()
+
+    # 5. 유사도는 로컬 스캐너 수치로 확정
+    if plagiarism is not None:
+        result["similarity_rate"] = plagiarism["similarity_rate"]
+        result["plagiarism_scan"] = plagiarism
+    return result
\ No newline at end of file
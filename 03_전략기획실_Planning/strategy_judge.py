@@ -1,6 +1,5 @@
 import os
 import json
-import time
 import sys
 from pathlib import Path
 
@@ -85,7 +84,6 @@ def process_planning(mode, user_input, feedback_history=""):
         # 4. 피드백 루프
         flaws = critique.get('fatal_flaws', [])
         current_feedback = f"Critique: {critique.get('improvement_instructions')}. Fix flaws: {flaws}"
-        time.sleep(1) 
 
     return final_plan, "\n".join(logs)
 
@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import time
+import threading
+from pathlib import Path
+
+# =========================================================
+# 📚 [제작 팀] Knowledge Base (팁 + 설정 자료집)
+# 역할: 작가 모듈이 집필할 때마다 폴더를 glob/read 하지 않도록 프로세스당 한 번 색인
+#       파일명 키워드(*도입부*) 대신 섹션 단위 태그 + 관련도로 '지금 기획/트리트먼트에 맞는' 조각만 선택
+# 갱신: 파일 mtime/크기가 바뀐 파일만 다시 읽고 섹션 분해
+# =========================================================
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+TIP_DIR = PROJECT_ROOT / "00_기준정보_보물창고" / "05_팁_보물창고"
+SETTING_DIR = PROJECT_ROOT / "04_설정_자료집"
+KIND_ROOTS = {"tip": TIP_DIR, "setting": SETTING_DIR}
+
+if str(PROJECT_ROOT) not in sys.path: sys.path.append(str(PROJECT_ROOT))
+
+from reference_retriever import BM25Index, split_passages
+
+REFRESH_INTERVAL = int(os.getenv("KB_REFRESH_INTERVAL", "10"))  # 초 (파일 변경 확인 최소 간격)
+TAG_BOOST = 0.5     # 목적 태그 하나 겹칠 때마다 관련도 가산 비율
+GENRE_BOOST = 0.5
+
+# 태그 -> 판정 키워드 (파일명/소제목에 있으면 바로, 본문에는 2번 이상 나와야 부여)
+TOPIC_TAGS = {
+    "도입부": ["도입부", "1화", "첫 문장", "첫문장", "훅", "hook"],
+    "플롯": ["플롯", "구조", "3막", "전개", "관문", "lock", "기승전결"],
+    "캐릭터": ["캐릭터", "주인공", "조연", "결핍", "매력", "빌런"],
+    "문장": ["문장", "리듬", "묘사", "문체", "대사", "표현"],
+    "연독": ["연독", "이탈", "유료", "절단"],
+    "중반부": ["중반", "절필", "긴장"],
+    "세계관": ["세계관", "설정", "소재", "고증"],
+}
+GENRE_TAGS = {
+    "대체역사": ["대체역사", "althistory", "역사", "연표"],
+    "현대판타지": ["현대판타지", "현판", "현대 판타지"],
+    "재벌": ["재벌", "기업", "경제"],
+    "아포칼립스": ["아포칼립스", "좀비", "멸망"],
+    "힐링": ["힐링"],
+}
+# 작가 모듈별 용도 -> 원하는 태그
+PURPOSE_TAGS = {
+    "plot": {"도입부", "플롯", "중반부", "연독", "캐릭터"},
+    "style": {"문장"},
+    "setting": {"세계관"},
+}
+
+_HEADING_RE = re.compile(r"^#{1,3}\s+(.+)$", re.M)
+
+# ---------------------------------------------------------
+# ✂️ [Sections] 파일 -> 태그 달린 섹션
+# ---------------------------------------------------------
+def _match_tags(rules, head, body):
+    head, body = head.lower(), body.lower()
+    return {tag for tag, kws in rules.items() if any(kw in head for kw in kws) or sum(body.count(kw) for kw in kws) >= 2}
+
+def _rel_name(path, kind):
+    """자료 폴더 기준 상대 경로 (하위 폴더가 다른 같은 이름 파일끼리 섹션 id가 겹치지 않도록)"""
+    try: return path.relative_to(KIND_ROOTS[kind]).as_posix()
+    except (KeyError, ValueError): return path.name
+
+def split_sections(path, kind, text):
+    """마크다운 소제목(#~###) 기준으로 나누고, 소제목이 없으면 문단 묶음으로 나눔"""
+    title = path.stem if path.suffix in (".md", ".txt") else path.name
+    rel = _rel_name(path, kind)
+    folder_genres = _match_tags(GENRE_TAGS, path.parent.name, "") if kind == "setting" else set()
+    heads = list(_HEADING_RE.finditer(text))
+    if heads:
+        bounds = [(m.group(1).strip(), m.start()) for m in heads]
+        pieces = [("", text[:bounds[0][1]])] if bounds[0][1] > 0 else []
+        pieces += [(h, text[start:bounds[i + 1][1] if i + 1 < len(bounds) else len(text)]) for i, (h, start) in enumerate(bounds)]
+    else:
+        pieces = [("", p) for p in split_passages(text)]
+
+    sections = []
+    for i, (heading, body) in enumerate(pieces):
+        body = body.strip()
+        if len(_HEADING_RE.sub("", body).strip()) < 30: continue    # 소제목만 있는 섹션은 건너뜀
+        head = f"{title} {heading}"
+        sections.append({
+            "id": f"{kind}:{rel}#{i}", "kind": kind, "file": rel, "heading": heading or title,
+            "text": body,
+            "tags": _match_tags(TOPIC_TAGS, head, body),
+            "genres": folder_genres | _match_tags(GENRE_TAGS, head, body),
+        })
+    return sections
+
+# ---------------------------------------------------------
+# 🗂️ [Index] 프로세스 내 색인 + 변경분 갱신
+# ---------------------------------------------------------
+def _iter_files():
+    """(경로, 종류) - 확장자 없는 팁 파일도 포함, 숨김/임시 파일 제외"""
+    for root, kind in ((TIP_DIR, "tip"), (SETTING_DIR, "setting")):
+        if not root.exists(): continue
+        for f in sorted(root.rglob("*")):
+            if f.is_file() and not f.name.startswith((".", "~")) and f.suffix in ("", ".md", ".txt"):
+                yield f, kind
+
+class KnowledgeBase:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}        # 경로 -> (mtime, size, sections)
+        self._index = None
+        self._sections = []
+        self._last_check = 0.0
+
+    def refresh(self, force=False):
+        """바뀐 파일만 다시 읽음. 하나라도 바뀌면 관련도 색인 재구축"""
+        with self._lock:
+            if not force and self._index is not None and time.time() - self._last_check < REFRESH_INTERVAL:
+                return False
+            self._last_check = time.time()
+            changed, seen = False, set()
+            for f, kind in _iter_files():
+                seen.add(f)
+                st = f.stat()
+                old = self._files.get(f)
+                if old and old[0] == st.st_mtime and old[1] == st.st_size: continue
+                try: text = f.read_text(encoding='utf-8')
+                except Exception: text = ""
+                self._files[f] = (st.st_mtime, st.st_size, split_sections(f, kind, text))
+                changed = True
+            for f in set(self._files) - seen:
+                del self._files[f]
+                changed = True
+
+            if changed or self._index is None:
+                self._sections = [s for _, _, secs in self._files.values() for s in secs]
+                # 태그/소제목도 검색 대상에 섞어서 짧은 질의도 잡히게
+                self._index = BM25Index([dict(s, text=f"{s['heading']} {' '.join(s['tags'] | s['genres'])}\n{s['text']}") for s in self._sections])
+            return changed
+
+    def query(self, purpose, plan_data=None, text="", kinds=("tip",), k=5):
+        """
+        Args:
+            purpose: 'plot' / 'style' / 'setting' (PURPOSE_TAGS 키)
+            plan_data: 기획안 dict (장르/로그라인/시놉시스로 질의 구성)
+            text: 추가 질의 (트리트먼트 등)
+        Returns:
+            관련도 순 섹션 dict 목록 (id, kind, file, heading, text, tags, genres, score)
+        """
+        self.refresh()
+        with self._lock: sections, index = self._sections, self._index
+        plan_data = plan_data or {}
+        wanted = PURPOSE_TAGS.get(purpose, set())
+        plan_head = f"{plan_data.get('genre', '')} {plan_data.get('title', '')}"
+        plan_genres = _match_tags(GENRE_TAGS, plan_head, "")
+        query = " ".join([plan_head, str(plan_data.get('logline', '')), str(plan_data.get('synopsis', ''))[:1000], text[:3000], " ".join(wanted)])
+
+        hits = {h["id"]: h["score"] for h in index.search(query, k=len(sections))}
+        scored = []
+        for s in sections:
+            if s["kind"] not in kinds: continue
+            # 다른 장르 전용 설정은 제외 (공통 자료는 장르 태그가 없어서 통과)
+            if s["kind"] == "setting" and plan_genres and s["genres"] and not (s["genres"] & plan_genres): continue
+            base = hits.get(s["id"], 0.0)
+            tag_hits = len(s["tags"] & wanted)
+            if wanted and not tag_hits and s["kind"] == "tip": continue
+            score = (base + 1.0) * (1 + TAG_BOOST * tag_hits + GENRE_BOOST * len(s["genres"] & plan_genres))
+            scored.append(dict(s, score=score))
+        scored.sort(key=lambda s: -s["score"])
+
+        # 한 파일이 다 차지하지 않도록 파일당 최대 2섹션
+        picked, per_file = [], {}
+        for s in scored:
+            if per_file.get(s["file"], 0) >= 2: continue
+            per_file[s["file"]] = per_file.get(s["file"], 0) + 1
+            picked.append(s)
+            if len(picked) >= k: break
+        return picked
+
+_kb = None
+_kb_lock = threading.Lock()
+
+def get_kb():
+    global _kb
+    with _kb_lock:
+        if _kb is None: _kb = KnowledgeBase()
+        return _kb
+
+def query(purpose, plan_data=None, text="", kinds=("tip",), k=5):
+    return get_kb().query(purpose, plan_data, text, kinds, k)
+
+if __name__ == "__main__":
+    kb = get_kb()
+    kb.refresh(force=True)
+    print(f"📚 [Knowledge Base] 섹션 {len(kb._sections)}개")
+    for s in query("plot", {"genre": "현대판타지 재벌물"}):
+        print(f" - {s['file']} / {s['heading']} {sorted(s['tags'])} {s['score']:.2f}")
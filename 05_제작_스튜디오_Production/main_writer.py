@@ -3,7 +3,6 @@ import json
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 CURRENT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = CURRENT_DIR.parent
@@ -13,38 +12,43 @@ TIP_DIR = PROJECT_ROOT / "00_기준정보_보물창고" / "05_팁_보물창고"
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
+import context_packer
+import knowledge_base
+import llm_gateway
+ASSET_BUDGET_TOKENS = 6000   # 설정 + 문체 팁 합산 예산 상한
+
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 API_KEY = os.getenv("GEMINI_KEY_WRITER") or os.getenv("GEMINI_API_KEY")
-if API_KEY: genai.configure(api_key=API_KEY)
 
 try:
     import model_selector
     MODEL_NAME = model_selector.find_best_model()
-    writer_model = genai.GenerativeModel(MODEL_NAME)
+    writer_model = MODEL_NAME  # 클라이언트는 게이트웨이가 관리 -> 여기선 모델명만
     print(f"🔥 [Main Writer] Engine: {MODEL_NAME}")
 except ImportError:
     writer_model = None
 
-def fetch_writing_assets():
-    """설정 자료(세계관, 마법 등) 로드"""
+def fetch_writing_assets(plan_data=None, treatment=""):
+    """기획 장르/트리트먼트와 관련 있는 설정 섹션 + 문체 팁 섹션 (지식 베이스 색인에서 선택)"""
     context = ""
     try:
-        settings = list(SETTING_DIR.rglob("*.txt"))
-        for f in settings[:5]: 
-            context += f"\n[Setting: {f.name}]\n{f.read_text(encoding='utf-8')[:1000]}\n"
-            
-        tips = list(TIP_DIR.glob("*문장*.md")) + list(TIP_DIR.glob("*묘사*.txt"))
-        for t in tips[:3]:
-            context += f"\n[Style Tip: {t.name}]\n{t.read_text(encoding='utf-8')[:1000]}\n"
-    except: pass
+        # 설정(세계관 고증)이 문체 팁보다 우선
+        packer = context_packer.ContextPacker(context_packer.budget_for(MODEL_NAME, cap=ASSET_BUDGET_TOKENS))
+        sections = [("Setting", s) for s in knowledge_base.query("setting", plan_data, treatment, kinds=("setting",), k=5)]
+        sections += [("Style Tip", s) for s in knowledge_base.query("style", plan_data, treatment, k=3)]
+        for label, s in sections:
+            packer.add(s["id"], s["text"], priority=1 if label == "Setting" else 2)
+
+        packed = packer.pack()
+        print(packer.summary("Writer Assets"))
+        for label, s in sections:
+            if packed[s["id"]]: context += f"\n[{label}: {s['file']} / {s['heading']}]\n{packed[s['id']]}\n"
+    except Exception as e:
+        print(f"⚠️ [Main Writer] 설정/팁 로드 실패: {e}")
     return context
 
-def write_episode(plan_data, treatment, episode_num=1):
-    """트리트먼트 -> 본문 집필"""
-    
-    if not writer_model: return "❌ 오류: 엔진 로드 실패"
-    
-    assets = fetch_writing_assets()
+def build_episode_prompt(plan_data, treatment, episode_num=1):
+    assets = fetch_writing_assets(plan_data, treatment)
     
     prompt = f"""
     You are a best-selling Web Novel Author in Korea.
@@ -72,9 +76,25 @@ def write_episode(plan_data, treatment, episode_num=1):
     [Output]
     Start writing the novel text directly. Do not include introductory remarks.
     """
+    return prompt
+
+def write_episode(plan_data, treatment, episode_num=1):
+    """트리트먼트 -> 본문 집필"""
+    
+    if not writer_model: return "❌ 오류: 엔진 로드 실패"
     
     try:
-        response = writer_model.generate_content(prompt)
-        return response.text
+        return llm_gateway.generate(build_episode_prompt(plan_data, treatment, episode_num), writer_model, api_key=API_KEY)
+    except Exception as e:
+        return f"❌ 본문 생성 실패: {e}"
+
+def write_episode_stream(plan_data, treatment, episode_num=1, cancel=None):
+    """write_episode 의 스트리밍판 - 본문 조각을 받는 대로 yield (cancel.set() 또는 close() 로 중단)"""
+    if not writer_model:
+        yield "❌ 오류: 엔진 로드 실패"
+        return
+    try:
+        yield from llm_gateway.generate_stream(build_episode_prompt(plan_data, treatment, episode_num), writer_model,
+                                               api_key=API_KEY, cancel=cancel)
     except Exception as e:
-        return f"❌ 본문 생성 실패: {e}"
\ No newline at end of file
+        yield f"\n❌ 본문 생성 실패: {e}"
\ No newline at end of file
@@ -4,7 +4,6 @@ import sys
 import re
 from pathlib import Path
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 # 환경 설정
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -16,43 +15,41 @@ SETTING_DIR = PROJECT_ROOT / "04_설정_자료집"
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
+import context_packer
+import knowledge_base
+import llm_gateway
+KNOWHOW_BUDGET_TOKENS = 6000   # 플롯 팁 합산 예산 상한
+
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 API_KEY = os.getenv("GEMINI_KEY_WRITER") or os.getenv("GEMINI_API_KEY")
-if API_KEY: genai.configure(api_key=API_KEY)
 
 # 🔥 [모델 셀렉터] 무조건 최강 모델 로드
 try:
     import model_selector
     MODEL_NAME = model_selector.find_best_model()
-    writer_model = genai.GenerativeModel(MODEL_NAME)
+    writer_model = MODEL_NAME  # 클라이언트는 게이트웨이가 관리 -> 여기선 모델명만
     print(f"🔥 [Treatment Writer] Engine: {MODEL_NAME}")
 except ImportError:
     writer_model = None # 셀렉터 없으면 동작 안 함 (강제)
 
-def fetch_plot_knowhow():
-    """도입부, 플롯 구성 팁 로드"""
+def fetch_plot_knowhow(plan_data=None):
+    """기획 장르/로그라인과 관련 있는 도입부·플롯 팁 섹션 (지식 베이스 색인에서 선택)"""
     context = ""
     try:
-        tips = []
-        for kw in ['도입부', '플롯', '구조', '전개']:
-            tips.extend(list(TIP_DIR.glob(f"*{kw}*.md")))
-            tips.extend(list(TIP_DIR.glob(f"*{kw}*.txt")))
-        
-        seen = set()
-        for tip in tips[:5]:
-            if tip.name not in seen:
-                context += f"\n[Tip: {tip.name}]\n{tip.read_text(encoding='utf-8')[:1500]}\n"
-                seen.add(tip.name)
-    except: pass
+        sections = knowledge_base.query("plot", plan_data, k=5)
+        packer = context_packer.ContextPacker(context_packer.budget_for(MODEL_NAME, cap=KNOWHOW_BUDGET_TOKENS))
+        for s in sections:
+            packer.add(s["id"], s["text"])
+        packed = packer.pack()
+        print(packer.summary("Plot Know-how"))
+        for s in sections:
+            if packed[s["id"]]: context += f"\n[Tip: {s['file']} / {s['heading']}]\n{packed[s['id']]}\n"
+    except Exception as e:
+        print(f"⚠️ [Treatment Writer] 팁 로드 실패: {e}")
     return context
 
-def generate_treatment(plan_data, episode_num=1):
-    """기획안 -> 씬(Scene) 설계도 변환"""
-    
-    if not writer_model:
-        return "❌ 오류: model_selector.py가 루트에 없습니다."
-
-    plot_tips = fetch_plot_knowhow()
+def build_treatment_prompt(plan_data, episode_num=1):
+    plot_tips = fetch_plot_knowhow(plan_data)
     
     prompt = f"""
     You are the Lead Storyboard Artist for a top-tier web novel.
@@ -83,9 +80,26 @@ def generate_treatment(plan_data, episode_num=1):
     Markdown format. Start with `# {plan_data.get('title')} - Episode {episode_num} Treatment`.
     Make sure to include a 'Hook' at the start and a 'Cliffhanger' at the end.
     """
+    return prompt
+
+def generate_treatment(plan_data, episode_num=1):
+    """기획안 -> 씬(Scene) 설계도 변환"""
     
+    if not writer_model:
+        return "❌ 오류: model_selector.py가 루트에 없습니다."
+
+    try:
+        return llm_gateway.generate(build_treatment_prompt(plan_data, episode_num), writer_model, api_key=API_KEY)
+    except Exception as e:
+        return f"❌ 트리트먼트 생성 실패: {e}"
+
+def generate_treatment_stream(plan_data, episode_num=1, cancel=None):
+    """generate_treatment 의 스트리밍판 - 설계도 조각을 받는 대로 yield (cancel.set() 또는 close() 로 중단)"""
+    if not writer_model:
+        yield "❌ 오류: model_selector.py가 루트에 없습니다."
+        return
     try:
-        response = writer_model.generate_content(prompt)
-        return response.text
+        yield from llm_gateway.generate_stream(build_treatment_prompt(plan_data, episode_num), writer_model,
+                                               api_key=API_KEY, cancel=cancel)
     except Exception as e:
-        return f"❌ 트리트먼트 생성 실패: {e}"
\ No newline at end of file
+        yield f"\n❌ 트리트먼트 생성 실패: {e}"
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
 import sys
+import time
 from pathlib import Path
 
 # 루트 경로 설정
@@ -17,6 +18,43 @@ except ImportError:
     treatment_writer = None
     main_writer = None
 
+try: import plagiarism_scanner
+except ImportError: plagiarism_scanner = None
+try: import banned_term_scanner
+except ImportError: banned_term_scanner = None
+
+def show_banned_terms(text):
+    """금지 고유명사(기존 성공작 캐릭터 이름) 등장 여부 표시"""
+    if not banned_term_scanner or not text or text.startswith("❌"): return
+    try: hits = banned_term_scanner.scan(text)
+    except Exception as e:
+        st.warning(f"금지어 검사 실패: {e}")
+        return
+    if hits:
+        summary = ", ".join(f"{t}({n})" for t, n in banned_term_scanner.summarize(hits))
+        st.error(f"🚫 금지 고유명사 {len(hits)}회: {summary}")
+
+STREAM_REFRESH_SECONDS = 0.15   # 화면 갱신 최소 간격 (조각마다 다시 그리면 웹소켓이 밀림)
+
+def stream_into(placeholder, chunks, state_key, label, cancel_key):
+    """
+    조각을 받는 대로 placeholder 의 글상자에 그림. 결과는 session_state[state_key] 에 저장.
+    취소 버튼을 누르면 Streamlit 이 이 실행을 끊고 다시 돌리므로, finally 에서 연결을 닫고 받은 데까지 보관.
+    """
+    st.button("⏹️ 생성 취소", key=cancel_key)
+    text, last, finished = "", 0.0, False
+    try:
+        for chunk in chunks:
+            text += chunk
+            if time.monotonic() - last >= STREAM_REFRESH_SECONDS:
+                placeholder.text_area(label, value=text, height=400, disabled=True)
+                last = time.monotonic()
+        finished = True
+    finally:
+        chunks.close()  # 취소/중단 시 제공자 스트림도 바로 닫힘
+        text = text.strip()
+        st.session_state[state_key] = text if finished else text + "\n\n[⏹️ 생성 취소됨 - 여기까지 받은 내용]"
+
 # ✅ 핵심 변경: 함수 이름을 'render'로 통일했습니다.
 def render(planning_dir, production_dir):
     st.subheader("🏭 실시간 제작 현황")
@@ -52,12 +90,12 @@ def render(planning_dir, production_dir):
                 with c1:
                     st.info("Step 1. 트리트먼트 (설계)")
                     if st.button("🏗️ 생성", key=f"btn_t_{pname}"):
-                        with st.spinner("플롯 설계 중..."):
-                            res = treatment_writer.generate_treatment(d)
-                            st.session_state[k_treat] = res
-                            st.rerun()
+                        # 첫 조각부터 바로 표시 (스피너 대신 실시간 글상자)
+                        stream_into(st.empty(), treatment_writer.generate_treatment_stream(d), k_treat, "설계도 내용", f"cancel_t_{pname}")
+                        st.rerun()
                     
                     st.text_area("설계도 내용", value=st.session_state[k_treat], height=400, key=f"txt_t_{pname}")
+                    show_banned_terms(st.session_state[k_treat])
 
                 # 2단계: 본문
                 with c2:
@@ -66,12 +104,32 @@ def render(planning_dir, production_dir):
                         if not st.session_state[k_treat]: 
                             st.error("트리트먼트 먼저!")
                         else:
-                            with st.spinner("본문 집필 중..."):
-                                res = main_writer.write_episode(d, st.session_state[k_treat])
-                                st.session_state[k_main] = res
-                                st.rerun()
+                            stream_into(st.empty(), main_writer.write_episode_stream(d, st.session_state[k_treat]), k_main, "원고 내용", f"cancel_w_{pname}")
+                            st.rerun()
                                 
                     st.text_area("원고 내용", value=st.session_state[k_main], height=400, key=f"txt_m_{pname}")
+                    show_banned_terms(st.session_state[k_main])
+
+                    # 표절 검사 (로컬 MinHash, 원고가 바뀔 때만 다시 계산)
+                    if plagiarism_scanner and st.session_state[k_main] and not st.session_state[k_main].startswith("❌"):
+                        k_scan = f"scan_{pname}"
+                        cached = st.session_state.get(k_scan)
+                        if not cached or cached[0] != hash(st.session_state[k_main]):
+                            try: cached = (hash(st.session_state[k_main]), plagiarism_scanner.scan(st.session_state[k_main]))
+                            except Exception as e: cached = (hash(st.session_state[k_main]), {"error": str(e)})
+                            st.session_state[k_scan] = cached
+                        scan = cached[1]
+                        if "error" in scan:
+                            st.warning(f"표절 검사 실패: {scan['error']}")
+                        else:
+                            m1, m2 = st.columns(2)
+                            m1.metric("최대 유사도", f"{scan['similarity_rate']}%")
+                            m2.metric("겹친 분량", f"{scan['copied_ratio']}%")
+                            if scan['matches']:
+                                with st.expander(f"🕵️ 겹치는 아카이브 문단 {len(scan['matches'])}개"):
+                                    for m in scan['matches']:
+                                        st.markdown(f"**{m['name']}** · {m['similarity']}% (원고 {m['chunk'] + 1}번째 구간)")
+                                        st.caption(m['excerpt'])
 
                 if st.button("⏹️ 중단", key=f"stop_{pname}"):
                     st.session_state.active_projects.remove(pname)
@@ -0,0 +1,148 @@
+import re
+import sys
+import json
+import threading
+from pathlib import Path
+from collections import deque, Counter
+
+# =========================================================
+# 🚫 [품질관리 팀] Banned Term Scanner (Aho-Corasick)
+# 역할: 성공작 캐릭터 이름(고유명사)이 기획안/트리트먼트/원고에 섞였는지 결정적으로 검사
+#       (프롬프트에 이름 50개 붙여 '쓰지 마세요' 부탁하던 방식 대체 -> 토큰 0)
+# 방식: 금지어 전체를 Aho-Corasick 오토마톤 하나로 컴파일 -> 본문 한 번 훑기 (선형 시간)
+#       캐릭터 분석 폴더가 바뀔 때만 다시 컴파일
+# =========================================================
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+CHAR_ANALYSIS_DIR = PROJECT_ROOT / "02_분석실_Analysis" / "02_캐릭터_분석"
+
+MIN_TERM_CHARS = 2      # 한 글자 이름은 일반 단어와 구분이 안 돼서 제외
+_ROLE_RE = re.compile(r"\s*[\(\[（].*?[\)\]）]\s*")   # "이강호 (Protagonist)" -> "이강호"
+
+_lock = threading.Lock()
+_cache = {"signature": None, "automaton": None}   # 폴더 지문 -> 컴파일된 오토마톤
+
+# ---------------------------------------------------------
+# 📥 [Terms] 캐릭터 분석 JSON -> 금지어
+# ---------------------------------------------------------
+def _folder_signature():
+    if not CHAR_ANALYSIS_DIR.exists(): return ()
+    return tuple(sorted((f.name, f.stat().st_mtime_ns, f.stat().st_size) for f in CHAR_ANALYSIS_DIR.glob("*.json")))
+
+def _clean(name):
+    name = _ROLE_RE.sub(" ", str(name)).strip(" -:·")
+    return name if len(name) >= MIN_TERM_CHARS else ""
+
+def load_terms():
+    """
+    Returns:
+        {금지어: 출처 파일명} - characters[].name 과 analysis_content.character_list("이름 (역할)") 둘 다 지원
+    """
+    terms = {}
+    if not CHAR_ANALYSIS_DIR.exists(): return terms
+    for f in sorted(CHAR_ANALYSIS_DIR.glob("*.json")):
+        try:
+            data = json.loads(f.read_text(encoding='utf-8'))
+        except Exception:
+            continue
+        names = [c.get('name', '') for c in data.get('characters', []) if isinstance(c, dict)]
+        content = data.get('analysis_content', {})
+        if isinstance(content, dict):
+            names.extend(content.get('character_list', []) or [])
+        for name in names:
+            name = _clean(name)
+            if name: terms.setdefault(name, f.name)
+    return terms
+
+# ---------------------------------------------------------
+# 🤖 [Automaton] Aho-Corasick
+# ---------------------------------------------------------
+class Automaton:
+    """goto(상태별 dict) + fail 링크 + 출력(상태에서 끝나는 금지어 목록)"""
+
+    def __init__(self, terms):
+        """terms: {금지어: 출처} 또는 금지어 목록"""
+        self.sources = dict(terms) if isinstance(terms, dict) else {t: "" for t in terms}
+        self.terms = list(self.sources)
+        self.goto = [{}]
+        self.out = [[]]
+        for tid, term in enumerate(self.terms):
+            state = 0
+            for ch in term.lower():
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(tid)
+
+        # BFS로 fail 링크 계산, 출력은 fail 쪽 것까지 합쳐둠
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        """(시작, 끝, 금지어 번호) - 겹치는 매칭도 모두"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text.lower()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for tid in out[state]:
+                yield i - len(self.terms[tid]) + 1, i + 1, tid
+
+def get_automaton():
+    """캐릭터 분석 폴더가 바뀌었을 때만 다시 컴파일"""
+    signature = _folder_signature()
+    with _lock:
+        if _cache["automaton"] is None or _cache["signature"] != signature:
+            _cache["automaton"] = Automaton(load_terms())
+            _cache["signature"] = signature
+        return _cache["automaton"]
+
+def banned_terms():
+    return list(get_automaton().terms)
+
+# ---------------------------------------------------------
+# 🔎 [Scan] 본문 검사
+# ---------------------------------------------------------
+def scan(text):
+    """
+    Returns:
+        [{term, start, end, source, context}] 본문 등장 순
+    """
+    if not text: return []
+    automaton = get_automaton()
+    if not automaton.terms: return []
+    hits = []
+    for start, end, tid in automaton.iter_matches(text):
+        term = automaton.terms[tid]
+        hits.append({
+            "term": term, "start": start, "end": end, "source": automaton.sources[term],
+            "context": text[max(0, start - 15):end + 15].replace("\n", " ")
+        })
+    return hits
+
+def summarize(hits):
+    """금지어별 등장 횟수 (많은 순)"""
+    return Counter(h["term"] for h in hits).most_common()
+
+if __name__ == "__main__":
+    terms = banned_terms()
+    print(f"🚫 [Banned Terms] {len(terms)}개 컴파일 완료")
+    if len(sys.argv) > 1:
+        target = Path(sys.argv[1])
+        for term, n in summarize(scan(target.read_text(encoding='utf-8'))):
+            print(f" - {term}: {n}회")
@@ -0,0 +1,239 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import threading
+from pathlib import Path
+import numpy as np
+
+# =========================================================
+# 🕵️ [품질관리 팀] Plagiarism Scanner (MinHash-LSH)
+# 역할: 원고/기획안이 성공작 아카이브 문단과 얼마나 겹치는지 로컬에서 즉시 측정
+#       (LLM이 눈대중으로 찍던 similarity_rate 대체 -> 무료, 재현 가능)
+# 방식: 글자 5-gram 슁글 -> MinHash 서명 128개 -> 밴드 32 x 4행 LSH 후보 -> 서명 일치율로 자카드 추정
+# 저장: .factory_cache/plagiarism (서명 행렬 npz + 문단 정보 SQLite), 새 회차만 추가 계산
+# =========================================================
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+if str(PROJECT_ROOT) not in sys.path: sys.path.append(str(PROJECT_ROOT))
+
+import corpus_index
+from reference_retriever import split_passages
+
+INDEX_DIR = PROJECT_ROOT / ".factory_cache" / "plagiarism"
+SIG_PATH = INDEX_DIR / "minhash.npz"
+DB_PATH = INDEX_DIR / "passages.sqlite3"
+
+SHINGLE_CHARS = 5
+NUM_PERM = 128
+BANDS, ROWS = 32, 4                 # 자카드 0.5 -> 후보 확률 약 87%, 0.2 -> 약 5%
+MIN_SIMILARITY = float(os.getenv("PLAGIARISM_MIN_SIMILARITY", "0.2"))   # 이보다 낮으면 매칭으로 안 침
+MIN_PASSAGE_CHARS = 200
+
+_NORM_RE = re.compile(r"[\s\W_]+")
+_rng = np.random.default_rng(20260215)  # 서명이 디스크에 저장되므로 해시 계수는 고정
+_PERM_A = (_rng.integers(1, 2**32, NUM_PERM, dtype=np.uint64) | np.uint64(1))
+_PERM_B = _rng.integers(0, 2**32, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+_lock = threading.Lock()
+_index = None   # 메모리에 올린 색인 (sigs, band_keys, band_order, active)
+
+# ---------------------------------------------------------
+# 🔢 [MinHash] 슁글 + 서명
+# ---------------------------------------------------------
+def shingles(text):
+    """공백/문장부호를 뺀 글자 5-gram 해시 (uint64, 중복 제거)"""
+    norm = _NORM_RE.sub("", text or "")
+    if len(norm) < SHINGLE_CHARS: return np.zeros(0, dtype=np.uint64)
+    codes = np.frombuffer(norm.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    h = np.zeros(len(codes) - SHINGLE_CHARS + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(SHINGLE_CHARS):
+            h = h * np.uint64(1000003) + codes[j:len(codes) - SHINGLE_CHARS + 1 + j]
+    return np.unique(h ^ (h >> np.uint64(29)))
+
+def minhash(shingle_hashes):
+    """슁글 해시 -> (NUM_PERM,) uint32 서명 (multiply-shift 해시 계열의 최솟값)"""
+    if not len(shingle_hashes): return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    x = (shingle_hashes & np.uint64(0xFFFFFFFF))[None, :]
+    with np.errstate(over="ignore"):
+        hv = (_PERM_A[:, None] * x + _PERM_B[:, None]) >> np.uint64(32)
+    return hv.min(axis=1).astype(np.uint32)
+
+def band_keys(sigs):
+    """(N, NUM_PERM) 서명 -> (BANDS, N) 밴드 키"""
+    bands = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        return (bands * _BAND_MIX).sum(axis=2).T.copy()
+
+# ---------------------------------------------------------
+# 💾 [Index] 아카이브 색인 (증분)
+# ---------------------------------------------------------
+def _connect():
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS passages (
+        row INTEGER PRIMARY KEY,    -- 서명 행렬의 행 번호
+        key TEXT UNIQUE,            -- 회차 해시 + 문단 번호
+        name TEXT,
+        title TEXT,
+        text TEXT,
+        active INTEGER DEFAULT 1
+    );
+    CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+    """)
+    return conn
+
+def _load_sigs():
+    if not SIG_PATH.exists(): return np.zeros((0, NUM_PERM), dtype=np.uint32)
+    with np.load(SIG_PATH) as z: return z["sigs"]
+
+def _save(sigs):
+    keys = band_keys(sigs)
+    order = np.argsort(keys, axis=1, kind="stable").astype(np.int64)
+    tmp = SIG_PATH.with_suffix(".tmp.npz")
+    np.savez(tmp, sigs=sigs, band_keys=np.take_along_axis(keys, order, axis=1), band_order=order)
+    os.replace(tmp, SIG_PATH)
+
+def sync():
+    """
+    아카이브 색인과 맞춰 새 문단의 서명만 계산해 덧붙입니다. (지워진 회차 문단은 active 목록에서 빠짐)
+
+    Returns:
+        추가된 문단 수
+    """
+    global _index
+    signature = corpus_index.signature()
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT v FROM meta WHERE k='signature'").fetchone()
+        if row and row["v"] == signature and SIG_PATH.exists():
+            return 0
+
+        conn.execute("BEGIN IMMEDIATE")
+        sigs = _load_sigs()
+        known = {r["key"] for r in conn.execute("SELECT key FROM passages")}
+        if len(known) != len(sigs):
+            # 서명 파일과 표가 어긋났으면 (중간에 죽음) 처음부터
+            conn.execute("DELETE FROM passages")
+            known, sigs = set(), np.zeros((0, NUM_PERM), dtype=np.uint32)
+
+        new_rows, new_sigs, seen = [], [], []
+        for ep in corpus_index.iter_episodes():
+            for i, passage in enumerate(split_passages(ep["content"])):
+                if len(passage) < MIN_PASSAGE_CHARS: continue
+                key = f"{ep['sha1']}:{i}"
+                seen.append(key)
+                if key in known: continue
+                known.add(key)  # 같은 내용의 회차(재업로드/복사본)는 이번 회차에서도 한 번만
+                new_rows.append((len(sigs) + len(new_rows), key, ep["name"], ep["title"], passage))
+                new_sigs.append(minhash(shingles(passage)))
+
+        # 지워진 회차 문단은 서명을 남겨두고 비활성 표시만
+        seen_json = json.dumps(seen, ensure_ascii=False)
+        conn.execute("UPDATE passages SET active=0 WHERE active=1 AND key NOT IN (SELECT value FROM json_each(?))", (seen_json,))
+        conn.execute("UPDATE passages SET active=1 WHERE active=0 AND key IN (SELECT value FROM json_each(?))", (seen_json,))
+        if new_sigs:
+            sigs = np.vstack([sigs, np.asarray(new_sigs, dtype=np.uint32)])
+            conn.executemany("INSERT INTO passages(row, key, name, title, text) VALUES (?,?,?,?,?)", new_rows)
+        _save(sigs)
+        conn.execute("INSERT OR REPLACE INTO meta(k, v) VALUES ('signature', ?)", (signature,))
+        conn.commit()
+        with _lock: _index = None
+        return len(new_rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def _load_index():
+    global _index
+    with _lock:
+        if _index is not None: return _index
+        conn = _connect()
+        try:
+            active_rows = np.array([r[0] for r in conn.execute("SELECT row FROM passages WHERE active=1")], dtype=np.int64)
+        finally:
+            conn.close()
+        if not SIG_PATH.exists() or not len(active_rows):
+            _index = {"n": 0}
+            return _index
+        with np.load(SIG_PATH) as z:
+            _index = {"n": len(z["sigs"]), "sigs": z["sigs"], "band_keys": z["band_keys"], "band_order": z["band_order"]}
+        active = np.zeros(_index["n"], dtype=bool)
+        active[active_rows[active_rows < _index["n"]]] = True
+        _index["active"] = active
+        return _index
+
+# ---------------------------------------------------------
+# 🔎 [Scan] 원고/기획안 채점
+# ---------------------------------------------------------
+def _candidates(index, sig):
+    q_keys = band_keys(sig[None, :])[:, 0]
+    found = []
+    for b in range(BANDS):
+        keys = index["band_keys"][b]
+        lo = np.searchsorted(keys, q_keys[b], side="left")
+        hi = np.searchsorted(keys, q_keys[b], side="right")
+        if hi > lo: found.append(index["band_order"][b, lo:hi])
+    if not found: return np.zeros(0, dtype=np.int64)
+    rows = np.unique(np.concatenate(found))
+    return rows[index["active"][rows]]
+
+def scan(text, k=5, min_similarity=MIN_SIMILARITY):
+    """
+    Args:
+        text: 원고 본문 또는 기획안 시놉시스
+    Returns:
+        dict: similarity_rate(가장 겹치는 문단의 추정 자카드 %), copied_ratio(겹치는 문단이 있는 원고 조각 비율 %),
+              matches([{name, title, excerpt, similarity, chunk}] 유사도 순 k개)
+    """
+    result = {"similarity_rate": 0, "copied_ratio": 0, "matches": []}
+    chunks = [c for c in split_passages(text or "") if len(_NORM_RE.sub("", c)) >= SHINGLE_CHARS]
+    if not chunks: return result
+
+    sync()
+    index = _load_index()
+    if not index["n"]: return result
+
+    best = {}   # 아카이브 행 -> (유사도, 원고 조각 번호)
+    hit_chunks = set()
+    for ci, chunk in enumerate(chunks):
+        sig = minhash(shingles(chunk))
+        rows = _candidates(index, sig)
+        if not len(rows): continue
+        sims = (index["sigs"][rows] == sig).mean(axis=1)
+        for row, sim in zip(rows, sims):
+            if sim < min_similarity: continue
+            hit_chunks.add(ci)
+            if sim > best.get(int(row), (0, 0))[0]: best[int(row)] = (float(sim), ci)
+
+    if not best: return result
+    top = sorted(best.items(), key=lambda kv: -kv[1][0])[:k]
+    conn = _connect()
+    try:
+        marks = ",".join("?" * len(top))
+        info = {r["row"]: r for r in conn.execute(f"SELECT row, name, title, text FROM passages WHERE row IN ({marks})", [r for r, _ in top])}
+    finally:
+        conn.close()
+
+    for row, (sim, ci) in top:
+        r = info.get(row)
+        if not r: continue
+        result["matches"].append({
+            "name": r["name"], "title": r["title"], "excerpt": r["text"][:200],
+            "similarity": round(sim * 100, 1), "chunk": ci
+        })
+    result["similarity_rate"] = int(round(top[0][1][0] * 100))
+    result["copied_ratio"] = int(round(len(hit_chunks) / len(chunks) * 100))
+    return result
+
+if __name__ == "__main__":
+    print(f"🕵️ [Plagiarism Scanner] 새 문단 {sync()}개 서명 완료")
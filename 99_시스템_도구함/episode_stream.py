@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+
+import text_stitch
+
+# =========================================================
+# 🧵 [가공 팀] Episode Stream Writer (Resumable)
+# 역할: OCR 배치가 도착하는 대로 회차 경계를 찾아 바로 저장
+# 중간에 죽어도 저널(체크포인트)을 보고 다음 배치부터 이어서 처리
+# =========================================================
+
+# <...>, [...] 패턴으로 회차 나누기
+SPLIT_PATTERN = re.compile(r"(?:<|\[)[^>\]]*(?:\d+|화|프롤로그|에필로그)[^>\]]*(?:>|\])")
+
+JOURNAL_NAME = "_ocr_journal.json"
+
+def episode_filename(novel_title, seq, marker):
+    """파일명 생성 (특수문자 제거)"""
+    safe_title = re.sub(r'[\\/*?:"<>|\[\]]', "", marker.strip()).strip()
+    return f"{novel_title}_{seq:03d}_{safe_title}.md"
+
+def batch_signature(batches):
+    """이미지 구성이 바뀌면 예전 저널은 무효 처리"""
+    h = hashlib.sha256()
+    for batch in batches:
+        h.update("|".join(Path(p).name for p in batch).encode('utf-8'))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+class EpisodeStreamWriter:
+    """
+    배치 텍스트를 순서대로 받아, 다음 회차 구분자가 나타나면
+    직전 회차를 완성본으로 보고 즉시 파일로 씁니다.
+    """
+
+    def __init__(self, novel_dir, save_dir, novel_title, signature):
+        self.journal_path = Path(novel_dir) / JOURNAL_NAME
+        self.save_dir = Path(save_dir)
+        self.novel_title = novel_title
+        self.signature = signature
+
+        self.next_batch = 0
+        self.episode_count = 0
+        self.tail = ""          # 아직 끝나지 않은 회차 (또는 첫 구분자 이전 텍스트)
+        self.last_batch_text = ""  # 배치 경계 겹침 비교용
+        self.stitched_lines = 0
+        self._load_journal()
+
+    # ---------------- 저널 ----------------
+    def _load_journal(self):
+        if not self.journal_path.exists(): return
+        try:
+            data = json.loads(self.journal_path.read_text(encoding='utf-8'))
+        except Exception:
+            return
+        if data.get("signature") != self.signature or data.get("save_dir") != str(self.save_dir):
+            return # 스캔본이나 저장 위치가 바뀌었으면 처음부터
+        self.next_batch = data.get("next_batch", 0)
+        self.episode_count = data.get("episode_count", 0)
+        self.tail = data.get("tail", "")
+        self.last_batch_text = data.get("last_batch_text", "")
+
+    def _save_journal(self):
+        data = {
+            "signature": self.signature,
+            "save_dir": str(self.save_dir),
+            "next_batch": self.next_batch,
+            "episode_count": self.episode_count,
+            "tail": self.tail,
+            "last_batch_text": self.last_batch_text
+        }
+        tmp = self.journal_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, self.journal_path)
+
+    @property
+    def resumed(self):
+        return self.next_batch > 0
+
+    # ---------------- 스트리밍 ----------------
+    def _write_episode(self, marker, chunk):
+        self.episode_count += 1
+        fname = episode_filename(self.novel_title, self.episode_count, marker)
+        (self.save_dir / fname).write_text(chunk.strip(), encoding='utf-8')
+
+    def feed(self, batch_idx, text):
+        """배치 1개 반영 -> 완성된 회차 저장 -> 저널 갱신"""
+        if batch_idx < self.next_batch: return # 이미 처리한 배치
+        if text:
+            # 앞 배치 끝과 겹치는 문단 제거 (중복 회차 파일 방지)
+            stitched, dropped = text_stitch.stitch(self.last_batch_text, text)
+            self.stitched_lines += dropped
+            self.last_batch_text = text
+            if stitched.strip():
+                self.tail += stitched + "\n\n"
+
+        matches = list(SPLIT_PATTERN.finditer(self.tail))
+        for cur, nxt in zip(matches, matches[1:]):
+            self._write_episode(cur.group(), self.tail[cur.start():nxt.start()])
+        if matches:
+            # 첫 구분자 이전 잡텍스트는 버림 (기존 split_episodes와 동일)
+            self.tail = self.tail[matches[-1].start():]
+
+        self.next_batch = batch_idx + 1
+        self._save_journal()
+
+    def finish(self):
+        """마지막 회차 저장 후 저널 삭제. 저장된 파일 수 반환"""
+        match = SPLIT_PATTERN.match(self.tail)
+        if match:
+            self._write_episode(match.group(), self.tail)
+        elif self.tail.strip() and self.episode_count == 0:
+            # 구분자 없으면 통파일 1개 생성
+            (self.save_dir / f"{self.novel_title}_통합본.md").write_text(self.tail.strip(), encoding='utf-8')
+            self.episode_count = 1
+        self.tail = ""
+        self.journal_path.unlink(missing_ok=True)
+        return self.episode_count
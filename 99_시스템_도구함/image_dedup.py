@@ -0,0 +1,123 @@
+import os
+import json
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageChops
+
+import image_prep
+
+# =========================================================
+# 👯 [가공 팀] Image Dedup (Perceptual Hash)
+# 역할: 스캔 중복(같은 페이지 2번 캡처)을 OCR 전에 걸러냄
+# 방식: dHash로 후보 탐색 -> 축소 썸네일 픽셀 차이로 거르기 -> 본문 영역 고해상도 비교로 최종 확인
+#       (글자가 빽빽한 페이지는 32x32에서 서로 거의 같아 보이므로 썸네일만으로는 버리지 않음)
+# =========================================================
+
+HASH_SIZE = 16          # 16x16 = 256비트 (글자 화면은 8x8로는 구분이 안 됨)
+THUMB_SIZE = 32         # 1차 거르기용 썸네일 한 변 길이
+CONFIRM_WIDTH = 480     # 최종 확인용 폭 (글자 획이 구분되는 해상도)
+INK_DIFF = 48           # 이 이상 밝기가 다르면 '달라진 픽셀'
+
+# 판정 기준 (.env에서 조절)
+MAX_HASH_DISTANCE = int(os.getenv("DEDUP_MAX_HASH_DISTANCE", "6"))
+MAX_PIXEL_DIFF = float(os.getenv("DEDUP_MAX_PIXEL_DIFF", "3.0"))
+MAX_CONFIRM_DIFF = float(os.getenv("DEDUP_MAX_CONFIRM_DIFF", "0.002"))  # 고해상도 본문에서 달라진 픽셀 비율 상한
+COMPARE_WINDOW = int(os.getenv("DEDUP_COMPARE_WINDOW", "20"))  # 앞쪽 몇 장까지 비교할지 (스캔 겹침은 근처에서만 생김)
+DEDUP_WORKERS = int(os.getenv("DEDUP_WORKERS", str(os.cpu_count() or 2)))
+
+REPORT_NAME = "_dedup_report.json"
+
+def fingerprint(img_path):
+    """(dHash 정수, 썸네일 바이트) 반환. 열 수 없는 파일은 (None, None)"""
+    try:
+        with Image.open(img_path) as img:
+            gray = img.convert("L")
+            small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+            thumb = gray.resize((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS).tobytes()
+    except Exception:
+        return None, None
+
+    px = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        base = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (px[base + col] > px[base + col + 1])
+    return bits, thumb
+
+def _pixel_diff(a, b):
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+def _text_region(img_path):
+    """상태바/내비 바를 뺀 본문 영역을 CONFIRM_WIDTH 폭 흑백으로 (열 수 없으면 None)"""
+    try:
+        with Image.open(img_path) as img:
+            gray = img.convert("L")
+    except Exception:
+        return None
+    w, h = gray.size
+    if h > w * 1.3:     # 폰 캡처: 시계/배터리가 바뀌어도 같은 페이지로 보도록 잘라냄 (업로드 전처리와 같은 비율)
+        gray = gray.crop((0, int(h * image_prep.CROP_TOP_RATIO), w, h - int(h * image_prep.CROP_BOTTOM_RATIO)))
+    return gray.resize((CONFIRM_WIDTH, max(1, round(gray.height * CONFIRM_WIDTH / gray.width))), Image.BILINEAR)
+
+def changed_ratio(a, b):
+    """두 본문 이미지에서 글자 획 수준으로 달라진 픽셀 비율 (크기가 다르면 1.0)"""
+    if a is None or b is None or a.size != b.size: return 1.0
+    mask = ImageChops.difference(a, b).point(lambda v: 255 if v >= INK_DIFF else 0)
+    return mask.histogram()[255] / (a.width * a.height)
+
+def dedupe(image_paths, workers=None):
+    """
+    거의 같은 스크린샷을 묶어서 그룹당 첫 장만 남깁니다.
+
+    Returns:
+        (남길 이미지 목록, 리포트 dict)
+    """
+    image_paths = list(image_paths)
+    if len(image_paths) < 2:
+        return image_paths, {"total": len(image_paths), "unique": len(image_paths), "groups": []}
+
+    # 1. 지문 계산 (CPU 작업이라 프로세스 풀 - 데몬의 작업 스레드에서도 불리므로 spawn)
+    with ProcessPoolExecutor(max_workers=max(1, workers or DEDUP_WORKERS), mp_context=multiprocessing.get_context("spawn")) as pool:
+        prints = list(pool.map(fingerprint, image_paths, chunksize=8))
+
+    # 2. 가까운 이미지끼리만 비교해서 대표 이미지에 묶기 (후보만 고해상도로 다시 열어 확인)
+    owner = list(range(len(image_paths)))
+    groups = {}
+    regions = {}
+    def region(k):
+        if k not in regions: regions[k] = _text_region(image_paths[k])
+        return regions[k]
+
+    for i, (h_i, t_i) in enumerate(prints):
+        if h_i is None: continue
+        for j in range(max(0, i - COMPARE_WINDOW), i):
+            h_j, t_j = prints[j]
+            if h_j is None or owner[j] != j: continue
+            distance = bin(h_i ^ h_j).count("1")
+            if distance > MAX_HASH_DISTANCE: continue
+            if _pixel_diff(t_i, t_j) > MAX_PIXEL_DIFF: continue
+            changed = changed_ratio(region(i), region(j))
+            if changed > MAX_CONFIRM_DIFF: continue
+            owner[i] = j
+            groups.setdefault(j, []).append((i, distance, changed))
+            print(f"      👯 중복 제외: {Path(image_paths[i]).name} = {Path(image_paths[j]).name} (해시 거리 {distance}, 본문 차이 {changed:.2%})")
+            break
+
+    kept = [p for i, p in enumerate(image_paths) if owner[i] == i]
+    report = {
+        "total": len(image_paths),
+        "unique": len(kept),
+        "groups": [
+            {
+                "keep": Path(image_paths[rep]).name,
+                "dropped": [{"file": Path(image_paths[i]).name, "distance": d, "changed_ratio": round(c, 5)} for i, d, c in members]
+            }
+            for rep, members in sorted(groups.items())
+        ]
+    }
+    return kept, report
+
+def save_report(novel_dir, report):
+    (Path(novel_dir) / REPORT_NAME).write_text(json.dumps(report, indent=4, ensure_ascii=False), encoding='utf-8')
@@ -0,0 +1,111 @@
+import io
+import os
+import mimetypes
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+# =========================================================
+# 🗜️ [가공 팀] Image Prep (Upload Shrinker)
+# 역할: OCR 업로드 전에 폰 UI 잘라내기 -> 흑백 -> 축소 -> 재압축
+# 글자는 읽히는 선에서 업로드 바이트와 OCR 지연을 줄임
+# =========================================================
+
+# 잘라낼 비율 (.env에서 조절) - 상단 상태바 / 하단 내비게이션 바
+CROP_TOP_RATIO = float(os.getenv("PREP_CROP_TOP", "0.035"))
+CROP_BOTTOM_RATIO = float(os.getenv("PREP_CROP_BOTTOM", "0.05"))
+TARGET_WIDTH = int(os.getenv("PREP_TARGET_WIDTH", "900"))   # 이 폭이면 한글 본문이 충분히 읽힘
+PREP_WORKERS = int(os.getenv("PREP_WORKERS", str(os.cpu_count() or 2)))
+
+def settings_tag():
+    """업로드 이미지를 바꾸는 설정 묶음 (OCR 캐시 키에 포함 -> 설정을 바꾸면 예전 결과를 재사용하지 않음)"""
+    return f"L|png|crop={CROP_TOP_RATIO},{CROP_BOTTOM_RATIO}|w={TARGET_WIDTH}"
+
+_pool = None
+_pool_users = 0
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """
+    OCR 스레드들이 같이 쓰는 프로세스 풀 (처음 쓸 때 한 번만 생성)
+    OCR 스레드 안에서 만들어지므로 fork 대신 spawn (스레드가 돌고 있는 프로세스를 fork하면 락이 잠긴 채 복제될 수 있음)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, PREP_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown():
+    """풀을 닫음 (다음에 쓰면 새로 만듦)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+@contextmanager
+def session():
+    """
+    풀을 쓰는 작업 구간 (작품 1편 처리 등). 마지막 사용자가 나갈 때 풀을 닫음
+    -> 데몬에서 여러 작품이 동시에 돌아도 남이 쓰는 풀을 닫지 않음
+    """
+    global _pool, _pool_users
+    with _pool_lock: _pool_users += 1
+    try:
+        yield
+    finally:
+        with _pool_lock:
+            _pool_users -= 1
+            pool = None
+            if _pool_users == 0: pool, _pool = _pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+def shrink(img_path):
+    """
+    이미지 1장을 업로드용으로 줄입니다.
+
+    Returns:
+        (bytes, mime_type, 원본 크기, 결과 크기)
+    """
+    raw = Path(img_path).read_bytes()
+    raw_mime = mimetypes.guess_type(str(img_path))[0] or 'image/png'
+    try:
+        with Image.open(io.BytesIO(raw)) as img:
+            img = img.convert("L")
+            w, h = img.size
+
+            # 세로로 긴 폰 캡처일 때만 상태바/내비 바 제거
+            if h > w * 1.3:
+                img = img.crop((0, int(h * CROP_TOP_RATIO), w, h - int(h * CROP_BOTTOM_RATIO)))
+
+            if img.width > TARGET_WIDTH:
+                ratio = TARGET_WIDTH / img.width
+                img = img.resize((TARGET_WIDTH, int(img.height * ratio)), Image.LANCZOS)
+
+            buf = io.BytesIO()
+            img.save(buf, format="PNG", optimize=True)
+            data = buf.getvalue()
+    except Exception:
+        return raw, raw_mime, len(raw), len(raw) # 못 여는 파일은 원본 그대로
+
+    if len(data) >= len(raw):
+        return raw, raw_mime, len(raw), len(raw)
+    return data, 'image/png', len(raw), len(data)
+
+def prepare_batch(image_paths):
+    """
+    배치 이미지를 프로세스 풀에서 병렬로 줄입니다.
+
+    Returns:
+        (Gemini 업로드용 dict 목록, 원본 총 바이트, 결과 총 바이트)
+    """
+    results = list(_get_pool().map(shrink, image_paths))
+    payload = [{'mime_type': mime, 'data': data} for data, mime, _, _ in results]
+    before = sum(r[2] for r in results)
+    after = sum(r[3] for r in results)
+    return payload, before, after
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+# =========================================================
+# 🛰️ [가공 팀] Ingest Daemon (상시 대기 모드)
+# 역할: 99_실시간_작업방에 SCAN_COMPLETE 표식이 생기는 즉시 가공 대기열에 투입
+# 여러 작품을 동시에 처리하고, 대기열 길이/처리량을 계속 보고
+# 실패한 작품은 이미지 구성이 바뀌거나 대기 시간(지수 증가)이 지나면 다시 투입
+# 실행: python 99_시스템_도구함/ingest_daemon.py [작업자 수]
+# =========================================================
+
+TOOLS_DIR = Path(__file__).resolve().parent
+if str(TOOLS_DIR) not in sys.path: sys.path.append(str(TOOLS_DIR))
+
+import processor_pro
+import ocr_cache
+import image_prep
+
+MARKER_NAME = "SCAN_COMPLETE"
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+STATUS_INTERVAL = int(os.getenv("INGEST_STATUS_INTERVAL", "30"))   # 초
+EVICT_INTERVAL = 3600                                               # 캐시 정리 주기 (초)
+RETRY_BASE_SECONDS = int(os.getenv("INGEST_RETRY_SECONDS", "600"))  # 실패 후 첫 재시도까지 (이후 두 배씩)
+RETRY_MAX_SECONDS = 6 * 3600
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".zk"}                   # processor_pro 가 읽는 확장자
+STATUS_FILE = processor_pro.REALTIME_ROOT / "_ingest_status.json"
+
+def folder_snapshot(novel_dir):
+    """이미지 파일 구성 (개수, 총 크기, 최신 수정 시각) - 처리 중에 생기는 리포트/저널 파일은 제외"""
+    count = size = latest = 0
+    try:
+        for f in Path(novel_dir).iterdir():
+            if f.suffix.lower() not in IMAGE_SUFFIXES: continue
+            st = f.stat()
+            count += 1
+            size += st.st_size
+            latest = max(latest, st.st_mtime_ns)
+    except OSError:
+        return None
+    return (count, size, latest)
+
+class IngestQueue:
+    """중복 투입을 막는 작업 대기열 + 처리 통계"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._known = set()         # 대기 중이거나 처리 중인 폴더
+        self._failed = {}           # 실패한 폴더 -> {"snapshot", "retry_at", "attempts"}
+        self.in_progress = 0
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.time()
+
+    def put(self, novel_dir):
+        novel_dir = Path(novel_dir)
+        with self._lock:
+            if novel_dir in self._known: return False
+            self._known.add(novel_dir)
+        self._queue.put(novel_dir)
+        return True
+
+    def get(self, timeout=1.0):
+        novel_dir = self._queue.get(timeout=timeout)
+        with self._lock: self.in_progress += 1
+        return novel_dir
+
+    def finish(self, novel_dir, ok, seconds):
+        with self._lock:
+            self._known.discard(Path(novel_dir))
+            self.in_progress -= 1
+            self.busy_seconds += seconds
+            if ok:
+                self.done += 1
+                self._failed.pop(Path(novel_dir), None)
+            else:
+                self.failed += 1
+                attempts = self._failed.get(Path(novel_dir), {}).get("attempts", 0) + 1
+                self._failed[Path(novel_dir)] = {
+                    "snapshot": folder_snapshot(novel_dir),
+                    "retry_at": time.time() + min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1)),
+                    "attempts": attempts
+                }
+
+    def due_retries(self):
+        """다시 투입할 실패 폴더 (이미지가 바뀌었거나 대기 시간이 지남). 사라진/완료된 폴더는 기록에서 뺌"""
+        with self._lock: failed = list(self._failed.items())
+        due = []
+        for novel_dir, record in failed:
+            if not (novel_dir / MARKER_NAME).exists():
+                with self._lock: self._failed.pop(novel_dir, None)
+                continue
+            snapshot = folder_snapshot(novel_dir)
+            if snapshot != record["snapshot"]:
+                due.append((novel_dir, "파일 변경"))
+            elif time.time() >= record["retry_at"]:
+                due.append((novel_dir, f"{record['attempts']}회 실패 후 대기 종료"))
+        return due
+
+    def stats(self):
+        with self._lock:
+            elapsed_min = max((time.time() - self.started_at) / 60, 1e-9)
+            finished = self.done + self.failed
+            return {
+                "queue_depth": self._queue.qsize(),
+                "in_progress": self.in_progress,
+                "done": self.done,
+                "failed": self.failed,
+                "waiting_retry": len(self._failed),
+                "throughput_per_min": round(self.done / elapsed_min, 2),
+                "avg_seconds_per_novel": round(self.busy_seconds / finished, 1) if finished else None,
+                "uptime_min": round(elapsed_min, 1)
+            }
+
+class ScanCompleteHandler(FileSystemEventHandler):
+    """SCAN_COMPLETE 파일이 생기거나(이동되어) 들어오면 해당 폴더를 대기열에 넣음"""
+
+    def __init__(self, work_queue):
+        self.work_queue = work_queue
+
+    def _check(self, path):
+        path = Path(path)
+        if path.name != MARKER_NAME: return
+        novel_dir = path.parent
+        if novel_dir.name.startswith("_DONE_"): return # 처리 완료 후 이름 변경 이벤트
+        if self.work_queue.put(novel_dir):
+            print(f"⚡ [대기열] 실시간 스캔본: {novel_dir.name}")
+
+    def on_created(self, event):
+        if not event.is_directory: self._check(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory: self._check(event.dest_path)
+
+def worker_loop(work_queue, stop_event):
+    while not stop_event.is_set():
+        try:
+            novel_dir = work_queue.get()
+        except queue.Empty:
+            continue
+        start = time.time()
+        ok = False
+        try:
+            ok = processor_pro.process_novel(novel_dir)
+        except Exception as e:
+            print(f"🚨 [{novel_dir.name}] 처리 오류: {e}")
+        work_queue.finish(novel_dir, ok, time.time() - start)
+
+def write_status(stats):
+    try:
+        STATUS_FILE.write_text(json.dumps(stats, indent=4, ensure_ascii=False), encoding='utf-8')
+    except OSError: pass
+
+def run(workers=None):
+    workers = max(1, workers or INGEST_WORKERS)
+    root = processor_pro.REALTIME_ROOT
+    root.mkdir(parents=True, exist_ok=True)
+
+    work_queue = IngestQueue()
+    stop_event = threading.Event()
+
+    # 1. 데몬이 꺼져 있던 동안 끝난 스캔본부터 투입
+    for d in sorted(root.iterdir(), key=processor_pro.natural_sort_key):
+        if d.is_dir() and (d / MARKER_NAME).exists():
+            ScanCompleteHandler(work_queue)._check(d / MARKER_NAME)
+
+    # 2. 폴더 감시 시작
+    observer = Observer()
+    observer.schedule(ScanCompleteHandler(work_queue), str(root), recursive=True)
+    observer.start()
+
+    threads = [threading.Thread(target=worker_loop, args=(work_queue, stop_event), daemon=True) for _ in range(workers)]
+    for t in threads: t.start()
+
+    print(f"\n🛰️ [상시 대기] '{root.name}' 감시 중... (작업자 {workers}명, Ctrl+C 종료)")
+    last_evict = time.time()
+    try:
+        while True:
+            time.sleep(STATUS_INTERVAL)
+            stats = work_queue.stats()
+            write_status(stats)
+            print(f"📊 [상태] 대기 {stats['queue_depth']} | 처리 중 {stats['in_progress']} | 완료 {stats['done']} | 실패 {stats['failed']} | {stats['throughput_per_min']}편/분")
+            for novel_dir, why in work_queue.due_retries():
+                if work_queue.put(novel_dir):
+                    print(f"🔁 [재시도] {novel_dir.name} ({why})")
+            if time.time() - last_evict > EVICT_INTERVAL:
+                ocr_cache.evict()
+                last_evict = time.time()
+    except KeyboardInterrupt:
+        print("\n🛑 종료 요청. 처리 중인 작품까지만 마무리합니다...")
+    finally:
+        observer.stop()
+        observer.join()
+        stop_event.set()
+        for t in threads: t.join()
+        image_prep.shutdown()
+        write_status(work_queue.stats())
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else None)
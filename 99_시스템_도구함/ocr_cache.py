@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+import hashlib
+from pathlib import Path
+
+# =========================================================
+# 🗄️ [가공 팀] OCR Cache (Content-Addressed)
+# 역할: 이미지 바이트 해시 + 버전(프롬프트/모델/전처리 설정) -> OCR 결과 텍스트 보관
+# 같은 스캔본을 다시 돌려도 API 비용 없이 즉시 복원
+# 배치 경계도 이미지 해시로 정함 -> 몇 장이 추가/삭제돼도 그 근처 배치만 다시 OCR
+# 항목 파일: mtime = 만든 시각(기간 만료 기준), atime = 마지막 사용(용량 정리 기준)
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = PROJECT_ROOT / ".factory_cache" / "ocr"
+
+# 용량/기간 제한 (.env에서 조절)
+MAX_CACHE_MB = int(os.getenv("OCR_CACHE_MAX_MB", "512"))
+MAX_AGE_DAYS = int(os.getenv("OCR_CACHE_MAX_AGE_DAYS", "90"))
+
+def prompt_version(prompt, *settings):
+    """
+    프롬프트 내용이 바뀌면 캐시도 자동으로 갈라지도록 짧은 버전 태그를 만듭니다.
+    settings: 결과를 바꾸는 나머지 조건 (OCR 모델명, 전처리 설정 태그 등) - 하나라도 바뀌면 다른 버전
+    """
+    h = hashlib.sha256(prompt.encode('utf-8'))
+    for s in settings:
+        h.update(b"\0" + str(s).encode('utf-8'))
+    return h.hexdigest()[:12]
+
+_digests = {}   # (경로, 크기, 수정 시각) -> 해시 (배치 나누기와 키 계산에서 두 번 읽지 않도록)
+_digest_lock = threading.Lock()
+
+def image_digest(img_path):
+    path = Path(img_path)
+    st = path.stat()
+    memo = (str(path), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        hit = _digests.get(memo)
+    if hit: return hit
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _digest_lock: _digests[memo] = digest
+    return digest
+
+def content_batches(image_paths, batch_size):
+    """
+    이미지 해시로 배치 경계를 정합니다 (content-defined).
+    고정 10장씩 자르면 앞에서 1장만 추가/삭제돼도 뒤 배치가 전부 밀려 캐시가 깨지지만,
+    해시가 '경계 표식'인 이미지 뒤에서 자르면 바뀐 곳 근처 배치만 달라지고 나머지는 다시 같은 경계로 맞춰짐.
+    배치 크기는 batch_size // 2 이상, batch_size 이하.
+    """
+    min_size = max(1, batch_size // 2)
+    spread = max(1, batch_size - min_size)  # 최소 크기를 넘긴 뒤 이미지마다 1/spread 확률로 경계
+    batches, current = [], []
+    for p in image_paths:
+        current.append(p)
+        if len(current) >= batch_size or (len(current) >= min_size and int(image_digest(p)[:8], 16) % spread == 0):
+            batches.append(current)
+            current = []
+    if current: batches.append(current)
+    return batches
+
+def batch_key(image_paths, version):
+    """배치 키 = 프롬프트 버전 + 배치에 든 이미지 해시들 (순서 포함)"""
+    h = hashlib.sha256(version.encode('utf-8'))
+    for p in image_paths:
+        h.update(image_digest(p).encode('ascii'))
+    return h.hexdigest()
+
+def _entry_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.txt"
+
+def get(key):
+    """저장된 텍스트 반환 (없거나 만든 지 MAX_AGE_DAYS 가 지났으면 None)"""
+    path = _entry_path(key)
+    try:
+        st = path.stat()
+        if time.time() - st.st_mtime > MAX_AGE_DAYS * 86400:
+            path.unlink()
+            return None
+        text = path.read_text(encoding='utf-8')
+        os.utime(path, (time.time(), st.st_mtime)) # 최근 사용은 atime에만 (만든 시각 mtime은 그대로)
+        return text
+    except (FileNotFoundError, OSError):
+        return None
+
+def put(key, text):
+    if not text: return
+    path = _entry_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}_{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path) # 동시 쓰기에도 반쯤 쓰인 파일이 보이지 않도록
+
+def evict(max_mb=None, max_age_days=None):
+    """만든 지 기간이 지난 항목 삭제 후, 용량 초과분은 가장 오래 안 쓴 것(atime)부터 삭제합니다."""
+    if not CACHE_DIR.exists(): return 0
+    if max_mb is None: max_mb = MAX_CACHE_MB
+    if max_age_days is None: max_age_days = MAX_AGE_DAYS
+    max_bytes = max_mb * 1024 * 1024
+    cutoff = time.time() - max_age_days * 86400
+
+    entries = []
+    removed = 0
+    for f in CACHE_DIR.rglob("*.txt"):
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        if st.st_mtime < cutoff:
+            f.unlink(missing_ok=True)
+            removed += 1
+        else:
+            entries.append((st.st_atime, st.st_size, f))
+
+    total = sum(size for _, size, _ in entries)
+    entries.sort()
+    for _, size, f in entries:
+        if total <= max_bytes: break
+        f.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,90 @@
+import os
+import re
+import json
+import math
+from pathlib import Path
+from collections import Counter
+
+# =========================================================
+# 🔬 [가공 팀] OCR Quality Gate
+# 역할: 배치별 OCR 결과를 로컬에서 채점 (API 호출 없음)
+# 잘림/거절/영어 요약/같은 줄 반복 같은 불량 배치를 걸러냄
+# 재시도까지 불합격한 배치는 막지 않고 더 나은 쪽을 쓰되, 작품 폴더의 품질 리포트에 남김
+# =========================================================
+
+# 합격 기준 (.env에서 조절)
+MIN_HANGUL_RATIO = float(os.getenv("OCR_MIN_HANGUL_RATIO", "0.6"))     # 글자 중 한글 비율
+MIN_CHARS_PER_IMAGE = int(os.getenv("OCR_MIN_CHARS_PER_IMAGE", "80"))  # 이미지 1장당 최소 글자 수
+MIN_ENTROPY = float(os.getenv("OCR_MIN_ENTROPY", "5.0"))               # 글자 분포 엔트로피 (비트)
+SHORT_ENTROPY_FACTOR = 0.75     # 짧은 글은 최대 엔트로피(log2 글자 수)의 이 비율만 요구
+MAX_REPEAT_RATIO = float(os.getenv("OCR_MAX_REPEAT_RATIO", "0.3"))     # 중복 줄 비율
+
+HANGUL_RE = re.compile(r"[가-힣]")
+LATIN_RE = re.compile(r"[A-Za-z]")
+REFUSAL_RE = re.compile(r"(I'm sorry|I cannot|I can't|As an AI|죄송하지만|도와드릴 수 없|요약하면|Summary:)", re.IGNORECASE)
+
+REPORT_NAME = "_ocr_quality_report.json"
+
+def char_entropy(text):
+    chars = [c for c in text if not c.isspace()]
+    if not chars: return 0.0
+    total = len(chars)
+    return -sum(n / total * math.log2(n / total) for n in Counter(chars).values())
+
+def repeat_ratio(text):
+    """비어 있지 않은 줄 중 앞에서 이미 나온 줄의 비율"""
+    lines = [l.strip() for l in text.splitlines() if len(l.strip()) >= 5]
+    if not lines: return 0.0
+    return 1 - len(set(lines)) / len(lines)
+
+def score_batch(text, image_count):
+    """
+    Returns:
+        (합격 여부, 지표 dict, 불합격 사유 list)
+    """
+    text = text or ""
+    hangul = len(HANGUL_RE.findall(text))
+    latin = len(LATIN_RE.findall(text))
+    metrics = {
+        "chars": len(text.strip()),
+        "hangul_ratio": round(hangul / (hangul + latin), 3) if hangul + latin else 0.0,
+        "entropy": round(char_entropy(text), 2),
+        "repeat_ratio": round(repeat_ratio(text), 3)
+    }
+
+    # 마지막 한 장은 '〈 1권 끝 〉', '다음 화에 계속...' 같은 짧은 페이지일 수 있어 분량에서 뺌
+    min_chars = max(1, MIN_CHARS_PER_IMAGE * (image_count - 1))
+    # 글자 수가 n개면 엔트로피는 log2(n)을 넘을 수 없음 -> 짧은 배치는 기준을 그만큼 낮춤
+    nonspace = sum(1 for c in text if not c.isspace())
+    min_entropy = min(MIN_ENTROPY, SHORT_ENTROPY_FACTOR * math.log2(nonspace)) if nonspace else MIN_ENTROPY
+
+    reasons = []
+    if metrics["chars"] < min_chars:
+        reasons.append(f"분량 부족({metrics['chars']}자/{image_count}장)")
+    if metrics["hangul_ratio"] < MIN_HANGUL_RATIO:
+        reasons.append(f"한글 비율 낮음({metrics['hangul_ratio']})")
+    if metrics["entropy"] < min_entropy:
+        reasons.append(f"글자 다양성 낮음({metrics['entropy']})")
+    if metrics["repeat_ratio"] > MAX_REPEAT_RATIO:
+        reasons.append(f"같은 줄 반복({metrics['repeat_ratio']})")
+    if REFUSAL_RE.search(text[:300]):
+        reasons.append("거절/요약 응답")
+
+    return not reasons, metrics, reasons
+
+def better(a, b):
+    """(텍스트, 지표, 사유) 두 시도 중 나은 쪽 (사유가 적은 쪽, 같으면 더 긴 쪽)"""
+    return min(a, b, key=lambda r: (len(r[2]), -r[1]["chars"]))
+
+def save_report(novel_dir, flagged):
+    """
+    재시도 후에도 불합격한 배치를 작품 폴더에 기록 (이어하기 때는 예전 기록과 합침)
+    Args:
+        flagged: [{"first_image", "images", "reasons", "metrics"}, ...]
+    """
+    path = Path(novel_dir) / REPORT_NAME
+    try: entries = {e["first_image"]: e for e in json.loads(path.read_text(encoding='utf-8'))["flagged"]}
+    except Exception: entries = {}
+    if not flagged and not entries: return
+    for e in flagged: entries[e["first_image"]] = e
+    path.write_text(json.dumps({"flagged": list(entries.values())}, indent=4, ensure_ascii=False), encoding='utf-8')
@@ -1,12 +1,27 @@
 import os
 import re
+import sys
 import json
-import time
+import threading
 import warnings
+import multiprocessing
 from pathlib import Path
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# 같은 도구함의 보조 모듈 연결
+TOOLS_DIR = Path(__file__).resolve().parent
+if str(TOOLS_DIR) not in sys.path: sys.path.append(str(TOOLS_DIR))
+if str(TOOLS_DIR.parent) not in sys.path: sys.path.append(str(TOOLS_DIR.parent))
+
+import ocr_cache
+import image_dedup
+import episode_stream
+import image_prep
+import ocr_quality
+import llm_gateway
+import model_catalog
+
 # =========================================================
 # ⚙️ [가공 팀] Processor Pro (Pure OCR Edition)
 # 역할: 이미지 -> 텍스트 변환 -> 화수 분할 (분석 기능 제거됨)
@@ -21,35 +36,26 @@ if not API_KEY:
     print("❌ [오류] .env 파일에서 API 키를 찾을 수 없습니다.")
     exit()
 
-genai.configure(api_key=API_KEY)
-
 # ---------------------------------------------------------
 # 🤖 [엔진 자동 배차] 복잡한 모델명 고민 끝. 되는 거 알아서 잡음.
 # ---------------------------------------------------------
 def auto_select_model():
+    """주력 엔진과, 불량 배치 재시도용 예비 엔진(다른 계열)을 함께 고릅니다. (모델 카탈로그 파일 기준 - 네트워크 호출 없음)"""
     print("\n🔍 [시스템] 사용 가능한 AI 엔진을 탐색합니다...")
     try:
-        available_models = []
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                name = m.name.replace("models/", "")
-                available_models.append(name)
+        model_catalog.refresh_in_background("google", API_KEY)    # 오래됐으면 다음 실행부터 반영
+        available_models = [m.replace("models/", "") for m in model_catalog.text_models("google")]
+        if not available_models:
+            # 카탈로그가 아예 없을 때만 한 번 직접 받아옴
+            model_catalog.refresh("google", API_KEY)
+            available_models = [m.replace("models/", "") for m in model_catalog.text_models("google")]
         
         # 우선순위: Pro(고성능) > Flash(고속) > 아무거나
-        best_model = None
-        
-        # 1. Pro 계열 탐색 (정확도 최우선)
-        for m in available_models:
-            if 'pro' in m.lower() and 'vision' not in m.lower(): # vision 전용 제외
-                 best_model = m
-                 break
+        pro_model = next((m for m in available_models if 'pro' in m.lower() and 'vision' not in m.lower()), None) # vision 전용 제외
+        flash_model = next((m for m in available_models if 'flash' in m.lower()), None)
         
-        # 2. 없으면 Flash 계열
-        if not best_model:
-            for m in available_models:
-                if 'flash' in m.lower():
-                    best_model = m
-                    break
+        # 1. Pro 계열 탐색 (정확도 최우선) -> 2. 없으면 Flash 계열
+        best_model = pro_model or flash_model
                     
         # 3. 정 없으면 목록의 첫 번째
         if not best_model and available_models:
@@ -59,15 +65,21 @@ def auto_select_model():
              print("❌ [치명적 오류] 사용 가능한 모델이 없습니다.")
              exit()
 
-        print(f"   ✅ [엔진 확정] '{best_model}' 모델로 가동합니다.")
-        return genai.GenerativeModel(best_model)
+        # 재시도용: 주력과 다른 계열 (없으면 주력 재사용)
+        retry_model = os.getenv("OCR_RETRY_MODEL") or (flash_model if best_model == pro_model else pro_model) or best_model
+
+        print(f"   ✅ [엔진 확정] '{best_model}' 모델로 가동합니다. (재시도 엔진: '{retry_model}')")
+        return best_model, retry_model
 
     except Exception as e:
         print(f"❌ [치명적 오류] 모델 목록 조회 실패: {e}")
         exit()
 
-# 엔진 시동
-model = auto_select_model()
+# 엔진 시동 (전처리/중복검사 풀의 spawn 자식 프로세스는 이 모듈을 다시 import하므로 건너뜀)
+if multiprocessing.current_process().name == "MainProcess":
+    model, retry_model = auto_select_model()
+else:
+    model = retry_model = None
 BASE_DIR = Path.cwd()
 
 # 감시 경로 설정
@@ -79,47 +91,136 @@ def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower()
             for text in re.split('([0-9]+)', str(s))]
 
-def ocr_images(image_paths, novel_title):
-    full_text = ""
-    total_imgs = len(image_paths)
-    print(f"      📸 [OCR] 이미지 {total_imgs}장 변환 시작...")
-    
-    batch_size = 10
-    for i in range(0, total_imgs, batch_size):
-        batch = image_paths[i:i+batch_size]
-        
-        # [프롬프트] 오직 텍스트 추출에만 집중
-        prompt = """
-        이미지의 소설 내용을 텍스트로만 추출해.
-        [절대 규칙]
-        1. '< 001 : 제목 >' 같은 회차 구분자는 원본 그대로 유지할 것.
-        2. UI, 시간, 배터리 같은 잡다한 정보는 삭제할 것.
-        3. 분석하지 말고 있는 그대로 글자만 옮길 것.
-        """
-        
+# [프롬프트] 오직 텍스트 추출에만 집중
+OCR_PROMPT = """
+이미지의 소설 내용을 텍스트로만 추출해.
+[절대 규칙]
+1. '< 001 : 제목 >' 같은 회차 구분자는 원본 그대로 유지할 것.
+2. UI, 시간, 배터리 같은 잡다한 정보는 삭제할 것.
+3. 분석하지 말고 있는 그대로 글자만 옮길 것.
+"""
+
+# [재시도 프롬프트] 품질 검사에서 떨어진 배치 전용 (더 엄격하게)
+OCR_RETRY_PROMPT = """
+너는 OCR 기계다. 이미지 속 한국어 소설 본문을 한 글자도 빠짐없이 그대로 옮겨 적어라.
+[절대 규칙]
+1. 요약, 번역, 설명, 사과 문구를 절대 쓰지 말 것. 본문 글자만 출력.
+2. '< 001 : 제목 >' 같은 회차 구분자는 원본 그대로 유지할 것.
+3. 같은 문장을 반복해서 쓰지 말 것. 이미지에 있는 순서대로 한 번씩만.
+4. UI, 시간, 배터리 같은 잡다한 정보는 삭제할 것.
+"""
+
+# 동시 처리 설정 (API 쿼터에 맞춰 .env에서 조절)
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "10"))
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", "4"))
+# 캐시 버전 = 프롬프트 + 주력 OCR 모델 + 전처리 설정 (어느 하나가 바뀌어도 예전 텍스트를 재사용하지 않음)
+OCR_PROMPT_VERSION = ocr_cache.prompt_version(OCR_PROMPT, model, image_prep.settings_tag())
+_stats_lock = threading.Lock()
+
+def ocr_batch(batch, size_stats=None, prompt=None, engine=None):
+    """이미지 묶음 1개를 OCR합니다. (실패 시 예외를 그대로 올림)"""
+    # 업로드 전 전처리 (UI 잘라내기 + 흑백 + 축소)
+    img_objects, before, after = image_prep.prepare_batch(batch)
+    if size_stats is not None:
+        with _stats_lock:
+            size_stats["before"] += before
+            size_stats["after"] += after
+
+    # 타임아웃 넉넉하게
+    engine = engine or model
+    return llm_gateway.generate([prompt or OCR_PROMPT, *img_objects], engine, api_key=API_KEY, timeout=90)
+
+def _ocr_batch_cached(batch, key, size_stats=None, flagged=None):
+    text = ocr_batch(batch, size_stats)
+
+    # 품질 검사 -> 불합격이면 이 배치만 다른 프롬프트/엔진으로 재시도
+    ok, metrics, reasons = ocr_quality.score_batch(text, len(batch))
+    if not ok:
+        print(f"      🔬 품질 불합격({', '.join(reasons)}) -> 재시도: {Path(batch[0]).name} 외 {len(batch) - 1}장")
+        retry_failed = False
         try:
-            img_objects = []
-            for img_path in batch:
-                img_data = Path(img_path).read_bytes()
-                img_objects.append({'mime_type': 'image/png', 'data': img_data})
-            
-            # 타임아웃 넉넉하게
-            response = model.generate_content([prompt, *img_objects], request_options={'timeout': 90})
-            if response.text:
-                full_text += response.text + "\n\n"
-            
-            print(f"         ... {min(i+batch_size, total_imgs)}/{total_imgs} 완료")
-            time.sleep(1) # API 보호
-            
+            retry_text = ocr_batch(batch, size_stats, prompt=OCR_RETRY_PROMPT, engine=retry_model)
+            retry = (retry_text, *ocr_quality.score_batch(retry_text, len(batch))[1:])
+            text, metrics, reasons = ocr_quality.better((text, metrics, reasons), retry)
         except Exception as e:
-            print(f"      🚨 변환 실패(구간 {i}): {e}")
-            
-    return full_text
+            # 재시도 호출이 터져도 첫 결과는 버리지 않음 (캐시에는 안 넣어 다음 실행 때 다시 시도)
+            print(f"      ⚠️ 재시도 호출 실패 -> 첫 결과 사용: {e}")
+            retry_failed = True
+            reasons = reasons + [f"재시도 호출 실패({str(e)[:80]})"]
+        if reasons:
+            # 같은 프롬프트로 다시 돌려도 똑같이 떨어지므로 막지 않음 -> 나은 쪽을 쓰고 품질 리포트에 기록
+            print(f"      ⚠️ 재시도 후에도 불합격({', '.join(reasons)}) -> 나은 결과로 진행 (품질 리포트 기록): {Path(batch[0]).name}")
+            if flagged is not None:
+                with _stats_lock:
+                    flagged.append({"first_image": Path(batch[0]).name, "images": len(batch), "reasons": reasons, "metrics": metrics})
+
+        if retry_failed: return text
+
+    ocr_cache.put(key, text) # 워커 안에서 저장 -> 중간에 멈춰도 끝난 배치는 남음
+    return text
+
+def make_batches(image_paths):
+    # 고정 크기로 자르면 1장 추가/삭제에 뒤 배치 캐시가 전부 깨짐 -> 이미지 해시로 경계 결정
+    return ocr_cache.content_batches(sorted(image_paths, key=natural_sort_key), OCR_BATCH_SIZE)
+
+def iter_ocr_batches(batches, start_batch=0, max_workers=None, flagged=None):
+    """
+    배치 여러 개를 동시에 OCR하되, 결과는 배치 순서대로 하나씩 흘려보냅니다.
+    yield (배치 번호, 텍스트) - 실패한 배치는 텍스트가 None
+    flagged: 주면 재시도 후에도 품질 불합격인 배치 기록을 여기에 추가
+    """
+    max_workers = max(1, max_workers or OCR_MAX_WORKERS)
+    total_imgs = sum(len(b) for b in batches[start_batch:])
+
+    # 캐시 조회: 바뀌지 않은 배치는 API를 부르지 않음
+    ready = {}
+    pending = {}
+    for idx in range(start_batch, len(batches)):
+        key = ocr_cache.batch_key(batches[idx], OCR_PROMPT_VERSION)
+        cached = ocr_cache.get(key)
+        if cached is None: pending[idx] = key
+        else: ready[idx] = cached
+
+    print(f"      📸 [OCR] 이미지 {total_imgs}장 변환 시작... ({len(batches) - start_batch}개 배치, 캐시 적중 {len(ready)}개, 동시 {max_workers}개)")
+
+    next_idx = start_batch
+    done = 0
+    size_stats = {"before": 0, "after": 0}
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(_ocr_batch_cached, batches[idx], key, size_stats, flagged): idx for idx, key in pending.items()}
+
+        while next_idx in ready:
+            yield next_idx, ready.pop(next_idx)
+            next_idx += 1
+
+        for future in as_completed(futures):
+            idx = futures[future]
+            done += 1
+            try:
+                ready[idx] = future.result()
+                print(f"         ... 배치 {idx+1}/{len(batches)} 완료 (진행 {done}/{len(pending)})")
+            except Exception as e:
+                ready[idx] = None
+                print(f"      🚨 변환 실패(배치 {idx+1}, {Path(batches[idx][0]).name}부터): {e}")
+
+            while next_idx in ready:
+                yield next_idx, ready.pop(next_idx)
+                next_idx += 1
+    finally:
+        # 소비 측이 중단하면 아직 시작 안 한 배치는 취소 (진행 중인 배치는 캐시에 남김)
+        pool.shutdown(wait=True, cancel_futures=True)
+        if size_stats["before"]:
+            saved = 100 - size_stats["after"] * 100 / size_stats["before"]
+            print(f"      🗜️ 업로드 용량: {size_stats['before'] / 1048576:.1f}MB -> {size_stats['after'] / 1048576:.1f}MB ({saved:.0f}% 절감)")
+
+def ocr_images(image_paths, novel_title, max_workers=None):
+    """전체 이미지를 OCR해서 한 덩어리 텍스트로 반환합니다. (스트리밍이 필요 없을 때)"""
+    texts = [text for _, text in iter_ocr_batches(make_batches(image_paths), max_workers=max_workers) if text]
+    return "".join(text + "\n\n" for text in texts)
 
 def split_episodes(full_text, novel_title):
-    # <...>, [...] 패턴으로 회차 나누기
-    split_pattern = r"(?:<|\[)[^>\]]*(?:\d+|화|프롤로그|에필로그)[^>\]]*(?:>|\])"
-    matches = list(re.finditer(split_pattern, full_text))
+    matches = list(episode_stream.SPLIT_PATTERN.finditer(full_text))
     
     if not matches:
         # 구분자 없으면 통파일 1개 생성
@@ -131,15 +232,86 @@ def split_episodes(full_text, novel_title):
         end_idx = matches[i+1].start() if i + 1 < len(matches) else len(full_text)
         
         chunk = full_text[start_idx:end_idx].strip()
-        
-        # 파일명 생성 (특수문자 제거)
-        title_raw = matches[i].group().strip()
-        safe_title = re.sub(r'[\\/*?:"<>|\[\]]', "", title_raw).strip()
-        filename = f"{novel_title}_{i+1:03d}_{safe_title}.md"
+        filename = episode_stream.episode_filename(novel_title, i + 1, matches[i].group())
         results.append((filename, chunk))
         
     return results
 
+def process_novel(novel_dir):
+    """소설 폴더 1개 처리. 성공하면 True (중간 실패 시 저널을 남기고 False)"""
+    with image_prep.session(): # 끝나면(동시 처리 중인 작품이 없을 때) 전처리 프로세스 풀 정리
+        return _process_novel(novel_dir)
+
+def _process_novel(novel_dir):
+    print(f"\n📘 [작업 시작] {novel_dir.name}")
+    
+    images = []
+    for ext in ["*.png", "*.jpg", "*.jpeg", "*.ZK", "*.zk"]:
+        images.extend(list(novel_dir.glob(ext)))
+        images.extend(list(novel_dir.glob(ext.upper())))
+    images.sort(key=natural_sort_key)
+    
+    if not images:
+        print(f"      ⚠️ 폴더가 비어있습니다.")
+        return False
+    
+    # [변경] 장르 분석 API 제거 -> 스캐너가 준 파일 쓰거나 '수동' 처리
+    genre = "미분류_수동"
+    if (novel_dir / "genre.txt").exists():
+        genre = (novel_dir / "genre.txt").read_text(encoding='utf-8').strip()
+        # 번호표 제거 (01_재벌물 -> 재벌물)
+        genre = genre.split("_")[-1] if "_" in genre else genre
+    
+    print(f"      🏷️ 분류: {genre}")
+
+    # 0. 중복 스크린샷 제거 (같은 페이지 OCR 비용 이중 지불 방지)
+    images, dedup_report = image_dedup.dedupe(images)
+    image_dedup.save_report(novel_dir, dedup_report)
+    if dedup_report["groups"]:
+        print(f"      👯 중복 제거: {dedup_report['total']}장 -> {dedup_report['unique']}장")
+
+    save_dir = OUTPUT_ROOT / genre / novel_dir.name
+    save_dir.mkdir(parents=True, exist_ok=True)
+
+    # 메타 정보 껍데기 (나중에 채울 용도)
+    if not (save_dir / f"{novel_dir.name}_meta.json").exists():
+        (save_dir / f"{novel_dir.name}_meta.json").write_text(
+            json.dumps({"title": novel_dir.name, "genre": genre}, indent=4, ensure_ascii=False), encoding='utf-8'
+        )
+
+    # 1. OCR -> 2. 회차 감지 -> 3. 완성된 회차 즉시 저장 (배치마다 저널 기록)
+    batches = make_batches(images)
+    writer = episode_stream.EpisodeStreamWriter(novel_dir, save_dir, novel_dir.name, episode_stream.batch_signature(batches))
+    if writer.resumed:
+        print(f"      ⏯️ 이어하기: 배치 {writer.next_batch + 1}/{len(batches)}부터 (저장된 회차 {writer.episode_count}개)")
+
+    flagged = []
+    try:
+        for idx, text in iter_ocr_batches(batches, start_batch=writer.next_batch, flagged=flagged):
+            if text is None:
+                print(f"      ⏸️ 배치 {idx+1}에서 중단. 다시 실행하면 여기서부터 이어서 처리합니다.")
+                return False
+            writer.feed(idx, text)
+    finally:
+        ocr_quality.save_report(novel_dir, flagged)
+    if flagged:
+        print(f"      🔬 품질 경고 배치 {len(flagged)}개 -> {ocr_quality.REPORT_NAME} 확인")
+
+    count = writer.finish()
+    print(f"      💾 저장 완료 ({count}개 파일)")
+    if writer.stitched_lines:
+        print(f"      🪡 배치 경계 겹침 {writer.stitched_lines}줄 제거")
+
+    # 실시간 작업방 정리 (이름 변경)
+    if "99_실시간_작업방" in str(novel_dir):
+        try:
+            novel_dir.rename(novel_dir.parent / f"_DONE_{novel_dir.name}")
+            print("      🧹 작업 완료 태그 부착")
+        except: pass
+        
+    print("      ✅ 완료")
+    return True
+
 def process_novels():
     print("\n🏭 [공장 가동] 단순 가공 모드 (OCR -> MD)")
     
@@ -165,56 +337,11 @@ def process_novels():
         return
 
     for novel_dir in target_dirs:
-        print(f"\n📘 [작업 시작] {novel_dir.name}")
-        
-        images = []
-        for ext in ["*.png", "*.jpg", "*.jpeg", "*.ZK", "*.zk"]:
-            images.extend(list(novel_dir.glob(ext)))
-            images.extend(list(novel_dir.glob(ext.upper())))
-        images.sort(key=natural_sort_key)
-        
-        if not images:
-            print(f"      ⚠️ 폴더가 비어있습니다.")
-            continue
-        
-        # [변경] 장르 분석 API 제거 -> 스캐너가 준 파일 쓰거나 '수동' 처리
-        genre = "미분류_수동"
-        if (novel_dir / "genre.txt").exists():
-            genre = (novel_dir / "genre.txt").read_text(encoding='utf-8').strip()
-            # 번호표 제거 (01_재벌물 -> 재벌물)
-            genre = genre.split("_")[-1] if "_" in genre else genre
-        
-        print(f"      🏷️ 분류: {genre}")
-
-        # 1. OCR 실행
-        text = ocr_images(images, novel_dir.name)
-        if not text: continue
+        process_novel(novel_dir)
 
-        # 2. 쪼개기
-        episodes = split_episodes(text, novel_dir.name)
-        
-        # 3. 저장
-        save_dir = OUTPUT_ROOT / genre / novel_dir.name
-        save_dir.mkdir(parents=True, exist_ok=True)
-        
-        print(f"      💾 저장 중... ({len(episodes)}개 파일)")
-        for fname, content in episodes:
-            (save_dir / fname).write_text(content, encoding='utf-8')
-        
-        # 메타 정보 껍데기 (나중에 채울 용도)
-        if not (save_dir / f"{novel_dir.name}_meta.json").exists():
-            (save_dir / f"{novel_dir.name}_meta.json").write_text(
-                json.dumps({"title": novel_dir.name, "genre": genre}, indent=4, ensure_ascii=False), encoding='utf-8'
-            )
-
-        # 실시간 작업방 정리 (이름 변경)
-        if "99_실시간_작업방" in str(novel_dir):
-            try:
-                novel_dir.rename(novel_dir.parent / f"_DONE_{novel_dir.name}")
-                print("      🧹 작업 완료 태그 부착")
-            except: pass
-            
-        print("      ✅ 완료")
+    # 캐시 정리 (용량/기간 초과분)
+    removed = ocr_cache.evict()
+    if removed: print(f"\n🧹 OCR 캐시 정리: {removed}개 항목 삭제")
 
     print("\n🎉 모든 변환 작업 끝.")
 
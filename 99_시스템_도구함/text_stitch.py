@@ -0,0 +1,64 @@
+import re
+import hashlib
+
+# =========================================================
+# 🪡 [가공 팀] Text Stitcher (배치 경계 겹침 제거)
+# 역할: 스크롤 캡처가 겹쳐서 앞 배치 끝 문단이 다음 배치 앞에 또 나오면 잘라냄
+# 방식: 줄 단위 해시 -> KMP 접두사 함수로 '앞 배치 꼬리 = 다음 배치 머리' 최장 길이 탐색 (선형 시간)
+# =========================================================
+
+MIN_OVERLAP_CHARS = 20   # 이보다 짧은 겹침(구분선, 짧은 대사 한 줄)은 우연일 수 있어 무시
+
+_NORM_RE = re.compile(r"[\s\W_]+")
+_SEP = b"\x00SEP"
+
+def _normalize(line):
+    """공백/문장부호 차이(OCR 흔들림)는 무시하고 비교"""
+    return _NORM_RE.sub("", line)
+
+def _line_keys(lines):
+    """(정규화 후 내용이 있는 줄 번호 목록, 해시 목록, 글자 수 목록)"""
+    idxs, keys, sizes = [], [], []
+    for i, line in enumerate(lines):
+        norm = _normalize(line)
+        if not norm: continue
+        idxs.append(i)
+        keys.append(hashlib.blake2b(norm.encode('utf-8'), digest_size=8).digest())
+        sizes.append(len(norm))
+    return idxs, keys, sizes
+
+def _longest_border(pattern, text):
+    """pattern의 접두사이면서 text의 접미사인 최장 길이 (KMP 접두사 함수)"""
+    seq = pattern + [_SEP] + text
+    pi = [0] * len(seq)
+    for i in range(1, len(seq)):
+        k = pi[i - 1]
+        while k and seq[i] != seq[k]:
+            k = pi[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        pi[i] = k
+    return pi[-1]
+
+def stitch(prev_text, next_text):
+    """
+    다음 배치 앞부분에서 앞 배치 끝과 겹치는 줄을 제거합니다.
+
+    Returns:
+        (겹침을 뺀 다음 배치 텍스트, 제거한 줄 수)
+    """
+    if not prev_text or not next_text:
+        return next_text, 0
+
+    next_lines = next_text.split("\n")
+    _, prev_keys, _ = _line_keys(prev_text.split("\n"))
+    next_idxs, next_keys, next_sizes = _line_keys(next_lines)
+    if not prev_keys or not next_keys:
+        return next_text, 0
+
+    k = _longest_border(next_keys, prev_keys)
+    if k == 0 or sum(next_sizes[:k]) < MIN_OVERLAP_CHARS:
+        return next_text, 0
+
+    cut = next_idxs[k - 1] + 1
+    return "\n".join(next_lines[cut:]).lstrip("\n"), k
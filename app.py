@@ -72,7 +72,15 @@ with st.sidebar:
         st.info(f"🚀 **Active Engine**\n\n`{engine_name}`")
     except:
         st.warning("⚠️ Engine Error")
-        
+
+    # 응답 캐시 현황 (모든 워커 합산)
+    try:
+        import llm_cache
+        cs = llm_cache.stats()
+        st.caption(f"🗄️ LLM Cache: 적중 {cs['hits']} / 실패 {cs['misses']} ({cs['hit_rate']:.0%}) · {cs['entries']}건 {cs['mb']}MB")
+    except Exception:
+        pass
+
     st.divider()
     st.caption("v2026.3.1 (Stable Fix)")
 
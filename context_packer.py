@@ -0,0 +1,156 @@
+import os
+import re
+import math
+
+# =========================================================
+# 📦 [Context Packer] 토큰 예산 기반 컨텍스트 조립
+# 역할: 글자 수로 자르던 참고 자료([:5000], [:2000]...)를 모델별 토큰 예산에 맞춰 담기
+# 방식: 섹션별 토큰 추정 -> 우선순위 순으로 채우기 (같은 순위끼리는 공평 분배)
+#       넘치는 섹션은 문장 경계에서 자름 + 섹션별 사용량 리포트
+# =========================================================
+
+OUTPUT_RESERVE_TOKENS = int(os.getenv("CONTEXT_OUTPUT_RESERVE", "8192"))   # 답변용으로 남겨둘 토큰
+INPUT_SHARE = float(os.getenv("CONTEXT_INPUT_SHARE", "0.5"))              # 컨텍스트 창 중 입력 자료에 쓸 비율
+
+# 모델 이름 접두사 -> 컨텍스트 창 (토큰). 긴 접두사가 먼저 매칭되도록 정렬해서 사용
+MODEL_CONTEXT_TOKENS = {
+    "gemini-3": 1_000_000,
+    "gemini-2.5": 1_000_000,
+    "gemini-2.0": 1_000_000,
+    "gemini-1.5": 1_000_000,
+    "gemma": 128_000,
+    "gpt-5": 400_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4o": 128_000,
+    "o4": 200_000,
+    "o3": 200_000,
+    "o1": 200_000,
+    "claude": 200_000,
+}
+DEFAULT_CONTEXT_TOKENS = 128_000
+
+_CJK_RE = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ一-鿿぀-ヿ]")
+_SPACE_RE = re.compile(r"\s")
+# 문장 = 종결부호(+닫는 따옴표)까지, 또는 줄바꿈까지
+_SENTENCE_RE = re.compile(r".*?(?:[.!?。…]+[\"'”’」』)\]]*(?:\s+|$)|\n+|$)", re.S)
+
+# ---------------------------------------------------------
+# 🔢 [Estimate] 토큰 추정
+# ---------------------------------------------------------
+def estimate_tokens(text):
+    """한글/한자는 글자당 약 1토큰, 그 외 문자는 4글자당 1토큰으로 추정 (공백 제외)"""
+    if not text: return 0
+    cjk = len(_CJK_RE.findall(text))
+    other = len(text) - cjk - len(_SPACE_RE.findall(text))
+    return cjk + math.ceil(max(other, 0) / 4)
+
+def context_window(model_name):
+    name = (model_name or "").split("/")[-1].lower()
+    for prefix in sorted(MODEL_CONTEXT_TOKENS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MODEL_CONTEXT_TOKENS[prefix]
+    return DEFAULT_CONTEXT_TOKENS
+
+def budget_for(model_name, cap=None):
+    """모델 컨텍스트 창에서 답변 몫을 빼고, 작업별 상한(cap)과 비교해 작은 쪽"""
+    budget = int(context_window(model_name) * INPUT_SHARE) - OUTPUT_RESERVE_TOKENS
+    return max(0, min(budget, cap) if cap else budget)
+
+# ---------------------------------------------------------
+# ✂️ [Trim] 문장 경계 자르기
+# ---------------------------------------------------------
+def trim_to_tokens(text, max_tokens):
+    """max_tokens 안에 들어가는 만큼 문장 단위로 앞에서부터 담기"""
+    if max_tokens <= 0 or not text: return ""
+    if estimate_tokens(text) <= max_tokens: return text
+
+    out, used = [], 0
+    for m in _SENTENCE_RE.finditer(text):
+        sentence = m.group(0)
+        if not sentence: continue
+        cost = estimate_tokens(sentence)
+        if used + cost > max_tokens:
+            if not out:
+                # 첫 문장부터 넘치면 어절 단위로라도 담기
+                words = []
+                for word in re.split(r"(?<=\s)", sentence):
+                    cost = estimate_tokens(word)
+                    if used + cost > max_tokens: break
+                    words.append(word)
+                    used += cost
+                if not words:
+                    # 띄어쓰기 없는 덩어리 -> 글자 단위 (한글 1글자 ≒ 1토큰이라 max_tokens 글자면 안전)
+                    words = [sentence[:max_tokens]]
+                out.append("".join(words))
+            break
+        out.append(sentence)
+        used += cost
+    return "".join(out).rstrip()
+
+# ---------------------------------------------------------
+# 🧳 [Packer] 우선순위 섹션 담기
+# ---------------------------------------------------------
+class ContextPacker:
+    """
+    사용법:
+        packer = ContextPacker(budget_for(MODEL_NAME, cap=60000))
+        packer.add("rubric", rubric, priority=0, max_tokens=1500)
+        packer.add("ref:1화", text, priority=1)
+        packed = packer.pack()      # {이름: 잘린 텍스트}
+        print(packer.summary())
+
+    priority 숫자가 작을수록 먼저 담습니다. 같은 순위 섹션들은 남은 예산을 공평하게 나눠 갖고,
+    짧아서 다 못 쓴 몫은 같은 순위의 다른 섹션에 돌려줍니다.
+    """
+
+    def __init__(self, budget):
+        self.budget = int(budget)
+        self.sections = []
+        self.report = []
+
+    def add(self, name, text, priority=1, max_tokens=None):
+        self.sections.append({"name": name, "text": text or "", "priority": priority, "max_tokens": max_tokens})
+        return self
+
+    def pack(self):
+        remaining = self.budget
+        allot = {}
+        for priority in sorted({s["priority"] for s in self.sections}):
+            group = [s for s in self.sections if s["priority"] == priority]
+            need = {id(s): min(estimate_tokens(s["text"]), s["max_tokens"] if s["max_tokens"] is not None else math.inf) for s in group}
+            # 물 채우기: 필요량이 작은 섹션부터 몫을 확정하고 남는 예산은 나머지에게
+            pending = sorted(group, key=lambda s: need[id(s)])
+            while pending:
+                share = remaining // len(pending)
+                s = pending.pop(0)
+                allot[id(s)] = int(min(need[id(s)], share))
+                remaining -= allot[id(s)]
+
+        packed, self.report = {}, []
+        for s in self.sections:
+            tokens_in = estimate_tokens(s["text"])
+            text = trim_to_tokens(s["text"], allot[id(s)])
+            used = tokens_in if text == s["text"] else estimate_tokens(text)
+            packed[s["name"]] = text
+            self.report.append({
+                "name": s["name"], "priority": s["priority"],
+                "tokens_in": tokens_in, "tokens_used": used, "trimmed": used < tokens_in
+            })
+        return packed
+
+    def used_tokens(self):
+        return sum(r["tokens_used"] for r in self.report)
+
+    def summary(self, label="Context", max_items=8):
+        """한 줄 사용량 리포트 (섹션별 사용 토큰, 잘린 섹션은 원래 크기 표시, 빠진 섹션은 개수만)"""
+        total = self.used_tokens()
+        pct = total / self.budget * 100 if self.budget else 0
+        parts = []
+        included = [r for r in self.report if r["tokens_used"]]
+        for r in included[:max_items]:
+            if r["trimmed"]: parts.append(f"{r['name']} {r['tokens_used']:,}/{r['tokens_in']:,}✂")
+            else: parts.append(f"{r['name']} {r['tokens_used']:,}")
+        if len(included) > max_items: parts.append(f"외 {len(included) - max_items}개")
+        dropped = len(self.report) - len(included)
+        if dropped: parts.append(f"제외 {dropped}개")
+        return f"📦 [{label}] {total:,}/{self.budget:,} tok ({pct:.0f}%) | " + " · ".join(parts)
@@ -0,0 +1,236 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+# =========================================================
+# 📚 [Corpus Index] 성공작 아카이브 색인 (SQLite + FTS5)
+# 역할: 아카이브 전체를 매번 rglob/read 하지 않고, 색인 DB에서 바로 조회
+# 갱신: 파일 mtime/크기 비교 -> 바뀐 파일만 다시 읽고 해시 비교 (증분)
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+ARCHIVE_DIR = PROJECT_ROOT / "01_자료실_Raw_Data" / "00_성공작_아카이브"
+DB_PATH = PROJECT_ROOT / ".factory_cache" / "corpus_index.sqlite3"
+
+REFRESH_INTERVAL = int(os.getenv("CORPUS_REFRESH_INTERVAL", "30"))  # 초 (같은 프로세스 안에서 재스캔 최소 간격)
+
+_SEQ_RE = re.compile(r"_(\d{3,})_")
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS novels (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE,           -- 아카이브 기준 상대 경로
+    genre TEXT,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY,
+    novel_id INTEGER REFERENCES novels(id),
+    path TEXT UNIQUE,
+    name TEXT,
+    seq INTEGER,
+    mtime REAL,
+    size INTEGER,
+    sha1 TEXT,
+    chars INTEGER,
+    content TEXT
+);
+CREATE TABLE IF NOT EXISTS meta_files (
+    path TEXT PRIMARY KEY,
+    novel_id INTEGER REFERENCES novels(id),
+    mtime REAL,
+    size INTEGER,
+    content TEXT
+);
+CREATE TABLE IF NOT EXISTS index_meta (k TEXT PRIMARY KEY, v INTEGER);
+CREATE INDEX IF NOT EXISTS idx_episodes_novel ON episodes(novel_id, name);
+CREATE INDEX IF NOT EXISTS idx_meta_novel ON meta_files(novel_id);
+CREATE TRIGGER IF NOT EXISTS episodes_ai AFTER INSERT ON episodes BEGIN
+    INSERT INTO episodes_fts(rowid, name, content) VALUES (new.id, new.name, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS episodes_ad AFTER DELETE ON episodes BEGIN
+    INSERT INTO episodes_fts(episodes_fts, rowid, name, content) VALUES ('delete', old.id, old.name, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS episodes_au AFTER UPDATE OF name, content ON episodes BEGIN
+    INSERT INTO episodes_fts(episodes_fts, rowid, name, content) VALUES ('delete', old.id, old.name, old.content);
+    INSERT INTO episodes_fts(rowid, name, content) VALUES (new.id, new.name, new.content);
+END;
+"""
+
+def _connect():
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL") # Streamlit 여러 세션이 동시에 읽어도 안전
+    conn.execute("PRAGMA busy_timeout=30000")
+    # 한국어는 띄어쓰기 단위 토큰이 안 맞음 -> trigram 우선, 미지원 SQLite면 unicode61
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS episodes_fts USING fts5(name, content, content='episodes', content_rowid='id', tokenize='trigram')")
+    except sqlite3.OperationalError:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS episodes_fts USING fts5(name, content, content='episodes', content_rowid='id')")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _rel(path):
+    return Path(path).resolve().relative_to(ARCHIVE_DIR.resolve()).as_posix()
+
+def _novel_id(conn, rel_dir):
+    row = conn.execute("SELECT id FROM novels WHERE path=?", (rel_dir,)).fetchone()
+    if row: return row["id"]
+    parts = rel_dir.split("/")
+    genre = parts[0] if len(parts) > 1 else ""
+    return conn.execute("INSERT INTO novels(path, genre, title) VALUES (?,?,?)", (rel_dir, genre, parts[-1])).lastrowid
+
+# ---------------------------------------------------------
+# 🔄 [Refresh] 증분 갱신
+# ---------------------------------------------------------
+def refresh(force=False):
+    """
+    아카이브 변경분만 색인에 반영합니다.
+
+    Returns:
+        dict: added / updated / removed 개수 (건너뛰면 None)
+    """
+    global _last_refresh
+    with _refresh_lock:
+        if not force and time.time() - _last_refresh < REFRESH_INTERVAL:
+            return None
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        if not ARCHIVE_DIR.exists():
+            _last_refresh = time.time()
+            return stats
+
+        conn = _connect()
+        try:
+            with conn:
+                known_eps = {r["path"]: (r["mtime"], r["size"], r["sha1"]) for r in conn.execute("SELECT path, mtime, size, sha1 FROM episodes")}
+                known_meta = {r["path"]: (r["mtime"], r["size"]) for r in conn.execute("SELECT path, mtime, size FROM meta_files")}
+                seen_eps, seen_meta = set(), set()
+
+                for root, _, files in os.walk(ARCHIVE_DIR):
+                    md_files = [f for f in files if f.endswith(".md")]
+                    if not md_files or Path(root) == ARCHIVE_DIR: continue
+                    rel_dir = _rel(root)
+                    novel_id = None
+
+                    for fname in md_files:
+                        full = Path(root) / fname
+                        rel = f"{rel_dir}/{fname}"
+                        seen_eps.add(rel)
+                        st = full.stat()
+                        old = known_eps.get(rel)
+                        if old and old[0] == st.st_mtime and old[1] == st.st_size: continue
+
+                        try: content = full.read_text(encoding='utf-8')
+                        except Exception: continue
+                        sha1 = hashlib.sha1(content.encode('utf-8')).hexdigest()
+                        if old and old[2] == sha1:
+                            # 내용은 그대로 (touch/복사) -> 메타만 갱신
+                            conn.execute("UPDATE episodes SET mtime=?, size=? WHERE path=?", (st.st_mtime, st.st_size, rel))
+                            continue
+
+                        novel_id = novel_id or _novel_id(conn, rel_dir)
+                        seq_match = _SEQ_RE.search(fname)
+                        row = (novel_id, fname, int(seq_match.group(1)) if seq_match else None, st.st_mtime, st.st_size, sha1, len(content), content, rel)
+                        if old:
+                            conn.execute("UPDATE episodes SET novel_id=?, name=?, seq=?, mtime=?, size=?, sha1=?, chars=?, content=? WHERE path=?", row)
+                            stats["updated"] += 1
+                        else:
+                            conn.execute("INSERT INTO episodes(novel_id, name, seq, mtime, size, sha1, chars, content, path) VALUES (?,?,?,?,?,?,?,?,?)", row)
+                            stats["added"] += 1
+
+                    # 작품 메타/반응 JSON (분석관이 메타 정보로 씀)
+                    for fname in files:
+                        if not fname.endswith(".json"): continue
+                        full = Path(root) / fname
+                        rel = f"{rel_dir}/{fname}"
+                        seen_meta.add(rel)
+                        st = full.stat()
+                        if known_meta.get(rel) == (st.st_mtime, st.st_size): continue
+                        try: content = full.read_text(encoding='utf-8')
+                        except Exception: content = ""
+                        novel_id = novel_id or _novel_id(conn, rel_dir)
+                        conn.execute("INSERT OR REPLACE INTO meta_files(path, novel_id, mtime, size, content) VALUES (?,?,?,?,?)", (rel, novel_id, st.st_mtime, st.st_size, content))
+
+                for rel in set(known_eps) - seen_eps:
+                    conn.execute("DELETE FROM episodes WHERE path=?", (rel,))
+                    stats["removed"] += 1
+                for rel in set(known_meta) - seen_meta:
+                    conn.execute("DELETE FROM meta_files WHERE path=?", (rel,))
+                if any(stats.values()):
+                    # 내용이 바뀔 때마다 세대 번호 증가 -> 검색기들이 재구축 여부를 싸게 판단
+                    conn.execute("INSERT INTO index_meta(k, v) VALUES ('generation', 1) ON CONFLICT(k) DO UPDATE SET v = v + 1")
+                conn.execute("DELETE FROM novels WHERE id NOT IN (SELECT novel_id FROM episodes) AND id NOT IN (SELECT novel_id FROM meta_files)")
+        finally:
+            conn.close()
+
+        _last_refresh = time.time()
+        return stats
+
+# ---------------------------------------------------------
+# 🔎 [Query] 조회 API
+# ---------------------------------------------------------
+def _query(sql, params=()):
+    refresh()
+    conn = _connect()
+    try:
+        return [dict(r) for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+def list_novels():
+    """회차(.md)가 있는 작품 목록 (path는 절대 경로)"""
+    rows = _query("SELECT n.id, n.path, n.genre, n.title, COUNT(e.id) AS episodes FROM novels n JOIN episodes e ON e.novel_id = n.id GROUP BY n.id ORDER BY n.path")
+    for r in rows: r["path"] = ARCHIVE_DIR / r["path"]
+    return rows
+
+def sample_episodes(k=3):
+    return _query("SELECT path, name, content FROM episodes ORDER BY random() LIMIT ?", (k,))
+
+def novel_episodes(folder_path):
+    """작품 폴더의 회차를 파일명 순으로 반환"""
+    return _query(
+        "SELECT e.name, e.content FROM episodes e JOIN novels n ON e.novel_id = n.id WHERE n.path=? ORDER BY e.name",
+        (_rel(folder_path),)
+    )
+
+def novel_meta_text(folder_path):
+    """작품 폴더의 JSON 파일 내용을 이어붙여 반환"""
+    rows = _query(
+        "SELECT m.content FROM meta_files m JOIN novels n ON m.novel_id = n.id WHERE n.path=? ORDER BY m.path",
+        (_rel(folder_path),)
+    )
+    return "".join(r["content"] for r in rows)
+
+def search(query, limit=10):
+    """전문 검색 (관련도 순). 3글자 미만 질의는 LIKE로 대체"""
+    query = query.strip()
+    if not query: return []
+    if len(query) < 3:
+        return _query("SELECT path, name, substr(content, 1, 300) AS snippet FROM episodes WHERE content LIKE ? LIMIT ?", (f"%{query}%", limit))
+    fts_query = '"' + query.replace('"', '""') + '"'
+    return _query(
+        "SELECT e.path, e.name, snippet(episodes_fts, 1, '[', ']', '…', 20) AS snippet "
+        "FROM episodes_fts JOIN episodes e ON e.id = episodes_fts.rowid WHERE episodes_fts MATCH ? ORDER BY rank LIMIT ?",
+        (fts_query, limit)
+    )
+
+def signature():
+    """색인 내용이 바뀌었는지 판단하는 짧은 지문 (검색기 재구축 여부 판단용)"""
+    row = _query("SELECT (SELECT COUNT(*) FROM episodes) AS n, (SELECT v FROM index_meta WHERE k='generation') AS gen")[0]
+    return f"{row['gen'] or 0}:{row['n']}"
+
+def iter_episodes():
+    """색인된 모든 회차 (검색기/표절 스캐너 구축용)"""
+    return _query("SELECT e.id, e.path, e.name, e.sha1, e.content, n.genre, n.title FROM episodes e JOIN novels n ON e.novel_id = n.id ORDER BY e.path")
+
+if __name__ == "__main__":
+    print(f"📚 [Corpus Index] 갱신: {refresh(force=True)}")
+    for n in list_novels():
+        print(f" - [{n['genre']}] {n['title']} ({n['episodes']}화)")
@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+# =========================================================
+# 🗄️ LLM Response Cache (디스크 영구 캐시)
+# 역할: (제공자, 모델, 정규화 프롬프트, 시스템 프롬프트, 온도, 옵션) -> 응답 텍스트 보관
+#       안 바뀐 비급/작품/기획안을 다시 돌려도 API 비용 없이 즉시 복원
+# 저장: .factory_cache/llm_cache.sqlite3 (WAL - Streamlit 워커 여러 개가 같이 써도 안전)
+# 정리: 항목별 TTL + 용량 초과 시 가장 오래 안 쓴 것부터 삭제 (LRU)
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DB_PATH = PROJECT_ROOT / ".factory_cache" / "llm_cache.sqlite3"
+
+# 용량/기간 제한 (.env에서 조절)
+MAX_CACHE_MB = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+DEFAULT_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"     # 1이면 읽기/쓰기 모두 건너뜀 (전역 우회)
+EVICT_EVERY = 50    # 저장 N번마다 용량 검사
+
+_WS_RE = re.compile(r"[ \t]+")
+_local = threading.local()
+_puts = 0
+
+def normalize(text):
+    """줄 끝 공백/연속 공백/빈 줄 차이는 같은 프롬프트로 취급"""
+    lines = [_WS_RE.sub(" ", line).strip() for line in str(text or "").strip().splitlines()]
+    return "\n".join(line for line in lines if line)
+
+def make_key(provider, model, prompt, system=None, temperature=None, options=None):
+    payload = json.dumps([provider, model.replace("models/", ""), normalize(prompt), normalize(system),
+                          temperature, options or {}], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# ---------------------------------------------------------
+# 💾 [Store] SQLite (스레드별 연결, 프로세스 간은 WAL + busy timeout)
+# ---------------------------------------------------------
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            provider TEXT,
+            model TEXT,
+            response TEXT,
+            size INTEGER,
+            created REAL,
+            expires REAL,
+            accessed REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed);
+        CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER DEFAULT 0);
+        """)
+        _local.conn = conn
+    return conn
+
+def _bump(conn, name):
+    conn.execute("INSERT INTO counters(name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+def get(key):
+    """저장된 응답 반환 (없거나 만료되면 None). 적중/실패 횟수는 모든 프로세스 합산으로 기록"""
+    if BYPASS: return None
+    try:
+        conn = _connect()
+        now = time.time()
+        row = conn.execute("SELECT response, expires FROM responses WHERE key=?", (key,)).fetchone()
+        if row and row[1] < now:
+            conn.execute("DELETE FROM responses WHERE key=?", (key,))
+            row = None
+        if row:
+            conn.execute("UPDATE responses SET accessed=? WHERE key=?", (now, key))    # 최근 사용 표시 (LRU)
+        _bump(conn, "hits" if row else "misses")
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"⚠️ [LLM Cache] 읽기 실패: {e}")
+        return None
+
+def put(key, response, provider="", model="", ttl_days=None):
+    global _puts
+    if BYPASS or not response: return
+    now = time.time()
+    ttl = DEFAULT_TTL_DAYS if ttl_days is None else ttl_days
+    try:
+        conn = _connect()
+        conn.execute("INSERT OR REPLACE INTO responses(key, provider, model, response, size, created, expires, accessed) VALUES (?,?,?,?,?,?,?,?)",
+                     (key, provider, model, response, len(response.encode('utf-8')), now, now + ttl * 86400, now))
+        _puts += 1
+        if _puts % EVICT_EVERY == 0: evict()
+    except sqlite3.Error as e:
+        print(f"⚠️ [LLM Cache] 저장 실패: {e}")
+
+def evict(max_mb=None):
+    """만료 항목 삭제 후, 용량 초과분은 가장 오래 안 쓴 것부터 삭제합니다."""
+    max_bytes = (MAX_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        removed = conn.execute("DELETE FROM responses WHERE expires < ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > max_bytes:
+            # 누적 크기가 초과분을 넘는 지점까지 오래된 순으로 삭제
+            over, cut = total - max_bytes, None
+            for accessed, size in conn.execute("SELECT accessed, size FROM responses ORDER BY accessed"):
+                over -= size
+                cut = accessed
+                if over <= 0: break
+            removed += conn.execute("DELETE FROM responses WHERE accessed <= ?", (cut,)).rowcount
+        conn.execute("COMMIT")
+        return removed
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def stats():
+    """hits / misses / hit_rate / entries / mb (모든 워커 프로세스 합산)"""
+    conn = _connect()
+    counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+    hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "entries": entries, "mb": round(size / 1024 / 1024, 2)}
+
+def clear():
+    conn = _connect()
+    conn.execute("DELETE FROM responses")
+    conn.execute("DELETE FROM counters")
+
+if __name__ == "__main__":
+    print(f"🗄️ [LLM Cache] 정리 {evict()}건 / {stats()}")
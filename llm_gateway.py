@@ -0,0 +1,317 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+import llm_cache
+import rate_limiter
+from context_packer import estimate_tokens
+
+try:
+    import httpx
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+# 키별 Gemini 채널은 SDK 내부 API(_ClientManager / GenerativeModel._client)에 기대므로
+# requirements.txt 에서 google-generativeai 버전을 고정함. 업그레이드로 사라지면 공개 API(genai.configure)로 후퇴
+try:
+    from google.generativeai.client import _ClientManager
+    _PER_KEY_GEMINI = hasattr(genai.GenerativeModel("gemini-pro"), "_client")
+except Exception:
+    _ClientManager = None
+    _PER_KEY_GEMINI = False
+
+# =========================================================
+# 🔌 LLM Gateway (공용 접속 창구)
+# 역할: 모듈마다 genai.configure / OpenAI() 를 따로 하던 것을 한 곳으로
+#       제공자 + 키별로 장수(長壽) 클라이언트를 하나씩만 만들어 재사용 (커넥션 풀 / keep-alive)
+#       타임아웃과 HTTP 연결 설정은 이 파일에서만 정함
+# 사용: llm_gateway.generate(prompt, model="gpt-5.2", system="...", temperature=0.2)
+#       결정적인 호출은 cache=True -> 같은 입력이면 디스크 캐시(llm_cache)에서 바로 반환
+#       모든 호출은 키별 RPM/TPM 버킷(rate_limiter)을 거침 -> 호출부에 sleep 불필요
+# =========================================================
+
+load_dotenv()
+
+TIMEOUT = float(os.getenv("LLM_TIMEOUT", "180"))                 # 초 (응답 대기 상한)
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))     # 키 하나당 동시 연결 상한
+KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "120"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "4"))   # 429 받았을 때 재시도 횟수
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "2000"))   # TPM 예약용 응답 길이 추정
+IMAGE_TOKENS = 260      # 이미지 1장 입력 토큰 추정 (Gemini 기준)
+
+class Cancelled(Exception):
+    """cancel 이벤트로 중단된 호출 (응답은 버리고 캐시에도 남기지 않음)"""
+
+_lock = threading.Lock()
+_local = threading.local()  # 스레드별 마지막 generate 가 캐시 적중이었는지
+_openai_clients = {}    # 키 -> OpenAI
+_gemini_managers = {}   # 키 -> genai 클라이언트 매니저 (키별 gRPC 채널)
+_gemini_models = {}     # (키, 모델, 시스템 프롬프트) -> GenerativeModel
+_global_gemini_key = None   # 후퇴 모드에서 genai.configure 에 마지막으로 넣은 키
+
+# ---------------------------------------------------------
+# 🔑 [Keys] 제공자 판별 + 기본 키
+# ---------------------------------------------------------
+def provider_of(model):
+    """'gpt-5.2' / 'o3' -> openai, 'gemini-3-pro' / 'models/...' -> google"""
+    name = model.lower().replace("models/", "")
+    if name.startswith(("gpt", "o1", "o3", "o4", "chatgpt")): return "openai"
+    return "google"
+
+def default_key(provider):
+    if provider == "openai": return os.getenv("OPENAI_API_KEY")
+    return os.getenv("GEMINI_KEY_PLANNING") or os.getenv("GEMINI_API_KEY")
+
+# 다른 제공자 키 판별용 (키 형식 접두사 + .env 에 든 키 이름)
+_KEY_PREFIXES = {"openai": "sk-", "google": "AIza"}
+_KEY_ENVS = {
+    "openai": ("OPENAI_API_KEY",),
+    "google": ("GEMINI_KEY_PLANNING", "GEMINI_API_KEY", "GEMINI_KEY_WRITER", "GEMINI_KEY_WRITING"),
+}
+
+def key_for(provider, api_key=None):
+    """
+    이 제공자에 보낼 키. 호출부가 준 키가 다른 제공자 것이면 버리고 기본 키 사용
+    (Gemini 키를 든 모듈이 모델 배차로 o3 / gpt-5.2 를 받아도 OpenAI에 Gemini 키가 가지 않도록)
+    """
+    if api_key:
+        for other, envs in _KEY_ENVS.items():
+            if other == provider: continue
+            if api_key.startswith(_KEY_PREFIXES[other]) or api_key in (os.getenv(e) for e in envs):
+                return default_key(provider)
+    return api_key or default_key(provider)
+
+# ---------------------------------------------------------
+# 🏊 [Pool] 제공자 + 키별 클라이언트 (한 번 만들고 계속 재사용)
+# ---------------------------------------------------------
+def openai_client(api_key=None):
+    if OpenAI is None: raise RuntimeError("openai 패키지가 설치되어 있지 않습니다.")
+    api_key = key_for("openai", api_key)
+    if not api_key: raise RuntimeError("OPENAI_API_KEY 가 없습니다.")
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            http = httpx.Client(
+                timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS,
+                                    keepalive_expiry=KEEPALIVE_SECONDS),
+            )
+            client = OpenAI(api_key=api_key, http_client=http, timeout=TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
+            _openai_clients[api_key] = client
+        return client
+
+def _gemini_manager(api_key):
+    """genai.configure 는 프로세스 전역이라 키가 섞이므로, 키마다 별도 매니저(= 별도 채널)를 둠"""
+    if genai is None: raise RuntimeError("google-generativeai 패키지가 설치되어 있지 않습니다.")
+    api_key = key_for("google", api_key)
+    if not api_key: raise RuntimeError("GEMINI API 키가 없습니다.")
+    manager = _gemini_managers.get(api_key)
+    if manager is None:
+        manager = _ClientManager()
+        manager.configure(api_key=api_key)
+        _gemini_managers[api_key] = manager
+    return manager
+
+def _configure_global(api_key):
+    """후퇴 모드: 공개 API genai.configure (프로세스 전역 - 키가 바뀌면 이후 호출 전체가 새 키를 씀)"""
+    global _global_gemini_key
+    if genai is None: raise RuntimeError("google-generativeai 패키지가 설치되어 있지 않습니다.")
+    api_key = key_for("google", api_key)
+    if not api_key: raise RuntimeError("GEMINI API 키가 없습니다.")
+    if api_key == _global_gemini_key: return
+    if _global_gemini_key is not None:
+        print("⚠️ [Gateway] 이 SDK 버전은 키별 Gemini 채널을 지원하지 않아 전역 키를 전환합니다. (requirements.txt 버전 확인)")
+    genai.configure(api_key=api_key)
+    _global_gemini_key = api_key
+
+def gemini_model(model, system=None, api_key=None):
+    """키별 채널을 공유하는 GenerativeModel (모델 + 시스템 프롬프트 조합마다 1개)"""
+    api_key = key_for("google", api_key)
+    key = (api_key, model, system or "")
+    with _lock:
+        instance = _gemini_models.get(key)
+        if instance is None:
+            if _PER_KEY_GEMINI:
+                instance = genai.GenerativeModel(model, system_instruction=system or None)
+                instance._client = _gemini_manager(api_key).get_default_client("generative")
+            else:
+                _configure_global(api_key)
+                instance = genai.GenerativeModel(model, system_instruction=system or None)
+            _gemini_models[key] = instance
+        return instance
+
+# ---------------------------------------------------------
+# 🚀 [Generate] 단일 호출 API
+# ---------------------------------------------------------
+def generate(prompt, model, system=None, temperature=None, api_key=None, timeout=None,
+             cache=False, ttl_days=None, validate=None, cancel=None, **options):
+    """
+    Args:
+        prompt: 사용자 메시지 (Gemini는 [텍스트, 이미지...] 목록도 가능)
+        model: 모델명 - 이름으로 제공자 자동 판별
+        system: 시스템 프롬프트
+        cache: True면 디스크 캐시 사용 (텍스트 프롬프트만, LLM_CACHE_BYPASS=1 이면 전역 우회)
+        ttl_days: 캐시 유효 기간 (기본 LLM_CACHE_TTL_DAYS)
+        validate: 응답 검사 함수 - False를 돌려주면 캐시에 저장하지 않음 (JSON 깨진 응답 등)
+        cancel: threading.Event - 주면 스트리밍으로 받다가 set() 되는 즉시 연결을 끊고 Cancelled 예외
+        options: 제공자별 추가 옵션 (OpenAI: response_format 등 / Gemini: generation_config 항목)
+    Returns:
+        str: 응답 본문 (실패 시 예외를 그대로 올림)
+    """
+    provider = provider_of(model)
+    key = None
+    _local.cache_hit = False
+    if cache and isinstance(prompt, str):
+        key = llm_cache.make_key(provider, model, prompt, system, temperature, options)
+        hit = llm_cache.get(key)
+        if hit is not None:
+            _local.cache_hit = True
+            return hit
+
+    if cancel is not None:
+        text = "".join(generate_stream(prompt, model, system, temperature, api_key, timeout, cancel=cancel, **options)).strip()
+        if cancel.is_set(): raise Cancelled(model)
+    else:
+        text = _limited_call(provider, prompt, model, system, temperature, api_key, timeout or TIMEOUT, options)
+    if key and (validate is None or validate(text)):
+        llm_cache.put(key, text, provider, model, ttl_days)
+    return text
+
+def served_from_cache():
+    """이 스레드의 마지막 generate 호출이 디스크 캐시에서 나왔으면 True (응답 시간 통계에서 빼는 용도)"""
+    return getattr(_local, "cache_hit", False)
+
+def _estimate(prompt, system):
+    parts = prompt if isinstance(prompt, list) else [prompt]
+    return (sum(estimate_tokens(p) if isinstance(p, str) else IMAGE_TOKENS for p in parts)
+            + estimate_tokens(system or "") + EXPECTED_OUTPUT_TOKENS)
+
+def _limited_call(provider, prompt, model, system, temperature, api_key, timeout, options):
+    """키별 쿼터만큼만 기다렸다가 호출, 429면 키 전체를 Retry-After 동안 멈추고 재시도"""
+    api_key = key_for(provider, api_key)
+    limiter = rate_limiter.get(provider, api_key)
+    est = _estimate(prompt, system)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        limiter.acquire(est)
+        try:
+            text, used = _call(provider, prompt, model, system, temperature, api_key, timeout, dict(options))
+        except Exception as e:
+            if attempt >= RATE_LIMIT_RETRIES or not rate_limiter.is_rate_limited(e): raise
+            delay = limiter.penalize(rate_limiter.retry_after(e))
+            print(f"🚦 [Gateway] {model} 429 -> {delay:.0f}초 대기 후 재시도 ({attempt + 1}/{RATE_LIMIT_RETRIES})")
+            continue
+        limiter.settle(est, used)
+        return text
+
+def _call(provider, prompt, model, system, temperature, api_key, timeout, options):
+    """-> (응답 본문, 실제 사용 토큰 - 모르면 None)"""
+    if provider == "openai":
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        if temperature is not None: options["temperature"] = temperature
+        res = openai_client(api_key).chat.completions.create(model=model, messages=messages, timeout=timeout, **options)
+        used = res.usage.total_tokens if getattr(res, "usage", None) else None
+        return (res.choices[0].message.content or "").strip(), used
+
+    config = dict(options)
+    if temperature is not None: config["temperature"] = temperature
+    res = gemini_model(model, system, api_key).generate_content(
+        prompt, generation_config=config or None, request_options={"timeout": timeout})
+    usage = getattr(res, "usage_metadata", None)
+    return (res.text or "").strip(), getattr(usage, "total_token_count", None) or None
+
+def generate_stream(prompt, model, system=None, temperature=None, api_key=None, timeout=None, cancel=None, **options):
+    """
+    응답을 받는 대로 조각(str) 단위로 흘려보냄 -> 첫 토큰이 오는 순간부터 화면에 표시 가능
+    Args:
+        cancel: threading.Event 같은 것 (is_set() 이 True가 되면 중단) - 소비 측에서 close() 해도 중단
+    캐시는 쓰지 않음. 429는 첫 조각이 오기 전까지만 재시도
+    """
+    provider = provider_of(model)
+    api_key = key_for(provider, api_key)
+    limiter = rate_limiter.get(provider, api_key)
+    est = _estimate(prompt, system)
+    timeout = timeout or TIMEOUT
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        limiter.acquire(est)
+        try:
+            stream = _open_stream(provider, prompt, model, system, temperature, api_key, timeout, dict(options))
+            break
+        except Exception as e:
+            if attempt >= RATE_LIMIT_RETRIES or not rate_limiter.is_rate_limited(e): raise
+            delay = limiter.penalize(rate_limiter.retry_after(e))
+            print(f"🚦 [Gateway] {model} 429 -> {delay:.0f}초 대기 후 재시도 ({attempt + 1}/{RATE_LIMIT_RETRIES})")
+
+    used = None
+    try:
+        for text, usage in stream:
+            if usage: used = usage
+            if cancel is not None and cancel.is_set(): break
+            if text: yield text
+    finally:
+        # 중단/취소돼도 연결을 바로 닫아서 남은 토큰을 더 받지 않음
+        close = getattr(stream, "close", None)
+        if close: close()
+        limiter.settle(est, used)
+
+def _open_stream(provider, prompt, model, system, temperature, api_key, timeout, options):
+    """-> (조각, 사용 토큰 또는 None) 을 내놓는 제너레이터 (연결은 여기서 열어서 429를 바로 받음)"""
+    if provider == "openai":
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        if temperature is not None: options["temperature"] = temperature
+        res = openai_client(api_key).chat.completions.create(model=model, messages=messages, timeout=timeout, stream=True,
+                                                             stream_options={"include_usage": True}, **options)
+        def chunks():
+            try:
+                for c in res:
+                    text = c.choices[0].delta.content if c.choices else None
+                    yield text, c.usage.total_tokens if getattr(c, "usage", None) else None
+            finally:
+                res.close()
+        return chunks()
+
+    config = dict(options)
+    if temperature is not None: config["temperature"] = temperature
+    res = gemini_model(model, system, api_key).generate_content(
+        prompt, generation_config=config or None, request_options={"timeout": timeout}, stream=True)
+    def chunks():
+        for c in res:
+            usage = getattr(c, "usage_metadata", None)
+            try: text = c.text
+            except ValueError: text = ""    # 내용 없는 조각 (안전 필터/종료 신호)
+            yield text, getattr(usage, "total_token_count", None) or None
+    return chunks()
+
+def list_models(provider="google", api_key=None, with_methods=False):
+    """
+    텍스트 생성 가능한 모델 이름 목록 (네트워크 호출 - 평소에는 model_catalog 의 파일 캐시를 쓸 것)
+    with_methods=True 면 {이름: 지원 기능 목록} (OpenAI는 기능 정보가 없어 채팅 계열에 'chat')
+    """
+    if provider == "openai":
+        names = sorted(m.id for m in openai_client(api_key).models.list())
+        if not with_methods: return names
+        return {n: ["chat"] if provider_of(n) == "openai" else [] for n in names}
+    # 클라이언트 준비만 잠금 안에서 - 목록 RPC는 잠금 밖 (오프라인이면 수십 초 걸려 다른 호출이 전부 멈춤)
+    with _lock:
+        if _PER_KEY_GEMINI:
+            client = _gemini_manager(api_key).get_default_client("model")
+        else:
+            _configure_global(api_key)
+            client = None
+    listing = client.list_models() if client is not None else genai.list_models()
+    models = {m.name.replace("models/", ""): list(m.supported_generation_methods) for m in listing}
+    if with_methods: return models
+    return [n for n, methods in models.items() if "generateContent" in methods]
+
+if __name__ == "__main__":
+    for provider in ("google", "openai"):
+        if default_key(provider):
+            try: print(f"🔌 [Gateway] {provider}: 모델 {len(list_models(provider))}개 확인")
+            except Exception as e: print(f"⚠️ [Gateway] {provider}: {e}")
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+
+# =========================================================
+# 📇 Model Catalog (모델 목록 디스크 캐시)
+# 역할: 제공자별 사용 가능 모델 목록 + 기능
+#       '99_지능형_프롬프트/*_models.json' (사람이 관리하는 목록, 순서 = 우선순위) 는 읽기만 함
+#       API에서 받은 목록은 .factory_cache/model_catalog/ 에 따로 저장하고, 읽을 때 관리 목록 뒤에 합침
+#       모델 선택(model_selector / processor_pro)은 파일만 읽음 -> 시작할 때 네트워크 호출 0
+#       갱신 주기가 지나면 (키가 있을 때만) 백그라운드에서 목록을 다시 받음 (선택 로직은 기다리지 않음)
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+CATALOG_DIR = PROJECT_ROOT / "00_기준정보_보물창고" / "99_지능형_프롬프트"
+REFRESH_DIR = PROJECT_ROOT / ".factory_cache" / "model_catalog"
+PROVIDERS = {"google": "Google", "openai": "OpenAI", "anthropic": "Anthropic"}
+
+REFRESH_HOURS = float(os.getenv("MODEL_CATALOG_REFRESH_HOURS", "24"))
+RETRY_SECONDS = 600     # 갱신 실패(오프라인 등) 후 다시 시도하기까지
+# 기능 정보가 없는 옛 목록에서 글쓰기용이 아닌 모델을 거르는 이름 표식
+_NON_TEXT_MARKS = ("image", "tts", "audio", "embedding", "research", "transcribe", "realtime", "dall-e", "whisper")
+
+_lock = threading.Lock()
+_cache = {}         # 제공자 -> ((관리 목록 mtime, 갱신본 mtime), 합친 데이터)
+_refreshing = set()
+_last_attempt = {}  # 제공자 -> 마지막 갱신 시도 시각
+
+def _path(provider):
+    return CATALOG_DIR / f"{provider}_models.json"
+
+def _refresh_path(provider):
+    return REFRESH_DIR / f"{provider}_models.json"
+
+def _mtime(path):
+    try: return path.stat().st_mtime
+    except OSError: return None
+
+def _read(path):
+    try: return json.loads(path.read_text(encoding='utf-8'))
+    except Exception: return {}
+
+def load(provider):
+    """
+    관리 목록 + 갱신본을 합친 카탈로그 (두 파일 mtime이 같으면 메모리 사본 재사용). 둘 다 없으면 빈 목록
+    관리 목록의 모델/순서는 그대로 두고, 갱신본에만 있는 모델을 뒤에 붙이며 기능 정보(capabilities)는 갱신본 것을 씀
+    """
+    stamp = (_mtime(_path(provider)), _mtime(_refresh_path(provider)))
+    if stamp == (None, None): return {"provider": PROVIDERS.get(provider, provider), "models": []}
+    with _lock:
+        hit = _cache.get(provider)
+        if hit and hit[0] == stamp: return hit[1]
+    curated = _read(_path(provider)) if stamp[0] else {}
+    fetched = _read(_refresh_path(provider)) if stamp[1] else {}
+    models = list(curated.get("models", []))
+    models += [m for m in fetched.get("models", []) if m not in models]
+    data = {**curated, "models": models}
+    if fetched.get("capabilities"): data["capabilities"] = fetched["capabilities"]
+    if fetched.get("refreshed_at"): data["refreshed_at"] = fetched["refreshed_at"]
+    with _lock: _cache[provider] = (stamp, data)
+    return data
+
+def _short(name):
+    """비교용 이름 ('models/' 제거, 'claude-opus-4.6' 과 'claude-opus-4-6' 같게)"""
+    return name.replace("models/", "").replace(".", "-").lower()
+
+def is_stale(provider):
+    data = load(provider)
+    refreshed = data.get("refreshed_at")
+    if refreshed is None:   # 손으로 만든 옛 파일은 updated 날짜 기준
+        try: refreshed = datetime.strptime(data.get("updated", ""), "%Y-%m-%d").timestamp()
+        except ValueError: refreshed = 0
+    return time.time() - refreshed > REFRESH_HOURS * 3600
+
+def text_models(provider):
+    """글 생성 가능한 모델 이름 목록 (파일 순서 유지, google은 'models/' 접두사 포함 원본 이름)"""
+    data = load(provider)
+    caps = data.get("capabilities") or {}
+    out = []
+    for name in data.get("models", []):
+        methods = caps.get(name)
+        if methods is not None:
+            if "generateContent" in methods or "chat" in methods: out.append(name)
+        elif not any(mark in name.lower() for mark in _NON_TEXT_MARKS):
+            out.append(name)
+    return out
+
+def resolve(provider, wanted):
+    """
+    원하는 모델명을 카탈로그의 실제 이름으로 맞춤 (정확히 같으면 그대로, 없으면 같은 계열 - 예: gemini-3-pro -> gemini-3-pro-preview)
+    Returns:
+        카탈로그에서 찾은 이름, 못 찾으면 None
+    """
+    models = text_models(provider)
+    want = _short(wanted)
+    for name in models:
+        if _short(name) == want: return name
+    for name in models:
+        if _short(name).startswith(want + "-"): return name
+    return None
+
+# ---------------------------------------------------------
+# 🔄 [Refresh] 목록 갱신 (네트워크 - 백그라운드 전용)
+# ---------------------------------------------------------
+def _key(provider, api_key):
+    import llm_gateway
+    return api_key or llm_gateway.default_key(provider)
+
+def refresh(provider, api_key=None):
+    """
+    제공자에게 목록을 받아 갱신본(.factory_cache)만 교체 - 관리 목록 파일은 건드리지 않음
+    Anthropic은 목록 API가 없어 그대로 둠. 키가 없으면 아무것도 하지 않음
+    """
+    if provider not in ("google", "openai"): return False
+    api_key = _key(provider, api_key)
+    if not api_key: return False
+    import llm_gateway
+    caps = llm_gateway.list_models(provider, api_key, with_methods=True)
+    if provider == "google":
+        caps = {f"models/{name}": methods for name, methods in caps.items()}
+    data = {
+        "provider": PROVIDERS[provider],
+        "updated": datetime.now().strftime("%Y-%m-%d"),
+        "refreshed_at": time.time(),
+        "models": list(caps),
+        "capabilities": caps,
+    }
+    path = _refresh_path(provider)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding='utf-8')
+    os.replace(tmp, path)
+    print(f"📇 [Model Catalog] {PROVIDERS[provider]} 모델 {len(caps)}개 갱신")
+    return True
+
+def refresh_in_background(provider, api_key=None):
+    """오래된 카탈로그만, 제공자당 한 번에 하나씩 데몬 스레드로 갱신 (키가 없으면 건너뜀)"""
+    if provider not in ("google", "openai") or not is_stale(provider): return
+    api_key = _key(provider, api_key)
+    if not api_key: return
+    with _lock:
+        if provider in _refreshing or time.time() - _last_attempt.get(provider, 0) < RETRY_SECONDS: return
+        _refreshing.add(provider)
+        _last_attempt[provider] = time.time()
+
+    def run():
+        try: refresh(provider, api_key)
+        except Exception as e: print(f"⚠️ [Model Catalog] {provider} 갱신 실패 (기존 목록 유지): {e}")
+        finally:
+            with _lock: _refreshing.discard(provider)
+
+    threading.Thread(target=run, daemon=True, name=f"catalog-{provider}").start()
+
+if __name__ == "__main__":
+    for p in PROVIDERS:
+        try: refresh(p)
+        except Exception as e: print(f"⚠️ [Model Catalog] {p}: {e}")
+        print(f" - {p}: {len(text_models(p))}개 (stale={is_stale(p)})")
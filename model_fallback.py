@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+# =========================================================
+# 🧭 Model Fallback (후보 모델 체인 + 부재 캐시)
+# 역할: "gpt-5.2 -> ... -> gpt-4o" 처럼 순서대로 찔러보던 체인에서
+#       없는/권한 없는 모델을 TTL 동안 기억해 건너뛰고, 마지막으로 성공한 모델로 바로 감
+#       TTL이 지난 상위 모델은 본 호출을 막지 않고 백그라운드에서 짧게 다시 확인(probe)
+# 저장: .factory_cache/model_health.json (체인별 상태 - 스크립트를 다시 실행해도 유지)
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+STATE_PATH = PROJECT_ROOT / ".factory_cache" / "model_health.json"
+
+UNAVAILABLE_TTL = int(os.getenv("MODEL_UNAVAILABLE_TTL", "1800"))   # 초 (없는 모델로 기억하는 기간)
+PROBE_PROMPT = "Reply with OK."
+
+_file_lock = threading.Lock()
+
+def _load_state():
+    try: return json.loads(STATE_PATH.read_text(encoding='utf-8'))
+    except Exception: return {}
+
+def _save_state(name, chain_state):
+    with _file_lock:
+        state = _load_state()
+        state[name] = chain_state
+        STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = STATE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1), encoding='utf-8')
+        os.replace(tmp, STATE_PATH)
+
+def is_unavailable(exc):
+    """모델 자체가 없거나 권한이 없는 오류만 True (일시 장애/쿼터는 다음 호출 때 다시 시도)"""
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if status in (403, 404): return True
+    if type(exc).__name__ in ("NotFoundError", "PermissionDeniedError", "NotFound", "PermissionDenied"): return True
+    msg = str(exc).lower()
+    return "model" in msg and any(k in msg for k in ("not found", "does not exist", "not supported", "model_not_found", "do not have access"))
+
+class FallbackChain:
+    def __init__(self, name, models, probe=None, ttl=None):
+        """
+        Args:
+            name: 상태 파일 안의 체인 이름
+            models: 우선순위 순 모델 목록
+            probe: probe(model) - 예외 없이 끝나면 사용 가능 (백그라운드 재확인용, 없으면 TTL 지나면 본 호출에서 재시도)
+        """
+        self.name, self.models, self.probe = name, list(models), probe
+        self.ttl = UNAVAILABLE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._probing = set()
+        saved = _load_state().get(name, {})
+        self.down = {m: v for m, v in saved.get("down", {}).items() if m in self.models}    # 모델 -> {until, error}
+        self.last_good = saved.get("last_good") if saved.get("last_good") in self.models else None
+
+    def _persist(self):
+        try: _save_state(self.name, {"down": self.down, "last_good": self.last_good})
+        except OSError as e: print(f"⚠️ [Fallback] 상태 저장 실패: {e}")
+
+    def order(self):
+        """이번 호출에서 시도할 순서 (부재 표시된 모델은 뒤로, 만료된 것은 재확인 시작)"""
+        now = time.time()
+        with self._lock:
+            up = [m for m in self.models if m not in self.down]
+            expired = [m for m, v in self.down.items() if v["until"] <= now]
+        for m in expired:
+            if self.probe: self._start_probe(m)
+            else: up.append(m)      # 확인 수단이 없으면 본 호출에서 다시 시도
+        up.sort(key=self.models.index)
+        # 전부 부재 표시여도 마지막 수단으로는 시도 (마지막 성공 모델부터)
+        rest = sorted((m for m in self.models if m not in up), key=lambda m: (m != self.last_good, self.models.index(m)))
+        return up + rest
+
+    def _start_probe(self, model):
+        with self._lock:
+            if model in self._probing: return
+            self._probing.add(model)
+
+        def run():
+            try:
+                self.probe(model)
+                self.mark_ok(model)
+                print(f"🧭 [Fallback] {self.name}: {model} 재확인 성공 -> 다시 우선 사용")
+            except Exception as e:
+                self.mark_down(model, e)
+            finally:
+                with self._lock: self._probing.discard(model)
+
+        threading.Thread(target=run, daemon=True, name=f"probe-{model}").start()
+
+    def mark_ok(self, model):
+        with self._lock:
+            changed = self.down.pop(model, None) is not None or self.last_good != model
+            self.last_good = model
+        if changed: self._persist()
+
+    def mark_down(self, model, exc):
+        with self._lock:
+            self.down[model] = {"until": time.time() + self.ttl, "error": str(exc)[:200]}
+        self._persist()
+
+    def call(self, fn, label="Fallback", stop=None):
+        """
+        fn(model) 을 우선순위대로 호출. 부재 오류는 TTL 동안 기억, 일시 오류는 기억하지 않고 다음 모델로.
+        Args:
+            stop: threading.Event - set() 되면 다음 모델로 넘어가지 않고 바로 포기 (헤지 요청에서 진 쪽)
+        Returns:
+            (결과, 사용한 모델) - 전부 실패하면 (None, None)
+        """
+        for model in self.order():
+            if stop is not None and stop.is_set(): break
+            try:
+                result = fn(model)
+            except Exception as e:
+                if stop is not None and stop.is_set(): break
+                if is_unavailable(e):
+                    self.mark_down(model, e)
+                    print(f"   ⏭️ [{label}] {model} 사용 불가 -> {self.ttl // 60}분간 건너뜀 ({str(e)[:80]})")
+                else:
+                    print(f"   ⚠️ [{label}] {model} 호출 실패 -> 다음 모델 ({str(e)[:80]})")
+                continue
+            self.mark_ok(model)
+            return result, model
+        return None, None
+
+def gateway_probe(api_key=None):
+    """llm_gateway 로 아주 짧은 호출을 보내 모델 존재를 확인하는 probe (캐시 안 씀)"""
+    import llm_gateway
+    return lambda model: llm_gateway.generate(PROBE_PROMPT, model, api_key=api_key)
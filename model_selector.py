@@ -1,7 +1,8 @@
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+import model_catalog
+
 # 환경변수 로드
 load_dotenv()
 
@@ -39,6 +40,20 @@ def get_api_key(provider="GOOGLE"):
         return os.getenv("ANTHROPIC_API_KEY")
     return None
 
+_CATALOG_PROVIDER = {"GOOGLE": "google", "OPENAI": "openai", "ANTHROPIC": "anthropic"}
+
+def _pick(provider, tier):
+    """
+    라인업의 모델명을 모델 카탈로그(99_지능형_프롬프트/*_models.json)의 실제 이름으로 맞춤 - 네트워크 호출 없음
+    카탈로그가 오래됐으면 백그라운드 갱신만 걸어두고, 목록에 없으면 라인업 이름 그대로
+    """
+    wanted = MODEL_SPECS[provider][tier]
+    catalog = _CATALOG_PROVIDER[provider]
+    model_catalog.refresh_in_background(catalog, get_api_key(provider))
+    resolved = model_catalog.resolve(catalog, wanted)
+    if resolved and provider == "GOOGLE" and not resolved.startswith("models/"): resolved = f"models/{resolved}"
+    return resolved or wanted
+
 def find_best_model(task_type="creative"):
     """
     작업 유형(task_type)에 따라 2026년 최적의 모델을 반환합니다.
@@ -58,29 +73,29 @@ def find_best_model(task_type="creative"):
 
     # 1. 창의적 기획 / 메인 집필 (Creative)
     if task_type == "creative":
-        if google_key: return MODEL_SPECS["GOOGLE"]["flagship"] # Gemini 3 Pro
-        if openai_key: return MODEL_SPECS["OPENAI"]["flagship"] # GPT-5.2
-        if anthropic_key: return MODEL_SPECS["ANTHROPIC"]["flagship"] # Opus 4.6
+        if google_key: return _pick("GOOGLE", "flagship") # Gemini 3 Pro
+        if openai_key: return _pick("OPENAI", "flagship") # GPT-5.2
+        if anthropic_key: return _pick("ANTHROPIC", "flagship") # Opus 4.6
 
     # 2. 논리적 분석 / 비평 / 전략 수립 (Logic & Reasoning)
     elif task_type == "logic":
-        if openai_key: return MODEL_SPECS["OPENAI"]["reasoning"] # o3 (Thinking)
-        if google_key: return MODEL_SPECS["GOOGLE"]["reasoning"] # Gemini 3 Deep Think
-        if anthropic_key: return MODEL_SPECS["ANTHROPIC"]["flagship"] # Opus 4.6
+        if openai_key: return _pick("OPENAI", "reasoning") # o3 (Thinking)
+        if google_key: return _pick("GOOGLE", "reasoning") # Gemini 3 Deep Think
+        if anthropic_key: return _pick("ANTHROPIC", "flagship") # Opus 4.6
 
     # 3. 코딩 / 시스템 구축 (Coding)
     elif task_type == "coding":
-        if openai_key: return MODEL_SPECS["OPENAI"]["reasoning"] # o3 (Coding King)
-        if google_key: return MODEL_SPECS["GOOGLE"]["flagship"] # Gemini 3 Pro
+        if openai_key: return _pick("OPENAI", "reasoning") # o3 (Coding King)
+        if google_key: return _pick("GOOGLE", "flagship") # Gemini 3 Pro
         
     # 4. 단순 요약 / 빠른 처리 (Speed)
     elif task_type == "speed":
-        if google_key: return MODEL_SPECS["GOOGLE"]["fast"] # Gemini 3 Flash
-        if openai_key: return MODEL_SPECS["OPENAI"]["fast"] # GPT-5-nano
-        if anthropic_key: return MODEL_SPECS["ANTHROPIC"]["fast"] # Haiku
+        if google_key: return _pick("GOOGLE", "fast") # Gemini 3 Flash
+        if openai_key: return _pick("OPENAI", "fast") # GPT-5-nano
+        if anthropic_key: return _pick("ANTHROPIC", "fast") # Haiku
 
     # 기본값 (Fallback)
-    return "models/gemini-3-pro"
+    return _pick("GOOGLE", "flagship")
 
 # 테스트용
 if __name__ == "__main__":
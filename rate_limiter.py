@@ -0,0 +1,119 @@
+import os
+import re
+import time
+import hashlib
+import threading
+
+# =========================================================
+# 🚦 Rate Limiter (제공자 + 키별 토큰 버킷)
+# 역할: 여기저기 박혀 있던 time.sleep(1) 대신, 실제 쿼터(RPM / TPM)만큼만 기다리게 함
+#       요청 수 버킷 + 토큰 수 버킷을 키마다 따로 두고, 429(Retry-After)가 오면 그 키 전체를 잠시 멈춤
+# 사용: llm_gateway 가 호출 전 acquire(), 응답 후 settle(), 429면 penalize() (모듈에서 직접 부를 일 없음)
+# =========================================================
+
+# 제공자별 기본 쿼터 (.env에서 조절, 0이면 제한 없음)
+LIMITS = {
+    "google": (int(os.getenv("GEMINI_RPM", "150")), int(os.getenv("GEMINI_TPM", "2000000"))),
+    "openai": (int(os.getenv("OPENAI_RPM", "500")), int(os.getenv("OPENAI_TPM", "800000"))),
+}
+DEFAULT_RETRY_SECONDS = 10      # 429인데 Retry-After 가 없을 때 첫 대기 (이후 두 배씩)
+MAX_RETRY_SECONDS = 120
+
+class TokenBucket:
+    """분당 capacity 만큼 차오르는 버킷. 잔량이 모자라면 미리 빚을 지고(예약) 그만큼만 기다림 -> 먼저 온 순서 보장"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def reserve(self, amount, now):
+        """amount 만큼 예약하고, 실제로 쓸 수 있을 때까지 남은 초를 돌려줌"""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)    # 한 번에 버킷보다 큰 요청도 막히지 않게
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount, now):
+        """예상보다 적게(또는 많이) 썼으면 차이만큼 되돌림"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+class KeyLimiter:
+    def __init__(self, rpm, tpm):
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0     # 429 이후 이 시각까지 키 전체 정지
+        self.strikes = 0             # 연속 429 횟수 (Retry-After 없을 때 대기 배수)
+        self.waited = 0.0
+
+    def acquire(self, est_tokens):
+        """호출 전에 부름. 쿼터가 빌 때까지 필요한 만큼만 대기"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.requests: wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens: wait = max(wait, self.tokens.reserve(est_tokens, now))
+            self.waited += wait
+        if wait > 0: time.sleep(wait)
+
+    def settle(self, est_tokens, used_tokens):
+        """응답 후 실제 사용 토큰으로 정산"""
+        with self._lock:
+            self.strikes = 0
+            if self.tokens and used_tokens:
+                self.tokens.refund(est_tokens - used_tokens, time.monotonic())
+
+    def penalize(self, retry_after=None):
+        """429 수신 -> 모든 호출자가 Retry-After 만큼 쉬도록 (없으면 지수 대기)"""
+        with self._lock:
+            self.strikes += 1
+            delay = retry_after if retry_after else min(MAX_RETRY_SECONDS, DEFAULT_RETRY_SECONDS * 2 ** (self.strikes - 1))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            return delay
+
+_lock = threading.Lock()
+_limiters = {}  # (제공자, 키 해시) -> KeyLimiter
+
+def get(provider, api_key):
+    key = (provider, hashlib.sha1((api_key or "").encode('utf-8')).hexdigest()[:12])
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            rpm, tpm = LIMITS.get(provider, (0, 0))
+            limiter = _limiters[key] = KeyLimiter(rpm, tpm)
+        return limiter
+
+# ---------------------------------------------------------
+# 🔎 [429] 예외에서 Retry-After 읽기
+# ---------------------------------------------------------
+_RETRY_RE = re.compile(r"(?:retry[ _-]?(?:after|delay|in)\D{0,20}?)(\d+(?:\.\d+)?)\s*(ms|s)?", re.I)
+
+def is_rate_limited(exc):
+    """일시적 쿼터 초과만 True (결제 한도 소진 insufficient_quota 는 기다려도 안 풀리므로 제외)"""
+    if "insufficient_quota" in str(exc): return False
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if status == 429 or type(exc).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests"): return True
+    return "429" in str(exc)[:200]
+
+def retry_after(exc):
+    """OpenAI: 응답 헤더 retry-after(-ms) / Gemini: 에러 본문의 retry_delay / 없으면 None"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"): return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"): return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    m = _RETRY_RE.search(str(exc))
+    if m: return float(m.group(1)) / (1000 if (m.group(2) or "").lower() == "ms" else 1)
+    return None
+
+def stats():
+    with _lock:
+        return {f"{p}:{k}": {"waited_seconds": round(l.waited, 1), "strikes": l.strikes} for (p, k), l in _limiters.items()}
@@ -0,0 +1,163 @@
+import re
+import json
+import threading
+from pathlib import Path
+from collections import Counter
+import numpy as np
+
+import corpus_index
+
+# =========================================================
+# 🎯 [Reference Retriever] BM25 관련도 검색 (랜덤 샘플 대체)
+# 역할: 사용자 아이디어/기획안과 가장 관련 있는 참고 문단만 골라 토큰 절약
+# 방식: 한글 음절 n-gram 토큰 -> 역색인(포스팅별 BM25 가중치 미리 계산) -> np.bincount 합산
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+STORY_ANALYSIS_DIR = PROJECT_ROOT / "02_분석실_Analysis" / "03_스토리_분석"
+
+NGRAM_SIZES = (2, 3)
+PASSAGE_CHARS = 1200        # 참고 문단 1개 크기 (회차 전체 대신 문단 단위로 보냄)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+
+def tokenize(text):
+    """어절 안에서 2~3글자 n-gram (조사/어미가 붙어도 어간이 겹치도록)"""
+    grams = []
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) == 1:
+            grams.append(word)
+            continue
+        for n in NGRAM_SIZES:
+            grams.extend(word[i:i+n] for i in range(len(word) - n + 1))
+    return grams
+
+def split_passages(text, size=PASSAGE_CHARS):
+    """문단 경계를 지키며 size 근처로 자르기"""
+    passages, buf = [], ""
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para: continue
+        if buf and len(buf) + len(para) > size:
+            passages.append(buf)
+            buf = ""
+        buf = f"{buf}\n\n{para}" if buf else para
+    if buf: passages.append(buf)
+    return passages
+
+class BM25Index:
+    """문서 목록 -> 역색인. search()는 질의 n-gram의 포스팅만 훑어서 점수 합산"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        vocab = {}
+        doc_ids, term_ids, tfs = [], [], []
+        lengths = np.zeros(len(docs), dtype=np.float32)
+
+        for d, doc in enumerate(docs):
+            counts = Counter(tokenize(doc["text"]))
+            lengths[d] = sum(counts.values())
+            for gram, tf in counts.items():
+                doc_ids.append(d)
+                term_ids.append(vocab.setdefault(gram, len(vocab)))
+                tfs.append(tf)
+
+        self.vocab = vocab
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        # 용어 순으로 정렬 -> CSC 형태 (indptr[t]:indptr[t+1] 이 용어 t의 포스팅)
+        order = np.argsort(term_ids, kind="stable")
+        self.post_docs = doc_ids[order]
+        term_sorted = term_ids[order]
+        self.indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.add.at(self.indptr, term_sorted + 1, 1)
+        self.indptr = np.cumsum(self.indptr)
+
+        # 포스팅별 BM25 가중치 = idf * tf(k1+1) / (tf + k1(1-b+b*dl/avgdl))
+        n_docs = max(len(docs), 1)
+        df = np.diff(self.indptr).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avgdl = float(lengths.mean()) if len(docs) else 1.0
+        tf = tfs[order]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[self.post_docs] / max(avgdl, 1e-9))
+        self.post_weights = (idf[term_sorted] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+    def search(self, query, k=3):
+        if not self.docs: return []
+        q_counts = Counter(self.vocab[g] for g in tokenize(query) if g in self.vocab)
+        if not q_counts: return []
+
+        terms = np.fromiter(q_counts.keys(), dtype=np.int64)
+        q_tf = np.fromiter(q_counts.values(), dtype=np.float32)
+        starts, ends = self.indptr[terms], self.indptr[terms + 1]
+        lens = ends - starts
+        # 질의 용어들의 포스팅 구간을 한 번에 모아서 문서별 합산
+        idx = np.repeat(starts - np.cumsum(np.r_[0, lens[:-1]]), lens) + np.arange(lens.sum())
+        scores = np.bincount(self.post_docs[idx], weights=self.post_weights[idx] * np.repeat(q_tf, lens), minlength=len(self.docs))
+
+        k = min(k, int((scores > 0).sum()))
+        if k == 0: return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [dict(self.docs[i], score=float(scores[i])) for i in top]
+
+# ---------------------------------------------------------
+# 📦 [Collections] 아카이브 문단 / 스토리 분석 JSON
+# ---------------------------------------------------------
+_lock = threading.Lock()
+_cache = {}     # 이름 -> (지문, BM25Index)
+
+def _get_index(name, signature, build_docs):
+    with _lock:
+        cached = _cache.get(name)
+        if cached and cached[0] == signature:
+            return cached[1]
+        index = BM25Index(build_docs())
+        _cache[name] = (signature, index)
+        return index
+
+def _archive_docs():
+    docs = []
+    for ep in corpus_index.iter_episodes():
+        for i, passage in enumerate(split_passages(ep["content"])):
+            docs.append({"name": ep["name"], "title": ep["title"], "genre": ep["genre"], "part": i, "text": passage})
+    return docs
+
+def _story_files():
+    return sorted(STORY_ANALYSIS_DIR.glob("*.json")) if STORY_ANALYSIS_DIR.exists() else []
+
+def story_summary(data):
+    """분석 JSON에서 줄거리 요약 텍스트 뽑기 (구형 synopsis/logline 키도 지원)"""
+    content = data.get("analysis_content", {}) if isinstance(data.get("analysis_content"), dict) else {}
+    return data.get("synopsis") or data.get("logline") or content.get("description", "")
+
+def _story_docs():
+    docs = []
+    for f in _story_files():
+        try:
+            data = json.loads(f.read_text(encoding='utf-8'))
+        except Exception:
+            continue
+        content = data.get("analysis_content", {}) if isinstance(data.get("analysis_content"), dict) else {}
+        text = " ".join([
+            data.get("title", ""), story_summary(data),
+            " ".join(map(str, content.get("key_elements", []))),
+            str(data.get("actionable_insight", ""))
+        ])
+        docs.append({"file": f.name, "title": data.get("title", f.stem), "summary": story_summary(data), "text": text})
+    return docs
+
+def search_archive(query, k=3):
+    """아카이브 회차 문단 중 query와 가장 관련 있는 k개"""
+    index = _get_index("archive", corpus_index.signature(), _archive_docs)
+    return index.search(query, k)
+
+def search_stories(query, k=3):
+    """스토리 분석 JSON 중 query와 가장 관련 있는 k개"""
+    signature = tuple((f.name, f.stat().st_mtime) for f in _story_files())
+    index = _get_index("story", signature, _story_docs)
+    return index.search(query, k)
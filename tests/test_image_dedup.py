@@ -0,0 +1,47 @@
+import sys
+import random
+import shutil
+import string
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent / "99_시스템_도구함"
+if str(TOOLS_DIR) not in sys.path: sys.path.append(str(TOOLS_DIR))
+
+import image_dedup
+
+def _text_page(path, changed_lines=()):
+    """글자가 빽빽한 폰 캡처 흉내 (changed_lines 줄만 다른 문장)"""
+    rnd = random.Random(1)
+    img = Image.new("L", (720, 1560), 255)
+    draw = ImageDraw.Draw(img)
+    for n, y in enumerate(range(80, 1480, 14)):
+        line = "".join(rnd.choice(string.ascii_letters + "    ") for _ in range(110))
+        if n in changed_lines:
+            line = "".join(random.Random(n).choice(string.ascii_letters + "    ") for _ in range(110))
+        draw.text((30, y), line, fill=0)
+    img.save(path)
+
+def test_different_text_pages_are_both_kept(tmp_path):
+    a, b = tmp_path / "001.png", tmp_path / "002.png"
+    _text_page(a)
+    _text_page(b, changed_lines=range(40, 42))
+
+    # 해시/썸네일 기준만으로는 같은 페이지로 보이는 쌍
+    (h_a, t_a), (h_b, t_b) = image_dedup.fingerprint(a), image_dedup.fingerprint(b)
+    assert bin(h_a ^ h_b).count("1") <= image_dedup.MAX_HASH_DISTANCE
+    assert image_dedup._pixel_diff(t_a, t_b) <= image_dedup.MAX_PIXEL_DIFF
+
+    kept, report = image_dedup.dedupe([a, b], workers=1)
+    assert kept == [a, b]
+    assert report["groups"] == []
+
+def test_recaptured_page_is_dropped(tmp_path):
+    a, b = tmp_path / "001.png", tmp_path / "002.png"
+    _text_page(a)
+    shutil.copy(a, b)
+
+    kept, report = image_dedup.dedupe([a, b], workers=1)
+    assert kept == [a]
+    assert report["groups"][0]["dropped"][0]["file"] == "002.png"
@@ -0,0 +1,28 @@
+import sys
+import hashlib
+from pathlib import Path
+
+QC_DIR = Path(__file__).resolve().parent.parent / "06_품질관리_QC"
+if str(QC_DIR) not in sys.path: sys.path.append(str(QC_DIR))
+
+import plagiarism_scanner
+from plagiarism_scanner import corpus_index
+
+TEXT = "\n\n".join(f"{n}번째 문단. 회귀한 황태자는 검을 뽑아 들고 적진 한가운데로 걸어 들어갔다. " * 4 for n in range(6))
+
+def _episode(name, text):
+    return {"sha1": hashlib.sha1(text.encode('utf-8')).hexdigest(), "name": name, "title": "재업로드 테스트", "content": text}
+
+def test_identical_episodes_are_indexed_once(tmp_path, monkeypatch):
+    # 같은 회차가 두 번 올라온 아카이브 (재업로드 / 복사본)
+    episodes = [_episode("a_001_.md", TEXT), _episode("b_001_.md", TEXT)]
+    monkeypatch.setattr(plagiarism_scanner, "INDEX_DIR", tmp_path)
+    monkeypatch.setattr(plagiarism_scanner, "SIG_PATH", tmp_path / "minhash.npz")
+    monkeypatch.setattr(plagiarism_scanner, "DB_PATH", tmp_path / "passages.sqlite3")
+    monkeypatch.setattr(plagiarism_scanner, "_index", None)
+    monkeypatch.setattr(corpus_index, "signature", lambda: "sig-1")
+    monkeypatch.setattr(corpus_index, "iter_episodes", lambda: iter(episodes))
+
+    added = plagiarism_scanner.sync()
+    assert added == len([p for p in plagiarism_scanner.split_passages(TEXT) if len(p) >= plagiarism_scanner.MIN_PASSAGE_CHARS])
+    assert plagiarism_scanner.scan(TEXT)["similarity_rate"] > 90
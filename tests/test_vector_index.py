@@ -0,0 +1,28 @@
+import sys
+import hashlib
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path: sys.path.append(str(PROJECT_ROOT))
+
+import corpus_index
+import vector_index
+
+TEXT = "\n\n".join(f"{n}번째 문단. 회귀한 황태자는 검을 뽑아 들고 적진 한가운데로 걸어 들어갔다. " * 4 for n in range(6))
+
+def _episode(name, text):
+    return {"sha1": hashlib.sha1(text.encode('utf-8')).hexdigest(), "name": name, "title": "재업로드 테스트", "content": text}
+
+def test_identical_episodes_are_indexed_once(tmp_path, monkeypatch):
+    # 같은 회차가 두 번 올라온 아카이브 (재업로드 / 복사본)
+    episodes = [_episode("a_001_.md", TEXT), _episode("b_001_.md", TEXT)]
+    monkeypatch.setattr(vector_index, "VECTOR_DIR", tmp_path)
+    monkeypatch.setattr(vector_index, "MATRIX_PATH", tmp_path / "archive.f32")
+    monkeypatch.setattr(vector_index, "DB_PATH", tmp_path / "archive_ids.sqlite3")
+    monkeypatch.setattr(vector_index, "_matrix", None)
+    monkeypatch.setattr(corpus_index, "signature", lambda: "sig-1")
+    monkeypatch.setattr(corpus_index, "iter_episodes", lambda: iter(episodes))
+
+    added = vector_index.sync()
+    assert added == len([p for p in vector_index.split_passages(TEXT) if len(p) >= vector_index.MIN_PASSAGE_CHARS])
+    assert vector_index.search("회귀한 황태자는 검을 뽑아", k=1)
@@ -0,0 +1,210 @@
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+import numpy as np
+
+import corpus_index
+from reference_retriever import tokenize, split_passages
+
+# =========================================================
+# 🧭 [Vector Index] 의미 기반 문단 검색 (로컬 전용, 네트워크 X)
+# 역할: 표현은 달라도 비슷한 클리셰/분위기의 아카이브 문단 찾기
+# 방식: n-gram 해싱 벡터(float32) -> 메모리 맵 행렬 + SQLite ID 테이블
+#       새 회차는 행렬 끝에 덧붙이기만 함 (전체 재구축 X)
+# =========================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+VECTOR_DIR = PROJECT_ROOT / ".factory_cache" / "vectors"
+MATRIX_PATH = VECTOR_DIR / "archive.f32"
+DB_PATH = VECTOR_DIR / "archive_ids.sqlite3"
+
+DIM = int(os.getenv("VECTOR_DIM", "256"))
+MIN_PASSAGE_CHARS = 200     # '끝 ⓒ작가' 같은 꼬리 조각은 색인하지 않음
+SEARCH_CHUNK_ROWS = 65536   # 한 번에 곱할 행 수 (메모리 피크 제한)
+
+_lock = threading.Lock()
+_matrix = None              # (행 수, memmap)
+_inactive = None            # 아카이브에서 지워진 행 번호 배열
+
+# ---------------------------------------------------------
+# 🔢 [Vectorizer] 해싱 n-gram 벡터
+# ---------------------------------------------------------
+def embed(texts):
+    """텍스트 목록 -> (N, DIM) float32, 행마다 L2 정규화"""
+    out = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        grams = tokenize(text)
+        if not grams: continue
+        hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint32, count=len(grams))
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)  # 해시 충돌 상쇄용 부호
+        np.add.at(out[row], hashes % DIM, signs)
+    out = np.sign(out) * np.log1p(np.abs(out))                                 # 자주 나오는 n-gram 영향 완화
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    return out / np.maximum(norms, 1e-9)
+
+# ---------------------------------------------------------
+# 💾 [Storage] 메모리 맵 행렬 + ID 테이블
+# ---------------------------------------------------------
+def _connect():
+    VECTOR_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS rows (
+        row INTEGER PRIMARY KEY,    -- 행렬의 행 번호
+        key TEXT UNIQUE,            -- 회차 해시 + 문단 번호
+        name TEXT,
+        title TEXT,
+        text TEXT,
+        active INTEGER DEFAULT 1
+    );
+    CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+    """)
+    return conn
+
+def _meta(conn, key):
+    row = conn.execute("SELECT v FROM meta WHERE k=?", (key,)).fetchone()
+    return row["v"] if row else None
+
+def _reset(conn):
+    conn.execute("DELETE FROM rows")
+    conn.execute("DELETE FROM meta")
+    conn.execute("INSERT INTO meta(k, v) VALUES ('dim', ?)", (str(DIM),))
+    MATRIX_PATH.unlink(missing_ok=True)
+
+def sync():
+    """
+    아카이브 색인과 맞춰 새 문단만 벡터화해서 덧붙입니다.
+
+    Returns:
+        추가된 행 수
+    """
+    global _matrix
+    signature = corpus_index.signature()
+    conn = _connect()
+    try:
+        if _meta(conn, "signature") == signature and _meta(conn, "dim") == str(DIM):
+            return 0
+
+        conn.execute("BEGIN IMMEDIATE") # 다른 프로세스와 동시에 덧붙이지 않도록
+        if _meta(conn, "dim") != str(DIM): _reset(conn)
+
+        known = {r["key"]: r["active"] for r in conn.execute("SELECT key, active FROM rows")}
+        n_rows = len(known)
+        new_rows, seen = [], set()
+        for ep in corpus_index.iter_episodes():
+            for i, passage in enumerate(split_passages(ep["content"])):
+                if len(passage) < MIN_PASSAGE_CHARS: continue
+                key = f"{ep['sha1']}:{i}"
+                seen.add(key)
+                if key not in known:
+                    known[key] = 1  # 같은 내용의 회차(재업로드/복사본)는 이번 회차에서도 한 번만
+                    new_rows.append((key, ep["name"], ep["title"], passage))
+
+        # 지워진 회차는 행렬에서 빼지 않고 비활성 표시만 (재구축 방지)
+        conn.execute("UPDATE rows SET active=0 WHERE active=1 AND key NOT IN (SELECT value FROM json_each(?))", (json.dumps(sorted(seen), ensure_ascii=False),))
+        conn.execute("UPDATE rows SET active=1 WHERE active=0 AND key IN (SELECT value FROM json_each(?))", (json.dumps(sorted(seen), ensure_ascii=False),))
+
+        if new_rows:
+            vectors = embed([r[3] for r in new_rows])
+            # 중간에 죽었던 흔적(행 수보다 긴 파일)은 잘라내고 이어 쓰기
+            with open(MATRIX_PATH, "ab") as f:
+                f.truncate(n_rows * DIM * 4)
+                f.write(vectors.tobytes())
+            conn.executemany(
+                "INSERT INTO rows(row, key, name, title, text) VALUES (?,?,?,?,?)",
+                [(n_rows + i, *r) for i, r in enumerate(new_rows)]
+            )
+
+        conn.execute("INSERT OR REPLACE INTO meta(k, v) VALUES ('signature', ?)", (signature,))
+        conn.commit()
+        with _lock: _matrix = None # 다음 검색 때 새 크기로 다시 매핑
+        return len(new_rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def _load_matrix():
+    global _matrix, _inactive
+    with _lock:
+        if _matrix is not None: return _matrix
+        conn = _connect()
+        try:
+            n_rows = conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+            _inactive = np.array([r[0] for r in conn.execute("SELECT row FROM rows WHERE active=0")], dtype=np.int64)
+        finally:
+            conn.close()
+        if n_rows == 0 or not MATRIX_PATH.exists():
+            _matrix = (0, None)
+        else:
+            _matrix = (n_rows, np.memmap(MATRIX_PATH, dtype=np.float32, mode="r", shape=(n_rows, DIM)))
+        return _matrix
+
+# ---------------------------------------------------------
+# 🔎 [Search] 배치 코사인 검색
+# ---------------------------------------------------------
+def search(queries, k=5):
+    """
+    Args:
+        queries: 질의 문자열 또는 문자열 목록
+    Returns:
+        질의별 [{name, title, text, score}] 목록 (문자열 1개를 넣으면 목록 1개만 반환)
+    """
+    single = isinstance(queries, str)
+    if single: queries = [queries]
+    sync()
+    n_rows, matrix = _load_matrix()
+    if not n_rows:
+        return [] if single else [[] for _ in queries]
+
+    q = embed(queries)
+    k = min(k, n_rows)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+    for start in range(0, n_rows, SEARCH_CHUNK_ROWS):
+        block = np.asarray(matrix[start:start + SEARCH_CHUNK_ROWS])
+        scores = q @ block.T
+        if len(_inactive):
+            dead = _inactive[(_inactive >= start) & (_inactive < start + len(block))] - start
+            scores[:, dead] = -np.inf
+        # 블록별 상위 k만 남기고 누적 후보와 합치기
+        kk = min(k, scores.shape[1])
+        part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+        best_rows = np.concatenate([best_rows, part + start], axis=1)
+        if best_scores.shape[1] > k:
+            keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+    wanted = sorted({int(r) for r in best_rows.ravel()})
+    conn = _connect()
+    try:
+        marks = ",".join("?" * len(wanted))
+        info = {r["row"]: dict(r) for r in conn.execute(f"SELECT row, name, title, text FROM rows WHERE row IN ({marks})", wanted)}
+    finally:
+        conn.close()
+
+    results = []
+    for qi in range(len(queries)):
+        hits = []
+        for row, score in zip(best_rows[qi], best_scores[qi]):
+            if not np.isfinite(score) or score <= 0: continue
+            meta = info.get(int(row))
+            if meta: hits.append({"name": meta["name"], "title": meta["title"], "text": meta["text"], "score": float(score)})
+        results.append(hits)
+    return results[0] if single else results
+
+if __name__ == "__main__":
+    print(f"🧭 [Vector Index] 새 문단 {sync()}개 추가")